@@ -13,22 +13,64 @@ try:
 except Exception as e:
     # Handle cases where the config file is missing or invalid
     print(f"Error reading {CONFIG_FILE}: {e}")
+    config = {}
     PROJECT = "default_project"  # Fallback project if an error occurs
 
 # Ensure CircuitPython can find the projects folder
 PROJECTS_DIR = "/projects"
 sys.path.append(PROJECTS_DIR)
 
-print(f"DEBUG: Available projects: {os.listdir(PROJECTS_DIR)}")
-print(f"DEBUG: Attempting to run project '{PROJECT}'")
+# Projects that feed the watchdog; a hang or crash in one is recovered by safety.
+SUPERVISED_PROJECTS = config.get("supervised_projects", ["robot_receiver", "nunchuk_controller"])
+WATCHDOG_TIMEOUT = config.get("watchdog_timeout", 2.0)  # Seconds
+
+# Projects run together under asyncio (see projects/composer.py); when set,
+# they replace active_project and are recorded by safety as one project.
+COMPOSED_PROJECTS = config.get("projects")
+COMPOSED_NAME = "composed"
+
+import safety
+import watchdog
+import composer
+
+if COMPOSED_PROJECTS:
+    PROJECT = COMPOSED_NAME
+
+safety.boot()
+PROJECT = safety.choose_project(PROJECT)
+if safety.recovering():
+    print(f"Recovering into '{PROJECT}' after {safety.REASON_NAMES[safety.reason]}")
+else:
+    print(f"DEBUG: Available projects: {os.listdir(PROJECTS_DIR)}")
+    print(f"DEBUG: Attempting to run project '{PROJECT}'")
+
+projects = composer.parse(COMPOSED_PROJECTS) if PROJECT == COMPOSED_NAME else composer.parse([PROJECT])
+if any(project.name in SUPERVISED_PROJECTS for project in projects):
+    safety.arm(WATCHDOG_TIMEOUT)
 
 try:
-    __import__(PROJECT)  # Use absolute import for CircuitPython compatibility
+    if PROJECT == COMPOSED_NAME:
+        composer.load(projects)
+        composer.run(projects)
+    else:
+        module = __import__(PROJECT)  # Use absolute import for CircuitPython compatibility
+        if hasattr(module, "main"):
+            # Import returned: an async-only project, run it on its own.
+            projects[0].module = module
+            composer.run(projects)
 except ImportError as e:
     print(f"Error: Project '{PROJECT}' not found or could not be loaded: {e}")
+    safety.fault(PROJECT, safety.REASON_IMPORT, e)
     print("Running default error handler instead.")
     __import__("default_project")  # Use absolute import for the fallback
+except watchdog.WatchDogTimeout as e:
+    if composer.failed:
+        print(f"Watchdog timeout in composed project {composer.failed}")
+    safety.fault(PROJECT, safety.REASON_WATCHDOG, e)
+    print("Running default error handler instead.")
+    __import__("default_project")
 except Exception as e:
-    print(f"Unexpected error running {PROJECT}: {e}")
+    print(f"Unexpected error running {composer.failed or PROJECT}: {e}")
+    safety.fault(PROJECT, safety.REASON_EXCEPTION, e)
     print("Running default error handler instead.")
-    __import__("default_project")
\ No newline at end of file
+    __import__("default_project")
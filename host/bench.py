@@ -0,0 +1,223 @@
+"""
+bench.py
+--------
+Micro-benchmarks for the receiver's per-frame hot path, run on the host
+against the CircuitPython stand-ins.
+
+Every benchmark calls one helper with a realistic argument and reports:
+
+  ns/call    best of --repeat timed runs, each long enough to take ~5 ms
+  relative   ns/call divided by the cost of a fixed pure-Python reference
+             workload, so results compare across machines
+  bytes      peak bytes allocated by one call (tracemalloc), worst of 100
+
+Output printed by the helpers (diagnostics.log) goes to a null sink, so
+its formatting cost is measured but not shown.
+
+The results are compared with host/bench_baseline.json. A helper fails when
+its relative cost grows by more than --threshold or it allocates more than
+--alloc-slack bytes beyond the baseline; the exit status is then 1. After
+an intended change, record new numbers with --update-baseline.
+
+Host CPython timings and allocations differ from the board's; the suite
+catches regressions and measures optimizations, it doesn't predict
+on-device time.
+
+Usage:
+
+    python host/bench.py
+    python host/bench.py --filter frame_codec --output bench_output.txt
+    python host/bench.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import sim
+
+BASELINE_FILE = os.path.join(sim.HOST_DIR, "bench_baseline.json")
+TARGET_SECONDS = 0.005  # Length of one timed run
+ALLOC_CALLS = 100  # Calls sampled for the allocation peak
+
+
+class _NullWriter:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _reference():
+    total = 0
+    for i in range(100):
+        total += i * i
+    return total
+
+
+def benchmarks():
+    """Returns (name, function, args) for every benchmark."""
+    import circuitpython_zsx11h as motor
+    import diagnostics
+    import frame_codec
+    import input_filter
+    import link_stats
+    import motion_profile
+
+    diagnostics.level = diagnostics.INFO
+    diagnostics.sink = diagnostics.SINK_SERIAL
+    diagnostics.SERIAL_LINES_PER_S = 1 << 30  # Measure the printed line, not the budget
+    shown = diagnostics.site("Moving forward at speed %d")
+    filtered = diagnostics.site("Packet received from MAC: %s", diagnostics.DEBUG)
+    limited = diagnostics.site("Moving forward at speed %d", diagnostics.INFO, 1 << 20)
+    diagnostics.log(limited, 1)
+
+    def log_shown(site, *args):
+        site.shown = 0  # Forget the last line, so every call prints
+        diagnostics.log(site, *args)
+
+    conditioner = input_filter.InputConditioner()
+    link = link_stats.LinkStats(b"\x00" * 6)
+    table = motor.array("H", [min(65535, i * 4096) for i in range(motor.CORRECTION_POINTS)])
+    mac = frame_codec.mac_to_bytes("F4:12:FA:5A:51:48")
+    return [
+        ("frame_codec.mac_to_bytes", frame_codec.mac_to_bytes, ("F4:12:FA:5A:51:48",)),
+        ("frame_codec.format_mac", frame_codec.format_mac, (mac,)),
+        ("frame_codec.parse_control", frame_codec.parse_control, ("131,240,0,1",)),
+        ("frame_codec.joystick_speed", frame_codec.joystick_speed, (240,)),
+        ("link_stats.update", link.update, (42, -60, 1000)),
+        ("diagnostics.log(shown)", log_shown, (shown, 57000)),
+        ("diagnostics.log(filtered)", diagnostics.log, (filtered, "F4:12")),
+        ("diagnostics.log(limited)", diagnostics.log, (limited, 57000)),
+        ("motor.clamp", motor.clamp, (70000, 0, 65535)),
+        ("motor.scale_speed", motor.scale_speed, (30000,)),
+        ("motor.correct_duty", motor.correct_duty, (table, 30000)),
+        ("motion_profile.ramp_value", motion_profile.ramp_value, (0, 40000, 7, 16)),
+        ("input_filter.update", conditioner.update, (131, 240)),
+    ]
+
+
+def time_call(function, args, repeat):
+    """Returns the best nanoseconds per call over repeat timed runs."""
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            function(*args)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= TARGET_SECONDS * 1e9 / 10:
+            break
+        loops *= 2
+    loops = max(1, int(loops * TARGET_SECONDS * 1e9 / max(elapsed, 1)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            function(*args)
+        best = min(best, (time.perf_counter_ns() - start) / loops)
+    return best
+
+
+def alloc_call(function, args):
+    """Returns the largest peak of bytes allocated during one call."""
+    function(*args)  # Warm caches so one-time allocations aren't counted
+    worst = 0
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_CALLS):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            function(*args)
+            worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return worst
+
+
+def run(args):
+    """Runs the selected benchmarks. Returns {name: {"ns": .., "relative": .., "bytes": ..}}."""
+    results = {}
+    with contextlib.redirect_stdout(_NullWriter()):
+        reference = time_call(_reference, (), args.repeat)
+        for name, function, call_args in benchmarks():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = {"ns": time_call(function, call_args, args.repeat), "bytes": alloc_call(function, call_args)}
+        # Time the reference again at the end: the best of both is steadier than either.
+        reference = min(reference, time_call(_reference, (), args.repeat))
+    for result in results.values():
+        result["relative"] = result["ns"] / reference
+    return results
+
+
+def compare(results, baseline, threshold, alloc_slack):
+    """Returns a status string per benchmark and the list of regressions."""
+    status = {}
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            status[name] = "new"
+            continue
+        change = result["relative"] / base["relative"] - 1.0
+        status[name] = f"{change:+.0%}"
+        if change > threshold:
+            regressions.append(f"{name}: {change:+.0%} time (threshold {threshold:.0%})")
+        if result["bytes"] > base["bytes"] + alloc_slack:
+            regressions.append(f"{name}: {result['bytes']} bytes, baseline {base['bytes']}")
+    return status, regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=25, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--threshold", type=float, default=0.30, help="allowed relative time increase")
+    parser.add_argument("--alloc-slack", type=int, default=16, help="allowed extra bytes per call")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--output", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.chdir(os.path.dirname(sim.HOST_DIR))  # robot_config reads config.json from the repo root
+    sim.install()
+    results = run(args)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    status, regressions = compare(results, baseline, args.threshold, args.alloc_slack)
+
+    lines = [f"{'benchmark':<32} {'ns/call':>10} {'relative':>9} {'bytes':>7} {'vs base':>8}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<32} {result['ns']:>10.0f} {result['relative']:>9.3f} {result['bytes']:>7} {status[name]:>8}"
+        )
+    lines.extend(f"REGRESSION {line}" for line in regressions)
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+    if args.update_baseline:
+        baseline.update({name: {"relative": r["relative"], "bytes": r["bytes"]} for name, r in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+brake_bench.py
+--------------
+Benchmarks the motor library's ways of stopping on the simulated robot.
+
+Each run drives straight at --duty until the wheels settle, then stops with
+one of:
+
+  coast        PWM cut to zero (write_duty(0, 0)); the wheels roll out
+  ramp         motor.stop(): the duty ramps down, then the wheels roll out
+  brake        motor.apply_brakes(): both BRAKE pins high at once
+  pulsed       motor.brake_stop(): BRAKE pins modulated for BRAKE_DECEL,
+               planned open loop from the commanded duty
+  pulsed_hall  motor.brake_stop() corrected by the SPEED hall counters
+
+The library code runs unchanged on sim.py's virtual clock. Every mode is
+repeated for each --brake-strength, the model's full-brake deceleration
+relative to the BRAKE_FULL_DECEL the library assumes, to show how
+predictable the stopping distance stays when the real brake is weaker or
+stronger than configured.
+
+Reported per run: time and distance until both wheels are below --band of
+the starting speed, and the peak wheel deceleration averaged over 100 ms,
+which is roughly what the tyres have to transmit. Runs above --grip (in g at
+the tyre) would lock or skid the wheels on a real floor and are flagged; the
+model itself has unlimited grip.
+
+Usage:
+
+    python host/brake_bench.py
+    python host/brake_bench.py --duty 40000 65535 --decel 400 800
+    python host/brake_bench.py --brake-strength 1.0 --csv brakes.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import math
+
+import numpy as np
+
+import sim
+from motor_model import ChassisModel, ChassisParams, MotorParams
+
+MODES = ("coast", "ramp", "brake", "pulsed", "pulsed_hall")
+SETTLE_S = 2.0  # Drive time before the stop, several time constants
+CHECK_S = 0.05  # Virtual time between stop checks
+MAX_STOP_S = 30.0
+DECEL_WINDOW_S = 0.1
+G = 9.81
+
+
+def make_robot(strength):
+    """A fresh simulated robot whose full brake is strength times the default."""
+    # Both wheels share the same parameters so the chassis drives straight.
+    params = MotorParams(brake_decel=MotorParams.brake_decel * strength)
+    return sim.SimRobot(ChassisModel(1, params, params))
+
+
+def stop_run(motor, counters, mode, duty, strength, band):
+    """Drives at duty, stops with mode and returns (start rpm, time s, distance m, peak decel rpm/s)."""
+    robot = make_robot(strength)
+    sim.install(robot)
+    motor.release_brakes()
+    motor.drive(duty * motor.MAX_SPEED // 65535, duty * motor.MAX_SPEED // 65535)
+    robot.sleep(SETTLE_S)
+    start_rpm = abs(float(robot.model.left.rpm[0]))
+    start_distance = float(robot.model.distance[0])
+    robot.tracing = True
+
+    if mode == "coast":
+        motor.write_duty(0, 0)
+    elif mode == "ramp":
+        motor.stop()
+    elif mode == "brake":
+        motor.write_duty(0, 0)
+        motor.apply_brakes()
+    elif mode == "pulsed":
+        motor.brake_stop()
+    else:
+        motor.brake_stop(counters)
+
+    elapsed = robot.trace[-1][0] - robot.trace[0][0] if robot.trace else 0.0
+    while elapsed < MAX_STOP_S and max(abs(robot.model.left.rpm[0]), abs(robot.model.right.rpm[0])) > band * start_rpm:
+        robot.sleep(CHECK_S)
+        elapsed += CHECK_S
+    motor.release_brakes()
+
+    trace = np.array(robot.trace)
+    times = trace[:, 0] - trace[0, 0] + robot.dt
+    rpm = np.maximum(np.abs(trace[:, 3]), np.abs(trace[:, 4]))
+    moving = rpm > band * start_rpm
+    stop_index = len(rpm) - 1 if moving[-1] else int(np.argmin(moving))
+    window = max(1, int(round(DECEL_WINDOW_S / robot.dt)))
+    history = np.concatenate(([start_rpm] * window, rpm))
+    peak_decel = float(np.max(history[:-window] - history[window:])) / DECEL_WINDOW_S
+    distance = float(robot.model.distance[0]) - start_distance
+    return start_rpm, float(times[stop_index]), distance, peak_decel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=list(MODES))
+    parser.add_argument("--duty", type=int, nargs="+", default=[30000, 65535], help="duty driven before the stop")
+    parser.add_argument("--decel", type=int, nargs="+", default=[600], help="BRAKE_DECEL values for the pulsed modes (rpm/s)")
+    parser.add_argument(
+        "--brake-strength", type=float, nargs="+", default=[0.7, 1.0, 1.3], help="model brake relative to BRAKE_FULL_DECEL"
+    )
+    parser.add_argument("--band", type=float, default=0.01, help="stopped below this fraction of the starting speed")
+    parser.add_argument("--grip", type=float, default=0.7, help="tyre grip in g; harder decelerations are flagged")
+    parser.add_argument("--csv", help="write every run to this file")
+    args = parser.parse_args(argv)
+
+    sim.install()
+    import countio
+    import board
+    import params
+    import circuitpython_zsx11h as motor
+
+    counters = (countio.Counter(board.A4, edge=countio.Edge.RISE), countio.Counter(board.D13, edge=countio.Edge.RISE))
+    rpm_per_g = G * 60 / (math.pi * ChassisParams.wheel_diameter)  # Wheel rpm/s at 1 g ground deceleration
+    grip_rpm_s = args.grip * rpm_per_g
+
+    header = ["mode", "BRAKE_DECEL", "strength", "duty", "start_rpm", "time_s", "distance_m", "peak_decel_g", "over_grip"]
+    rows = []
+    for mode in args.mode:
+        for decel in args.decel if mode.startswith("pulsed") else [None]:
+            if decel is not None:
+                params.set("BRAKE_DECEL", decel)
+            for strength in args.brake_strength:
+                for duty in args.duty:
+                    with contextlib.redirect_stdout(io.StringIO()):  # The library's diagnostic messages
+                        start_rpm, seconds, distance, peak = stop_run(motor, counters, mode, duty, strength, args.band)
+                    rows.append(
+                        (mode, decel or "-", strength, duty, round(start_rpm), round(seconds, 3), round(distance, 3),
+                         round(peak / rpm_per_g, 2), "LOCK" if peak > grip_rpm_s else "")
+                    )
+
+    print("  ".join(f"{h:>12}" for h in header))
+    for row in rows:
+        print("  ".join(f"{v:>12}" for v in row))
+    for mode in args.mode:
+        for duty in args.duty:
+            distances = [row[6] for row in rows if row[0] == mode and row[3] == duty]
+            if len(distances) > 1:
+                print(f"{mode} from duty {duty}: stopping distance {min(distances)}-{max(distances)} m over brake strengths")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+link_test.py
+------------
+Runs the receiver and a scripted controller as two processes that talk
+through the espnow link emulator (host/standins/espnow.py), so the
+receiver's ingest path and failsafes can be exercised under reproducible
+link conditions without boards or a radio.
+
+  receiver    projects/robot_receiver.py, unchanged, on the real-time motor
+              model (sim.install(realtime=True)) as MAC 70:04:1D:CD:F8:70
+  controller  a virtual Nunchuk controller as MAC F4:12:FA:5A:51:48: plays
+              SCENARIO at 100 samples per second through send_pacer and the
+              "x,y,c,z,seq" frame format, then goes silent
+
+The link conditions apply to the controller's frames. Pick a --profile and
+override single settings with the other options. At the end the launcher
+asks the receiver for its "link" and "drive" statistics over its serial
+console and reports the wheel speed after the silence, which shows what the
+robot does when the controller stops.
+
+Usage:
+
+    python host/link_test.py
+    python host/link_test.py --profile hostile --seed 7
+    python host/link_test.py --profile congested --verbose
+    python host/link_test.py --loss 0.3 --jitter-ms 40 --reorder 0.1
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import sim
+
+RECEIVER_MAC = "70:04:1D:CD:F8:70"
+CONTROLLER_MAC = "F4:12:FA:5A:51:48"
+SAMPLE_MS = 10
+
+PROFILES = {
+    "clean": {},
+    "lossy": {"loss": 0.1, "jitter_ms": 5.0},
+    "congested": {"latency_ms": 5.0, "bandwidth_bps": 16000, "queue": 4},
+    "hostile": {"latency_ms": 20.0, "jitter_ms": 40.0, "loss": 0.25, "duplicate": 0.05, "reorder": 0.05},
+}
+
+# (seconds, x, y, c, z, what), played in order; None axes mean "send nothing".
+SCENARIO = (
+    (1.0, 128, 128, 0, 1, "neutral"),
+    (2.0, 128, 250, 0, 1, "forward"),
+    (1.0, 128, 128, 0, 1, "release"),
+    (1.0, 20, 128, 0, 1, "pivot left"),
+    (0.5, 128, 128, 1, 1, "brake"),
+    (1.0, 128, 128, 0, 1, "release brake"),
+    (2.0, 128, 10, 0, 1, "reverse"),
+    (3.0, None, None, 0, 1, "controller silent"),
+)
+
+
+class _RawStdin:
+    """Unbuffered stdin: a buffered one hides queued input from the supervisor stand-in's select()."""
+
+    def fileno(self):
+        return 0
+
+    def read(self, count=-1):
+        return os.read(0, max(1, count)).decode("utf-8", "replace")
+
+
+def run_receiver(verbose):
+    """Receiver process: the real project on the real-time model until interrupted."""
+    sys.stdin = _RawStdin()  # The launcher sends console commands through stdin
+    robot = sim.install(realtime=True)
+    if verbose:
+        import diagnostics
+
+        diagnostics.level = diagnostics.DEBUG
+    try:
+        import robot_receiver  # noqa: F401  (runs its loop)
+    except KeyboardInterrupt:
+        robot.monotonic()
+        left = float(robot.model.left.rpm[0])
+        right = float(robot.model.right.rpm[0])
+        print(f"Wheels at exit: left {left:.0f} rpm, right {right:.0f} rpm")
+
+
+def run_controller():
+    """Controller process: plays SCENARIO through send_pacer and the emulated link."""
+    sim.install(realtime=True)
+    import espnow
+    from adafruit_ticks import ticks_ms
+    from frame_codec import mac_to_bytes, SEQ_MODULUS
+    from send_pacer import SendPacer, SEND_NONE, SEND_REPEAT
+
+    esp = espnow.ESPNow()
+    peer = espnow.Peer(mac_to_bytes(RECEIVER_MAC))
+    esp.peers.append(peer)
+    pacer = SendPacer(esp)
+    seq = 0
+    message = b""
+    last_report = None
+    send_errors = 0
+
+    for seconds, x, y, c, z, what in SCENARIO:
+        print(f"{what} for {seconds} s")
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            now = ticks_ms()
+            if x is not None:
+                report = (x, y, c, z)
+                changed = report != last_report
+                important = last_report is not None and report[2:] != last_report[2:]
+                kind = pacer.should_send(now, changed, important)
+                if kind != SEND_NONE:
+                    if kind != SEND_REPEAT:
+                        message = f"{x},{y},{c},{z},{seq}".encode("utf-8")
+                        seq = (seq + 1) % SEQ_MODULUS
+                        last_report = report
+                    try:
+                        esp.send(message, peer)
+                        pacer.sent(now, kind)
+                    except RuntimeError:
+                        pacer.sent(now, kind, ok=False)
+                        send_errors += 1
+                pacer.adapt(now)
+            time.sleep(SAMPLE_MS / 1000)
+    time.sleep(0.5)  # Let the last frames and ACKs arrive
+    pacer.report()
+    print(f"Frames numbered: {seq}, send() errors: {send_errors}")
+    esp.deinit()
+
+
+def _pump(stream, prefix):
+    for line in stream:
+        print(f"{prefix} {line}", end="", flush=True)
+
+
+def launch(args):
+    """Starts both processes, waits for the scenario, then collects the receiver's statistics."""
+    link = dict(PROFILES[args.profile])
+    for key in ("latency_ms", "jitter_ms", "loss", "duplicate", "reorder", "bandwidth_bps", "seed"):
+        value = getattr(args, key)
+        if value is not None:
+            link[key] = value
+    print(f"Link from controller to receiver: {json.dumps(link) if link else 'clean'}")
+
+    script = os.path.abspath(__file__)
+    root = os.path.dirname(sim.HOST_DIR)  # robot_config reads config.json from the repo root
+    base_env = dict(os.environ, ESPNOW_EMU_PORT=str(args.port), PYTHONUNBUFFERED="1")
+    receiver = subprocess.Popen(
+        [sys.executable, script, "--role", "receiver"] + (["--verbose"] if args.verbose else []),
+        cwd=root,
+        env=dict(base_env, YOYO_MAC=RECEIVER_MAC),
+        stdin=subprocess.PIPE,  # Kept open: the receiver's console reads it
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    pumps = [threading.Thread(target=_pump, args=(receiver.stdout, "[rx]"), daemon=True)]
+    pumps[0].start()
+    time.sleep(1.0)  # Receiver imports and binds its port
+
+    controller = subprocess.Popen(
+        [sys.executable, script, "--role", "controller"],
+        cwd=root,
+        env=dict(base_env, YOYO_MAC=CONTROLLER_MAC, ESPNOW_LINK=json.dumps(link)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    pumps.append(threading.Thread(target=_pump, args=(controller.stdout, "[tx]"), daemon=True))
+    pumps[1].start()
+    status = controller.wait()
+
+    if receiver.poll() is None:
+        receiver.stdin.write("link\ndrive\n")
+        receiver.stdin.flush()
+        time.sleep(0.5)
+        receiver.send_signal(signal.SIGINT)
+    try:
+        receiver.wait(5)
+    except subprocess.TimeoutExpired:
+        receiver.kill()
+    for pump in pumps:
+        pump.join(1)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--role", choices=("launch", "receiver", "controller"), default="launch")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="clean")
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--loss", type=float, help="frame loss probability")
+    parser.add_argument("--duplicate", type=float, help="duplicate delivery probability")
+    parser.add_argument("--reorder", type=float, help="probability a frame is overtaken")
+    parser.add_argument("--bandwidth-bps", type=int, help="air rate cap")
+    parser.add_argument("--seed", type=int, help="random seed for the link")
+    parser.add_argument("--port", type=int, default=47000, help="base UDP port of the emulated nodes")
+    parser.add_argument("--verbose", action="store_true", help="run the receiver at diagnostics level DEBUG")
+    args = parser.parse_args(argv)
+    if args.role == "receiver":
+        run_receiver(args.verbose)
+    elif args.role == "controller":
+        run_controller()
+    else:
+        sys.exit(launch(args))
+
+
+if __name__ == "__main__":
+    main()
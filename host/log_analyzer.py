@@ -0,0 +1,332 @@
+"""
+log_analyzer.py
+---------------
+Crunches receiver run logs (projects/run_log.py) from many field sessions.
+
+Each log is analyzed in its own worker process, with NumPy doing the
+per-sample math, and reduced to one summary row:
+
+  interarrival  time between received frames (ms): mean, p50, p99, max
+  loss          lost frames as a percentage of the frames expected. Uses the
+                sequence numbers when the log has them, with the receiver's
+                own rules (projects/link_stats.py): late frames fill the gap
+                they left, and large jumps such as a controller restart are
+                resyncs, not loss. Otherwise every gap longer than
+                --gap-factor keepalive intervals counts
+                round(gap / --keepalive) - 1 lost frames.
+  loop period   time between the loop iterations that handled a frame (ms)
+  latency       frame arrival to duty written (ms): p50, p99, max
+  tracking      wheel speed measured from the SPEED pulses against the speed
+                expected for the commanded duty (--max-rpm, --deadband), over
+                samples whose duty has been steady for --settle seconds:
+                RMS error per wheel in rpm. Empty when the log has no pulses.
+
+Binary logs (*.bin) use the run_log record layout. CSV logs (*.csv) need a
+header naming the same columns (packet_ms, loop_ms, duty_ms, seq, x, y,
+state, flags, left_duty, right_duty, left_pulses, right_pulses); missing
+seq/pulse columns are treated as absent. Per-run timelines go to
+--out/<run>_timeline.csv and the summary table to --out/summary.csv.
+
+Usage:
+
+    python host/log_analyzer.py sd_dump/*.bin --out analysis
+    python host/log_analyzer.py field_logs/ --workers 8 --keepalive 100
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from motor_model import MotorParams
+from sim import PROJECTS_DIR, STANDINS_DIR
+
+sys.path[:0] = [PROJECTS_DIR, STANDINS_DIR]
+import link_stats  # noqa: E402  (the receiver's sequence accounting)
+
+MAGIC = b"YGRL"
+HEADER_SIZE = 8
+TICKS_MASK = (1 << 29) - 1  # ticks_ms() wraps at 2**29
+TICKS_HALF = 1 << 28
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("packet_ms", "<u4"),
+        ("loop_ms", "<u4"),
+        ("duty_ms", "<u4"),
+        ("seq", "<i2"),
+        ("x", "u1"),
+        ("y", "u1"),
+        ("state", "u1"),
+        ("flags", "u1"),
+        ("left_duty", "<u2"),
+        ("right_duty", "<u2"),
+        ("left_pulses", "<u2"),
+        ("right_pulses", "<u2"),
+    ]
+)
+
+SUMMARY_COLUMNS = [
+    "run",
+    "frames",
+    "duration_s",
+    "interarrival_mean_ms",
+    "interarrival_p50_ms",
+    "interarrival_p99_ms",
+    "interarrival_max_ms",
+    "lost",
+    "loss_pct",
+    "loss_method",
+    "loop_p50_ms",
+    "loop_p99_ms",
+    "loop_max_ms",
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "latency_max_ms",
+    "left_rms_error_rpm",
+    "right_rms_error_rpm",
+]
+
+TIMELINE_COLUMNS = [
+    "time_s",
+    "interarrival_ms",
+    "loop_period_ms",
+    "latency_ms",
+    "state",
+    "left_duty",
+    "right_duty",
+    "left_rpm",
+    "right_rpm",
+    "left_error_rpm",
+    "right_error_rpm",
+]
+
+
+def load_bin(path):
+    """Reads a run_log binary file into a structured array."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+            raise ValueError(f"{path}: not a run log")
+        if header[5] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: record size {header[5]}, expected {RECORD_DTYPE.itemsize}")
+        data = f.read()
+    usable = len(data) - len(data) % RECORD_DTYPE.itemsize  # Drop a torn final record
+    return np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+
+def load_csv(path):
+    """Reads a CSV log into the same structured array; absent columns become -1 (seq) or 0."""
+    with open(path, newline="") as f:
+        names = next(csv.reader(f))
+    values = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    records = np.zeros(len(values), dtype=RECORD_DTYPE)
+    records["seq"] = -1
+    for column, name in enumerate(names):
+        name = name.strip()
+        if name in RECORD_DTYPE.names:
+            records[name] = values[:, column]
+    return records
+
+
+def load(path):
+    return load_csv(path) if path.endswith(".csv") else load_bin(path)
+
+
+def elapsed(ticks, reference):
+    """Signed milliseconds from reference to ticks, across the 2**29 wrap."""
+    return ((ticks.astype(np.int64) - reference.astype(np.int64) + TICKS_HALF) & TICKS_MASK) - TICKS_HALF
+
+
+def unwrap(ticks):
+    """Monotonic milliseconds since the first sample."""
+    if len(ticks) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(([0], np.cumsum(elapsed(ticks[1:], ticks[:-1]))))
+
+
+def percentiles(values, *qs):
+    if len(values) == 0:
+        return [np.nan] * len(qs)
+    return [float(v) for v in np.percentile(values, qs)]
+
+
+def count_loss(records, packet_times, keepalive, gap_factor):
+    """
+    Returns (lost frames, expected frames, method).
+
+    A reordered frame is not loss, and neither is a controller restart:
+
+    >>> count_loss({"seq": np.array([0, 1, 3, 2, 4, 5])}, None, 100, 3.0)
+    (0, 6, 'seq')
+    >>> count_loss({"seq": np.array([100, 101, 102, 0, 1, 2])}, None, 100, 3.0)
+    (0, 6, 'seq')
+    >>> count_loss({"seq": np.array([32766, 32767, 1, 2])}, None, 100, 3.0)
+    (1, 5, 'seq')
+    """
+    seq = records["seq"]
+    if len(seq) > 1 and (seq >= 0).all():
+        stats = link_stats.LinkStats(bytes(6))
+        for number in seq.tolist():
+            stats.update(number, 0, 0)
+        counters = stats.counters
+        lost = counters[link_stats.LOST]
+        return lost, counters[link_stats.RECEIVED] - counters[link_stats.DUPLICATES] + lost, "seq"
+    gaps = np.diff(packet_times)
+    long_gaps = gaps[gaps > gap_factor * keepalive]
+    lost = int(np.maximum(np.round(long_gaps / keepalive) - 1, 0).sum())
+    return lost, len(packet_times) + lost, "gap"
+
+
+def wheel_rpm(pulses, times_ms, pulses_per_rev):
+    """Wheel speed per sample from free-running 16-bit pulse counts (first sample NaN)."""
+    counts = np.diff(pulses.astype(np.int64)) & 0xFFFF
+    dt = np.diff(times_ms) / 1000.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rpm = np.where(dt > 0, counts / pulses_per_rev / dt * 60.0, np.nan)
+    return np.concatenate(([np.nan], rpm))
+
+
+def steady_mask(duty, times_ms, settle):
+    """True where the duty has not changed for at least settle seconds."""
+    changed = np.concatenate(([True], np.diff(duty.astype(np.int64)) != 0))
+    since = times_ms[np.maximum.accumulate(np.where(changed, np.arange(len(duty)), 0))]
+    return (times_ms - since) >= settle * 1000.0
+
+
+def tracking(records, times_ms, options):
+    """Returns per-wheel (rpm, error) arrays, NaN where not measurable."""
+    results = []
+    for wheel in ("left", "right"):
+        pulses = records[f"{wheel}_pulses"]
+        duty = records[f"{wheel}_duty"].astype(float)
+        if not pulses.any():
+            nan = np.full(len(records), np.nan)
+            results.append((nan, nan))
+            continue
+        rpm = wheel_rpm(pulses, times_ms, options.pulses_per_rev)
+        expected = np.where(duty > options.deadband, options.max_rpm * duty / 65535, 0.0)
+        error = np.where(steady_mask(duty, times_ms, options.settle), rpm - expected, np.nan)
+        results.append((rpm, error))
+    return results
+
+
+def analyze(path, options):
+    """Analyzes one log; writes its timeline and returns its summary row."""
+    run = os.path.splitext(os.path.basename(path))[0]
+    records = load(path)
+    row = dict.fromkeys(SUMMARY_COLUMNS, np.nan)
+    row.update(run=run, frames=len(records), loss_method="-")
+    if len(records) < 2:
+        return row
+
+    packet_times = unwrap(records["packet_ms"])
+    loop_times = unwrap(records["loop_ms"])
+    interarrival = np.diff(packet_times)
+    loop_period = np.diff(loop_times)
+    latency = elapsed(records["duty_ms"], records["packet_ms"])
+    lost, expected, method = count_loss(records, packet_times, options.keepalive, options.gap_factor)
+    (left_rpm, left_error), (right_rpm, right_error) = tracking(records, packet_times, options)
+
+    row["duration_s"] = packet_times[-1] / 1000.0
+    row["interarrival_mean_ms"] = float(interarrival.mean())
+    row["interarrival_p50_ms"], row["interarrival_p99_ms"] = percentiles(interarrival, 50, 99)
+    row["interarrival_max_ms"] = float(interarrival.max())
+    row["lost"] = lost
+    row["loss_pct"] = 100.0 * lost / expected
+    row["loss_method"] = method
+    row["loop_p50_ms"], row["loop_p99_ms"] = percentiles(loop_period, 50, 99)
+    row["loop_max_ms"] = float(loop_period.max())
+    row["latency_p50_ms"], row["latency_p99_ms"] = percentiles(latency, 50, 99)
+    row["latency_max_ms"] = float(latency.max())
+    for wheel, error in (("left", left_error), ("right", right_error)):
+        valid = error[~np.isnan(error)]
+        row[f"{wheel}_rms_error_rpm"] = float(np.sqrt(np.mean(valid**2))) if len(valid) else np.nan
+
+    timeline = np.column_stack(
+        (
+            packet_times / 1000.0,
+            np.concatenate(([np.nan], interarrival)),
+            np.concatenate(([np.nan], loop_period)),
+            latency,
+            records["state"],
+            records["left_duty"],
+            records["right_duty"],
+            left_rpm,
+            right_rpm,
+            left_error,
+            right_error,
+        )
+    )
+    np.savetxt(
+        os.path.join(options.out, f"{run}_timeline.csv"),
+        timeline,
+        delimiter=",",
+        fmt="%.6g",
+        header=",".join(TIMELINE_COLUMNS),
+        comments="",
+    )
+    return row
+
+
+def find_logs(paths):
+    """Expands directories to the *.bin and *.csv logs inside them."""
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".bin") or (name.endswith(".csv") and not name.endswith("_timeline.csv"))
+            )
+        else:
+            logs.append(path)
+    return logs
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return "-" if np.isnan(value) else f"{value:.4g}"
+    return str(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="log files or directories of logs")
+    parser.add_argument("--out", default="log_analysis", help="directory for summary.csv and timelines")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--keepalive", type=float, default=100.0, help="controller keepalive interval (ms)")
+    parser.add_argument("--gap-factor", type=float, default=1.5, help="gaps longer than this many keepalives count as loss")
+    parser.add_argument("--max-rpm", type=float, default=MotorParams.max_rpm, help="wheel speed at full duty")
+    parser.add_argument("--deadband", type=int, default=MotorParams.deadband_duty, help="duty below which wheels don't turn")
+    parser.add_argument("--pulses-per-rev", type=int, default=MotorParams.pulses_per_rev)
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds of steady duty before tracking is scored")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logs = find_logs(args.logs)
+    if not logs:
+        sys.exit("No logs found")
+    os.makedirs(args.out, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        rows = list(pool.map(analyze, logs, [args] * len(logs)))
+
+    widths = [max(len(c), 8) for c in SUMMARY_COLUMNS]
+    print("  ".join(f"{c:>{w}}" for c, w in zip(SUMMARY_COLUMNS, widths)))
+    for row in rows:
+        print("  ".join(f"{format_value(row[c]):>{w}}" for c, w in zip(SUMMARY_COLUMNS, widths)))
+    summary = os.path.join(args.out, "summary.csv")
+    with open(summary, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Analyzed {len(rows)} runs; wrote {summary} and per-run timelines to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+motor_model.py
+--------------
+Physical model of a hub BLDC motor driven by a ZSX11H controller, plus a
+differential-drive chassis built from two of them.
+
+Every state variable is a NumPy array with one entry per simulated robot, so a
+single call to ``step`` advances thousands of independent simulations (for
+example one per ramp-parameter combination) at once.
+
+The motor is modeled as a first-order lag from the driver's commanded speed
+to the wheel speed:
+
+    driven:  d(rpm)/dt = (target_rpm - rpm) / time_constant - friction
+    coast:   d(rpm)/dt = -friction                  (PWM below the deadband)
+    brake:   d(rpm)/dt = -(brake_decel + friction)  (BRAKE pin high)
+
+where target_rpm = max_rpm * duty / 65535, signed by the DIR pin level.
+Friction is a Coulomb term (constant rpm/s) plus a viscous term (fraction of
+rpm per second); braking never reverses the wheel. An optional
+``electrical_time_constant`` adds the driver's current lag, which turns the
+model second-order and lets abrupt steps overshoot once it exceeds a quarter
+of the mechanical time constant.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+DUTY_MAX = 65535
+
+
+@dataclass
+class MotorParams:
+    """Parameters of one BLDC hub motor and its ZSX11H driver."""
+
+    time_constant: float = 0.25  # Seconds, mechanical speed response to a duty step
+    max_rpm: float = 300.0  # Wheel speed at 100% duty
+    coulomb_friction: float = 20.0  # rpm/s lost to constant friction
+    viscous_friction: float = 0.05  # Fraction of rpm lost per second
+    brake_decel: float = 1500.0  # rpm/s of extra deceleration with BRAKE high
+    deadband_duty: int = 1300  # Duty below which the driver does not commutate (~2%)
+    forward_level: bool = True  # DIR pin level that turns the wheel forward
+    pulses_per_rev: int = 45  # SPEED hall pulses per wheel revolution
+    electrical_time_constant: float = 0.0  # Seconds of driver current lag, 0 = first-order
+
+
+@dataclass
+class ChassisParams:
+    """Geometry of the differential-drive chassis."""
+
+    wheel_diameter: float = 0.165  # Meters (6.5" hoverboard wheel)
+    track_width: float = 0.40  # Meters between wheel contact patches
+
+
+class MotorModel:
+    """Vectorized model of ``n`` independent motor + driver pairs."""
+
+    def __init__(self, n=1, params=None):
+        self.params = params or MotorParams()
+        self.n = n
+        self.rpm = np.zeros(n)
+        self.drive = np.zeros(n)  # Lagged driver acceleration, in rpm/s
+        self.revolutions = np.zeros(n)  # Unsigned, feeds the hall pulse output
+        self.pulses = np.zeros(n, dtype=np.int64)
+
+    def step(self, duty, direction, brake, dt):
+        """
+        Advances the model by ``dt`` seconds from the PWM duty (0-65535), DIR
+        pin level and BRAKE pin level, which may be scalars or arrays of
+        length ``n``. Returns the hall pulses emitted during the step.
+        """
+        p = self.params
+        duty = np.clip(np.asarray(duty, dtype=float), 0, DUTY_MAX)
+        direction = np.asarray(direction, dtype=bool)
+        brake = np.asarray(brake, dtype=bool)
+
+        sign = np.where(direction == p.forward_level, 1.0, -1.0)
+        driven = (duty >= p.deadband_duty) & ~brake
+        target = np.where(driven, sign * p.max_rpm * duty / DUTY_MAX, 0.0)
+
+        accel = np.where(driven, (target - self.rpm) / p.time_constant, 0.0)
+        if p.electrical_time_constant > 0:
+            # The driver's current, and so the torque, lags the demanded acceleration.
+            self.drive += (accel - self.drive) * min(1.0, dt / p.electrical_time_constant)
+            accel = np.where(driven, self.drive, 0.0)
+        decel = p.coulomb_friction + p.viscous_friction * np.abs(self.rpm)
+        decel = decel + np.where(brake, p.brake_decel, 0.0)
+        speed = self.rpm + accel * dt
+        # Friction and braking pull toward zero but never reverse the wheel.
+        magnitude = np.maximum(np.abs(speed) - decel * dt, 0.0)
+        self.rpm = np.sign(speed) * magnitude
+
+        previous = np.floor(self.revolutions * p.pulses_per_rev)
+        self.revolutions += np.abs(self.rpm) * dt / 60.0
+        emitted = (np.floor(self.revolutions * p.pulses_per_rev) - previous).astype(np.int64)
+        self.pulses += emitted
+        return emitted
+
+
+class ChassisModel:
+    """Vectorized differential-drive robot: two motors plus the chassis pose."""
+
+    def __init__(self, n=1, left=None, right=None, chassis=None):
+        self.n = n
+        self.left = MotorModel(n, left)
+        self.right = MotorModel(n, right)
+        self.chassis = chassis or ChassisParams()
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.heading = np.zeros(n)
+        self.distance = np.zeros(n)  # Path length traveled by the chassis center
+
+    def wheel_speeds(self):
+        """Returns the (left, right) wheel ground speeds in m/s."""
+        circumference = np.pi * self.chassis.wheel_diameter
+        return self.left.rpm * circumference / 60.0, self.right.rpm * circumference / 60.0
+
+    def velocity(self):
+        """Returns the chassis (linear m/s, angular rad/s) velocity."""
+        v_left, v_right = self.wheel_speeds()
+        return (v_left + v_right) / 2.0, (v_right - v_left) / self.chassis.track_width
+
+    def step(self, left_pins, right_pins, dt):
+        """
+        Advances both motors and the chassis pose by ``dt`` seconds. Each pin
+        argument is a (duty, direction, brake) tuple. Returns the hall pulses
+        emitted by the (left, right) motors.
+        """
+        left_pulses = self.left.step(*left_pins, dt)
+        right_pulses = self.right.step(*right_pins, dt)
+        v, omega = self.velocity()
+        self.x += v * np.cos(self.heading) * dt
+        self.y += v * np.sin(self.heading) * dt
+        self.heading += omega * dt
+        self.distance += np.abs(v) * dt
+        return left_pulses, right_pulses
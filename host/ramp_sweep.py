@@ -0,0 +1,190 @@
+"""
+ramp_sweep.py
+-------------
+Sweeps ramp parameters through the vectorized motor model and ranks them.
+
+Two kinds of ramp are evaluated, each as one NumPy batch:
+
+  accel  The staircase used by the motor library and the BLE/serial scripts:
+         the duty steps from 0 to the target in RAMP_STEPS steps, RAMP_DELAY
+         seconds apart, following a linear or quadratic ``(i/steps)**2`` ease
+         or one of the motion_profile curves (trapezoid, scurve).
+         Ranked by time-to-speed (within --band of the target), overshoot
+         and peak acceleration; combinations above --limit (rpm/s) rank last.
+  decel  The receiver's gradual_stop(): the duty drops by DECELERATION_RATE
+         every DECELERATION_DELAY seconds. Ranked by time-to-stop, stopping
+         distance and peak deceleration, with the same --limit on harshness.
+
+Usage:
+
+    python host/ramp_sweep.py accel --target 40000 --top 10
+    python host/ramp_sweep.py decel --start 65535 --csv decel.csv
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+
+import numpy as np
+
+from motor_model import ChassisModel, MotorParams
+from sim import PROJECTS_DIR
+
+sys.path.insert(0, PROJECTS_DIR)
+import motion_profile  # noqa: E402  (shared with the robot)
+
+SIM_DT = 0.001
+
+# Integer curves shared with the robot's motion_profile module.
+PROFILE_TABLES = {
+    "trapezoid": np.array(motion_profile.build_table(motion_profile.TRAPEZOID)),
+    "scurve": np.array(motion_profile.build_table(motion_profile.SCURVE)),
+}
+
+
+def accel_grid(steps_values, delay_values):
+    """Returns the (steps, delay) arrays for every combination."""
+    grid = np.array(list(itertools.product(steps_values, delay_values)), dtype=float)
+    return grid[:, 0].astype(int), grid[:, 1]
+
+
+def accel_command(t, target, steps, delay, ease):
+    """Duty commanded at time ``t`` by the staircase ramp, per combination."""
+    index = np.minimum(np.floor(t / delay) + 1, steps)
+    fraction = index / steps
+    if ease == "quadratic":
+        fraction = fraction**2
+    elif ease in PROFILE_TABLES:
+        table = PROFILE_TABLES[ease]
+        # Interpolated between table points, like motion_profile.ramp_value().
+        position = index * motion_profile.TABLE_SIZE / steps
+        fraction = np.interp(position, np.arange(len(table)), table) / motion_profile.SCALE
+    return target * fraction
+
+
+def decel_command(t, start, rate, delay):
+    """Duty commanded at time ``t`` by the constant-decrement stop."""
+    return np.maximum(start - rate * (np.floor(t / delay) + 1), 0.0)
+
+
+def simulate(n, command, duration, params, brake=False):
+    """
+    Runs ``n`` straight-line robots for ``duration`` seconds with both wheels
+    following ``command(t)``. Returns (time, left rpm, chassis distance)
+    histories, each shaped (samples, n).
+    """
+    # Both wheels share the same parameters so the chassis drives straight.
+    model = ChassisModel(n, params, params)
+    samples = int(round(duration / SIM_DT))
+    times = np.arange(1, samples + 1) * SIM_DT
+    rpm = np.empty((samples, n))
+    distance = np.empty((samples, n))
+    level = params.forward_level
+    for k, t in enumerate(times):
+        duty = command(t - SIM_DT)
+        model.step((duty, level, brake), (duty, level, brake), SIM_DT)
+        rpm[k] = model.left.rpm
+        distance[k] = model.distance
+    return times, rpm, distance
+
+
+def first_crossing(mask, times):
+    """Time at which ``mask`` becomes and stays true, per column (inf if never)."""
+    settled = np.flip(np.logical_and.accumulate(np.flip(mask, axis=0), axis=0), axis=0)
+    hit = settled.any(axis=0)
+    first = np.argmax(settled, axis=0)
+    return np.where(hit, times[first], np.inf)
+
+
+def sweep_accel(args, params):
+    steps, delay = accel_grid(args.steps, args.delay)
+    n = len(steps)
+    target_rpm = params.max_rpm * args.target / 65535
+    times, rpm, _ = simulate(
+        n, lambda t: accel_command(t, args.target, steps, delay, args.ease), args.duration, params
+    )
+    time_to_speed = first_crossing(np.abs(rpm - target_rpm) <= args.band * target_rpm, times)
+    overshoot = np.maximum(rpm.max(axis=0) - target_rpm, 0.0) / target_rpm * 100.0
+    peak_accel = np.abs(np.diff(rpm, axis=0)).max(axis=0) / SIM_DT
+    order = np.lexsort((peak_accel, overshoot, time_to_speed, peak_accel > args.limit))
+    header = ["RAMP_STEPS", "RAMP_DELAY", "time_to_speed_s", "overshoot_pct", "peak_accel_rpm_s"]
+    rows = [
+        (int(steps[i]), float(delay[i]), float(time_to_speed[i]), float(overshoot[i]), float(peak_accel[i]))
+        for i in order
+    ]
+    return header, rows
+
+
+def sweep_decel(args, params):
+    grid = np.array(list(itertools.product(args.rate, args.delay)), dtype=float)
+    rate, delay = grid[:, 0], grid[:, 1]
+    n = len(rate)
+    # Start every combination from steady state at the starting duty.
+    start_rpm = params.max_rpm * args.start / 65535
+    settle = 6 * params.time_constant
+    times, rpm, distance = simulate(
+        n,
+        lambda t: np.where(t < settle, args.start, decel_command(t - settle, args.start, rate, delay)),
+        settle + args.duration,
+        params,
+    )
+    after = times >= settle
+    times, rpm, distance = times[after] - settle, rpm[after], distance[after] - distance[after][0]
+    time_to_stop = first_crossing(np.abs(rpm) <= args.band * start_rpm, times)
+    stop_index = np.minimum(np.searchsorted(times, time_to_stop), len(times) - 1)
+    stop_distance = distance[stop_index, np.arange(n)]
+    peak_decel = np.abs(np.diff(rpm, axis=0)).max(axis=0) / SIM_DT
+    order = np.lexsort((peak_decel, stop_distance, time_to_stop, peak_decel > args.limit))
+    header = ["DECELERATION_RATE", "DECELERATION_DELAY", "time_to_stop_s", "stop_distance_m", "peak_decel_rpm_s"]
+    rows = [
+        (int(rate[i]), float(delay[i]), float(time_to_stop[i]), float(stop_distance[i]), float(peak_decel[i]))
+        for i in order
+    ]
+    return header, rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=("accel", "decel"))
+    parser.add_argument("--steps", type=int, nargs="+", default=list(range(1, 41)), help="RAMP_STEPS values")
+    parser.add_argument(
+        "--delay", type=float, nargs="+", default=list(np.round(np.arange(0.005, 0.2, 0.005), 3)), help="delay values (s)"
+    )
+    parser.add_argument("--rate", type=int, nargs="+", default=list(range(500, 20001, 500)), help="DECELERATION_RATE values")
+    parser.add_argument("--target", type=int, default=40000, help="accel target duty")
+    parser.add_argument("--start", type=int, default=65535, help="decel starting duty")
+    parser.add_argument("--ease", choices=("linear", "quadratic", "trapezoid", "scurve"), default="scurve")
+    parser.add_argument("--band", type=float, default=0.05, help="settling band as a fraction of the speed")
+    parser.add_argument("--limit", type=float, default=np.inf, help="peak accel/decel allowed (rpm/s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="simulated seconds per run")
+    parser.add_argument("--time-constant", type=float, default=MotorParams.time_constant)
+    parser.add_argument("--max-rpm", type=float, default=MotorParams.max_rpm)
+    parser.add_argument("--electrical-time-constant", type=float, default=MotorParams.electrical_time_constant)
+    parser.add_argument("--top", type=int, default=15, help="rows to print")
+    parser.add_argument("--csv", help="write the full ranking to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = MotorParams(
+        time_constant=args.time_constant,
+        max_rpm=args.max_rpm,
+        electrical_time_constant=args.electrical_time_constant,
+    )
+    header, rows = (sweep_accel if args.kind == "accel" else sweep_decel)(args, params)
+    print(f"{len(rows)} combinations, best first:")
+    print("  ".join(f"{h:>18}" for h in header))
+    for row in rows[: args.top]:
+        print("  ".join(f"{v:>18.4g}" if isinstance(v, float) else f"{v:>18}" for v in row))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
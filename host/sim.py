@@ -0,0 +1,170 @@
+"""
+sim.py
+------
+Runs CircuitPython projects and the motor library on the host against the
+motor/chassis model.
+
+``install()`` puts the stand-in ``board``/``pwmio``/``digitalio``/``countio``
+modules and the projects folder on ``sys.path`` and replaces ``time.sleep``,
+``time.monotonic`` and ``time.monotonic_ns`` with a virtual clock. Every
+virtual sleep reads the PWM, DIR, BRAKE and STOP pin objects the code under test
+wrote, steps the model, and feeds synthesized hall pulses into any
+``countio.Counter`` on the SPEED pins, so a blocking ramp runs in
+microseconds of wall time.
+
+``install(realtime=True)`` keeps the real clock instead and steps the model
+by the real time passed at every sleep and clock read. That is slower but
+lets a project talk to another process, e.g. through the ``espnow`` link
+emulator (see host/link_test.py).
+
+Example:
+
+    import sim
+    robot = sim.install()
+    import circuitpython_zsx11h as motor
+    motor.move_forward(30000)
+    time.sleep(2.0)
+    print(robot.model.left.rpm)
+"""
+
+import gc
+import json
+import os
+import sys
+import threading
+import time
+
+from motor_model import ChassisModel, MotorParams
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+STANDINS_DIR = os.path.join(HOST_DIR, "standins")
+PROJECTS_DIR = os.path.join(os.path.dirname(HOST_DIR), "projects")
+
+# Motor driver wiring, see README pin assignments.
+LEFT_PINS = {"pwm": "A0", "dir": "A1", "brake": "A2", "stop": "A3", "speed": "A4"}
+RIGHT_PINS = {"pwm": "D9", "dir": "D12", "brake": "D11", "stop": "D10", "speed": "D13"}
+
+SIM_DT = 0.001  # Model integration step in seconds
+CONFIG_FILE = "config.json"  # Read from the current directory, like robot_config
+
+_real_time = (time.sleep, time.monotonic, time.monotonic_ns)
+
+
+class SimRobot:
+    """A single simulated robot whose model follows the stand-in pin objects."""
+
+    def __init__(self, model=None, dt=SIM_DT):
+        self.model = model or ChassisModel(1, *calibrated_params())
+        self.dt = dt
+        self.now = 0.0
+        self.trace = []  # (t, left duty, right duty, left rpm, right rpm) per step when tracing
+        self.tracing = False
+
+    def _pins(self, wiring):
+        import board
+
+        pwm = getattr(board, wiring["pwm"]).driver
+        direction = getattr(board, wiring["dir"]).driver
+        brake = getattr(board, wiring["brake"]).driver
+        stop = getattr(board, wiring["stop"]).driver
+        if stop is not None and bool(stop.value) != self._enable_level():
+            return (0, False, False)  # Driver switched off: no drive and no brake, the wheel coasts
+        return (
+            pwm.duty_cycle if pwm is not None else 0,
+            bool(direction.value) if direction is not None else False,
+            bool(brake.value) if brake is not None else False,
+        )
+
+    def _enable_level(self):
+        motor = sys.modules.get("circuitpython_zsx11h")
+        return bool(getattr(motor, "ENABLE_LEVEL", True))
+
+    def _feed_counter(self, wiring, pulses):
+        import board
+
+        counter = getattr(board, wiring["speed"]).driver
+        if counter is not None and hasattr(counter, "count"):
+            counter.count += int(pulses[0])
+
+    def advance(self, seconds):
+        """Steps the model forward by ``seconds`` of virtual time."""
+        end = self.now + seconds
+        while self.now < end - 1e-12:
+            dt = min(self.dt, end - self.now)
+            left = self._pins(LEFT_PINS)
+            right = self._pins(RIGHT_PINS)
+            left_pulses, right_pulses = self.model.step(left, right, dt)
+            self._feed_counter(LEFT_PINS, left_pulses)
+            self._feed_counter(RIGHT_PINS, right_pulses)
+            self.now += dt
+            if self.tracing:
+                self.trace.append(
+                    (self.now, left[0], right[0], float(self.model.left.rpm[0]), float(self.model.right.rpm[0]))
+                )
+
+    def sleep(self, seconds):
+        self.advance(max(0.0, seconds))
+
+    def monotonic(self):
+        return self.now
+
+    def monotonic_ns(self):
+        return int(self.now * 1e9)
+
+
+class RealTimeRobot(SimRobot):
+    """A simulated robot whose model follows the real clock."""
+
+    def __init__(self, model=None, dt=SIM_DT):
+        super().__init__(model, dt)
+        self._start = _real_time[1]()
+        self._lock = threading.Lock()  # Stand-in threads (espnow) read the clock too
+
+    def _catch_up(self):
+        with self._lock:
+            self.advance(_real_time[1]() - self._start - self.now)
+
+    def sleep(self, seconds):
+        _real_time[0](max(0.0, seconds))
+        self._catch_up()
+
+    def monotonic(self):
+        self._catch_up()
+        return self.now
+
+    def monotonic_ns(self):
+        self._catch_up()
+        return int(self.now * 1e9)
+
+
+def calibrated_params():
+    """Returns (left, right) MotorParams with the DIR polarity the motor library reads from config.json."""
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            calibration = json.load(f).get("calibration", {})
+    except (OSError, ValueError):
+        calibration = {}
+    return tuple(
+        MotorParams(forward_level=calibration.get(wheel, {}).get("forward_level", True)) for wheel in ("left", "right")
+    )
+
+
+def install(robot=None, realtime=False):
+    """Makes the stand-ins importable and routes ``time`` through a simulated robot."""
+    robot = robot or (RealTimeRobot() if realtime else SimRobot())
+    if not hasattr(gc, "mem_free"):
+        # CircuitPython's heap queries, for heap_monitor; the host heap has no fixed size.
+        gc.mem_free = lambda: 2_000_000
+        gc.mem_alloc = lambda: 0
+    for path in (PROJECTS_DIR, STANDINS_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    time.sleep = robot.sleep
+    time.monotonic = robot.monotonic
+    time.monotonic_ns = robot.monotonic_ns
+    return robot
+
+
+def uninstall():
+    """Restores the real ``time`` functions."""
+    time.sleep, time.monotonic, time.monotonic_ns = _real_time
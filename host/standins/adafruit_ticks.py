@@ -0,0 +1,24 @@
+"""Host stand-in for the ``adafruit_ticks`` library, following the (possibly simulated) ``time`` module."""
+
+import time
+
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return (time.monotonic_ns() // 1_000_000) & _TICKS_MAX
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % _TICKS_PERIOD
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+def ticks_less(ticks1, ticks2):
+    return ticks_diff(ticks1, ticks2) < 0
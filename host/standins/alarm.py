@@ -0,0 +1,33 @@
+"""Host stand-in for the CircuitPython ``alarm`` module: light sleep is a plain sleep until the earliest TimeAlarm."""
+
+import time as _time
+
+
+class _TimeModule:
+    class TimeAlarm:
+        def __init__(self, *, monotonic_time=None, epoch_time=None):
+            self.monotonic_time = monotonic_time
+
+
+time = _TimeModule()
+
+
+class _PinModule:
+    class PinAlarm:
+        def __init__(self, pin, value=False, edge=False, pull=False):
+            self.pin = pin
+
+
+pin = _PinModule()
+wake_alarm = None
+
+
+def light_sleep_until_alarms(*alarms):
+    """Sleeps until the earliest TimeAlarm; pin alarms never fire on the host."""
+    global wake_alarm
+    timed = [a for a in alarms if getattr(a, "monotonic_time", None) is not None]
+    if not timed:
+        raise ValueError("No alarms that can wake the host")
+    wake_alarm = min(timed, key=lambda a: a.monotonic_time)
+    _time.sleep(max(0.0, wake_alarm.monotonic_time - _time.monotonic()))
+    return wake_alarm
@@ -0,0 +1,14 @@
+"""Host stand-in for the CircuitPython ``analogio`` module."""
+
+
+class AnalogIn:
+    """An ADC input; ``value`` (0-65535) is set by the host code driving the test."""
+
+    def __init__(self, pin):
+        pin.claim(self)
+        self.pin = pin
+        self.value = 0
+        self.reference_voltage = 3.3
+
+    def deinit(self):
+        self.pin.release(self)
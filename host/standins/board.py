@@ -0,0 +1,39 @@
+"""Host stand-in for the CircuitPython ``board`` module (Adafruit ESP32-S3 Feather pins)."""
+
+
+class Pin:
+    """A board pin. ``driver`` is the pwmio/digitalio/countio object currently using it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.driver = None
+
+    def claim(self, driver):
+        if self.driver is not None:
+            raise ValueError(f"{self.name} in use")
+        self.driver = driver
+
+    def release(self, driver):
+        if self.driver is driver:
+            self.driver = None
+
+    def __repr__(self):
+        return f"board.{self.name}"
+
+
+A0 = Pin("A0")
+A1 = Pin("A1")
+A2 = Pin("A2")
+A3 = Pin("A3")
+A4 = Pin("A4")
+A5 = Pin("A5")
+D5 = Pin("D5")
+D6 = Pin("D6")
+D9 = Pin("D9")
+D10 = Pin("D10")
+D11 = Pin("D11")
+D12 = Pin("D12")
+D13 = Pin("D13")
+SCL = Pin("SCL")
+SDA = Pin("SDA")
+LED = D13
@@ -0,0 +1,27 @@
+"""Host stand-in for the CircuitPython ``countio`` module. The simulator adds hall pulses to ``count``."""
+
+
+class Edge:
+    RISE = "RISE"
+    FALL = "FALL"
+    RISE_AND_FALL = "RISE_AND_FALL"
+
+
+class Counter:
+    def __init__(self, pin, *, edge=Edge.FALL, pull=None):
+        pin.claim(self)
+        self.pin = pin
+        self.edge = edge
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def deinit(self):
+        self.pin.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
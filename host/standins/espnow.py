@@ -0,0 +1,293 @@
+"""
+Host stand-in for the CircuitPython ``espnow`` module: an ESP-NOW link
+emulator that carries frames between processes on one machine.
+
+Each process is one node. Its MAC address comes from the ``YOYO_MAC``
+environment variable (``wifi.radio.mac_address`` reports the same) and its
+UDP loopback port from the last two bytes of the MAC, so a ``Peer`` built
+from another node's MAC reaches that node's process, as on the radio.
+
+Frames this node sends go through the link conditions in the ``ESPNOW_LINK``
+environment variable (a JSON object) or set with ``configure()``:
+
+  latency_ms     base one-way delay
+  jitter_ms      uniform extra delay, 0..jitter_ms
+  loss           probability a frame is lost (counted in send_failure)
+  duplicate      probability a delivered frame arrives twice
+  reorder        probability a frame is held back reorder_ms, letting later
+                 frames overtake it; otherwise delivery is first-in first-out
+  reorder_ms     hold-back of a reordered frame
+  bandwidth_bps  air rate cap; frames queue behind each other's airtime
+  queue          frames that may wait for air; send() raises beyond that,
+                 as the radio does when its transmit queue is full
+  rssi, rssi_jitter  RSSI reported to the receiver, dBm
+  seed           random seed, for reproducible runs
+
+send_success/send_failure count up when a frame's delivery time comes, like
+the radio's ACK callbacks. Received frames are timestamped on arrival by a
+background thread, so ``ESPNowPacket.time`` shows the link latency even when
+the reader polls slowly, and are dropped (read_failure) once buffer_size
+bytes are waiting. Timing follows the real clock; use ``sim.install(realtime=True)``.
+Only unicast to registered peers is emulated.
+"""
+
+import collections
+import heapq
+import json
+import os
+import random
+import socket
+import struct
+import threading
+import time
+
+BASE_PORT = int(os.environ.get("ESPNOW_EMU_PORT", "47000"))
+MAX_DATA_LEN = 250
+PACKET_OVERHEAD = 24  # Bytes of receive buffer used per frame besides the message
+AIR_OVERHEAD = 43  # Bytes on air per frame besides the message (MAC header, vendor action frame)
+_HEADER = struct.Struct("<6sb")  # Sender MAC, RSSI
+
+LINK = {
+    "latency_ms": 2.0,
+    "jitter_ms": 0.0,
+    "loss": 0.0,
+    "duplicate": 0.0,
+    "reorder": 0.0,
+    "reorder_ms": 30.0,
+    "bandwidth_bps": 0,
+    "queue": 8,
+    "rssi": -55,
+    "rssi_jitter": 3,
+    "seed": None,
+}
+LINK.update(json.loads(os.environ.get("ESPNOW_LINK", "{}")))
+
+_clock = time.perf_counter  # Real time, unaffected by the simulator's virtual clock
+
+
+def configure(**settings):
+    """Changes the link conditions for frames sent from now on."""
+    unknown = set(settings) - set(LINK)
+    if unknown:
+        raise ValueError(f"Unknown link settings: {sorted(unknown)}")
+    LINK.update(settings)
+
+
+def local_mac():
+    """This node's MAC address, from YOYO_MAC."""
+    return bytes(int(b, 16) for b in os.environ.get("YOYO_MAC", "02:00:00:00:00:01").split(":"))
+
+
+def port_for(mac):
+    return BASE_PORT + ((mac[4] << 8) | mac[5]) % 10000
+
+
+ESPNowPacket = collections.namedtuple("ESPNowPacket", ("mac", "msg", "rssi", "time"))
+
+
+class Peer:
+    """A registered ESP-NOW peer, as in CircuitPython's ``espnow.Peer``."""
+
+    def __init__(self, mac, *, lmk=None, channel=0, interface=0, encrypted=False):
+        mac = bytes(mac)
+        if len(mac) != 6:
+            raise ValueError("MAC address must be 6 bytes")
+        self.mac = mac
+        self.lmk = lmk
+        self.channel = channel
+        self.interface = interface
+        self.encrypted = encrypted
+
+
+class Peers:
+    """The peer table: append(), remove(), len() and iteration."""
+
+    def __init__(self):
+        self._peers = []
+
+    def append(self, peer):
+        if any(p.mac == peer.mac for p in self._peers):
+            raise RuntimeError("ESP-NOW error 0x3069 (peer exists)")
+        self._peers.append(peer)
+
+    def remove(self, peer):
+        self._peers.remove(peer)
+
+    def __len__(self):
+        return len(self._peers)
+
+    def __iter__(self):
+        return iter(self._peers)
+
+    def __getitem__(self, index):
+        return self._peers[index]
+
+
+class ESPNow:
+    """One emulated ESP-NOW node bound to its MAC's loopback port."""
+
+    def __init__(self, buffer_size=526, phy_rate=0):
+        self.buffer_size = buffer_size
+        self.phy_rate = phy_rate
+        self.peers = Peers()
+        self.send_success = 0
+        self.send_failure = 0
+        self.read_success = 0
+        self.read_failure = 0
+
+        self._mac = local_mac()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", port_for(self._mac)))
+        self._sock.settimeout(0.05)
+        self._random = random.Random(LINK["seed"])
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = []  # Heap of (deliver_at, order, port, datagram or None for a lost frame, count_ack)
+        self._order = 0
+        self._air_free_at = 0.0  # When the emulated radio finishes its queued airtime
+        self._last_deliver_at = 0.0
+        self._received = collections.deque()
+        self._buffered = 0  # Bytes in _received, counted against buffer_size
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._deliver_loop, daemon=True),
+            threading.Thread(target=self._receive_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ---- Sending ----
+
+    def send(self, message, peer=None):
+        """Queues message for peer (or every registered peer) through the link conditions."""
+        message = bytes(message)
+        if len(message) > MAX_DATA_LEN:
+            raise ValueError("ESP-NOW message too long")
+        if peer is None:
+            targets = list(self.peers)
+        elif any(p.mac == peer.mac for p in self.peers):
+            targets = [peer]
+        else:
+            raise RuntimeError("ESP-NOW error 0x306b (peer not found)")
+        with self._wake:
+            for target in targets:
+                self._schedule(target.mac, message)
+            self._wake.notify()
+
+    def _schedule(self, mac, message):
+        link = self._random_link()
+        now = _clock()
+        start = max(now, self._air_free_at)
+        airtime = 0.0
+        if LINK["bandwidth_bps"]:
+            airtime = (len(message) + AIR_OVERHEAD) * 8 / LINK["bandwidth_bps"]
+            if start - now > LINK["queue"] * airtime:
+                raise RuntimeError("ESP-NOW error 0x3067 (no memory: transmit queue full)")
+        self._air_free_at = start + airtime
+        deliver_at = start + airtime + link["delay"]
+        if link["reorder"]:
+            deliver_at += LINK["reorder_ms"] / 1000
+        else:
+            deliver_at = max(deliver_at, self._last_deliver_at)  # The air is first-in first-out
+            self._last_deliver_at = deliver_at
+        port = port_for(mac)
+        datagram = None if link["lost"] else _HEADER.pack(self._mac, link["rssi"]) + message
+        self._push(deliver_at, port, datagram, True)
+        if datagram is not None and link["duplicate"]:
+            self._push(deliver_at + airtime + 0.0005, port, datagram, False)
+
+    def _random_link(self):
+        r = self._random
+        return {
+            "delay": (LINK["latency_ms"] + r.uniform(0, LINK["jitter_ms"])) / 1000,
+            "lost": r.random() < LINK["loss"],
+            "duplicate": r.random() < LINK["duplicate"],
+            "reorder": r.random() < LINK["reorder"],
+            "rssi": max(-127, min(0, int(LINK["rssi"] + r.uniform(-LINK["rssi_jitter"], LINK["rssi_jitter"])))),
+        }
+
+    def _push(self, deliver_at, port, datagram, count_ack):
+        self._order += 1
+        heapq.heappush(self._pending, (deliver_at, self._order, port, datagram, count_ack))
+
+    def _deliver_loop(self):
+        with self._wake:
+            while self._running:
+                if not self._pending:
+                    self._wake.wait(0.1)
+                    continue
+                wait = self._pending[0][0] - _clock()
+                if wait > 0:
+                    self._wake.wait(wait)
+                    continue
+                _, _, port, datagram, count_ack = heapq.heappop(self._pending)
+                delivered = False
+                if datagram is not None:
+                    try:
+                        self._sock.sendto(datagram, ("127.0.0.1", port))
+                        delivered = True
+                    except OSError:
+                        pass  # Nobody listening: no ACK
+                if count_ack:
+                    if delivered:
+                        self.send_success += 1
+                    else:
+                        self.send_failure += 1
+
+    # ---- Receiving ----
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                datagram = self._sock.recv(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._running:
+                    return
+                continue  # e.g. ICMP port unreachable from an earlier send
+            if len(datagram) < _HEADER.size:
+                continue
+            mac, rssi = _HEADER.unpack_from(datagram)
+            msg = datagram[_HEADER.size :]
+            packet = ESPNowPacket(mac, msg, rssi, time.monotonic_ns() // 1_000_000)
+            size = len(msg) + PACKET_OVERHEAD
+            with self._lock:
+                if self._buffered + size > self.buffer_size:
+                    self.read_failure += 1
+                    continue
+                self._received.append(packet)
+                self._buffered += size
+
+    def read(self):
+        """Returns the oldest received ESPNowPacket, or None."""
+        with self._lock:
+            if not self._received:
+                return None
+            packet = self._received.popleft()
+            self._buffered -= len(packet.msg) + PACKET_OVERHEAD
+            self.read_success += 1
+            return packet
+
+    def __len__(self):
+        with self._lock:
+            return len(self._received)
+
+    # ---- Lifetime ----
+
+    def deinit(self):
+        self._running = False
+        with self._wake:
+            self._wake.notify()
+        for thread in self._threads:
+            thread.join(0.5)
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+    def set_pmk(self, pmk):
+        pass
@@ -0,0 +1,41 @@
+"""Host stand-in for the CircuitPython ``microcontroller`` module: watchdog, reset reason and nvm."""
+
+
+class ResetReason:
+    POWER_ON = "POWER_ON"
+    BROWNOUT = "BROWNOUT"
+    SOFTWARE = "SOFTWARE"
+    DEEP_SLEEP_ALARM = "DEEP_SLEEP_ALARM"
+    RESET_PIN = "RESET_PIN"
+    WATCHDOG = "WATCHDOG"
+    UNKNOWN = "UNKNOWN"
+    RESCUE_DEBUG = "RESCUE_DEBUG"
+
+
+class _Processor:
+    reset_reason = ResetReason.POWER_ON
+    frequency = 240_000_000
+
+
+class _WatchDogTimer:
+    """Records the settings; the host never times out."""
+
+    def __init__(self):
+        self.timeout = None
+        self.mode = None
+        self.feeds = 0
+
+    def feed(self):
+        self.feeds += 1
+
+    def deinit(self):
+        self.mode = None
+
+
+cpu = _Processor()
+watchdog = _WatchDogTimer()
+nvm = bytearray(8192)
+
+
+def reset():
+    raise SystemExit("microcontroller.reset()")
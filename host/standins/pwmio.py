@@ -0,0 +1,29 @@
+"""Host stand-in for the CircuitPython ``pwmio`` module."""
+
+
+class PWMOut:
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        pin.claim(self)
+        self.pin = pin
+        self.duty_cycle = duty_cycle
+        self._frequency = frequency
+        self.variable_frequency = variable_frequency
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value):
+        if not self.variable_frequency:
+            raise AttributeError("Cannot change frequency when variable_frequency is False")
+        self._frequency = value
+
+    def deinit(self):
+        self.pin.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
@@ -0,0 +1,36 @@
+"""Host stand-in for the CircuitPython ``supervisor`` module."""
+
+import select
+import sys
+import time
+
+
+class RunReason:
+    STARTUP = 1
+    AUTO_RELOAD = 2
+    SUPERVISOR_RELOAD = 3
+    REPL_RELOAD = 4
+
+
+class _Runtime:
+    run_reason = RunReason.STARTUP
+
+    @property
+    def serial_bytes_available(self):
+        try:
+            return bool(select.select([sys.stdin], [], [], 0)[0])
+        except (OSError, ValueError):
+            return False
+
+    serial_connected = True
+
+
+runtime = _Runtime()
+
+
+def ticks_ms():
+    return (time.monotonic_ns() // 1_000_000) & ((1 << 29) - 1)
+
+
+def reload():
+    raise SystemExit("supervisor.reload()")
@@ -0,0 +1,10 @@
+"""Host stand-in for the CircuitPython ``watchdog`` module."""
+
+
+class WatchDogMode:
+    RAISE = "RAISE"
+    RESET = "RESET"
+
+
+class WatchDogTimeout(Exception):
+    pass
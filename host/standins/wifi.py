@@ -0,0 +1,15 @@
+"""Host stand-in for the CircuitPython ``wifi`` module: only what ESP-NOW projects touch."""
+
+import espnow
+
+
+class _Radio:
+    def __init__(self):
+        self.enabled = True
+
+    @property
+    def mac_address(self):
+        return espnow.local_mac()
+
+
+radio = _Radio()
@@ -0,0 +1,123 @@
+"""
+battery_monitor.py
+------------------
+Pack voltage monitor that keeps motor speed independent of battery charge.
+
+The pack voltage is read through a resistor divider on an analog pin every
+SAMPLE_MS and low-pass filtered (1/FILTER_WEIGHT of each new sample), so PWM
+ripple and load steps don't reach the motors. From the filtered voltage it
+precomputes a Q12 factor, nominal_mv / pack_mv, and hands it to the motor
+library, which applies it with one integer multiply and shift per duty write:
+a half-charged pack gets proportionally more duty, and a speed tuned at
+nominal_mv (PIVOT_SPEED, for example) stays the same across the discharge
+curve. The factor is clamped to MIN_FACTOR..MAX_FACTOR; once duty saturates
+at 100% a low pack can't be compensated any further.
+
+When the filtered voltage stays below cutoff_mv for CUTOFF_MS, the motors
+ramp down, the drivers are switched off and the motors stay disabled
+(motor.undervoltage_cutoff()) until "battery reset" on the console or a
+reboot; a pack that rests back above the cutoff is still empty.
+
+Configured by the "battery" object in config.json, e.g. for a 10S pack:
+
+    "battery": {"pin": "A5", "divider": 15.0, "nominal_mv": 36000,
+                "full_mv": 42000, "cutoff_mv": 31000}
+
+divider is the pack voltage per volt at the pin. Without a "battery" object
+no pin is claimed and duties are written uncompensated.
+"""
+
+import board
+import analogio
+from adafruit_ticks import ticks_ms, ticks_diff
+import robot_config
+import circuitpython_zsx11h as motor
+
+SAMPLE_MS = 100  # Time between ADC reads
+FILTER_WEIGHT = 8  # Low-pass filter: 1/8 of each new sample (~0.8 s time constant)
+CUTOFF_MS = 2000  # Time below cutoff_mv before the motors are stopped
+MIN_FACTOR = 3072  # Q12 limits of the compensation factor (0.75..1.5)
+MAX_FACTOR = 6144
+REFERENCE_MV = 3300  # ADC full-scale voltage
+
+CONFIG = robot_config.get("battery", None)
+
+
+class BatteryMonitor:
+    """Filtered pack voltage, duty compensation factor and undervoltage cutoff."""
+
+    def __init__(self, pin, divider=15.0, nominal_mv=36000, full_mv=42000, cutoff_mv=31000):
+        self.adc = analogio.AnalogIn(pin)
+        self.scale = REFERENCE_MV * divider / 65535  # Pack mV per ADC count
+        self.nominal_mv = nominal_mv
+        self.full_mv = full_mv
+        self.cutoff_mv = cutoff_mv
+        self.mv = self.read_mv()
+        self.min_mv = self.mv
+        self.factor = 1 << motor.SUPPLY_SHIFT
+        self._sampled = ticks_ms()
+        self._low_since = None
+        self.cutoffs = 0
+        self._apply()
+
+    def read_mv(self):
+        """Reads the unfiltered pack voltage in millivolts."""
+        return int(self.adc.value * self.scale)
+
+    def update(self, now=None):
+        """Samples and filters the voltage when SAMPLE_MS has passed. Call every loop iteration."""
+        if now is None:
+            now = ticks_ms()
+        if ticks_diff(now, self._sampled) < SAMPLE_MS:
+            return
+        self._sampled = now
+        self.mv += (self.read_mv() - self.mv) // FILTER_WEIGHT
+        if self.mv < self.min_mv:
+            self.min_mv = self.mv
+        self._apply()
+
+        if self.mv >= self.cutoff_mv:
+            self._low_since = None
+        elif self._low_since is None:
+            self._low_since = now
+        elif ticks_diff(now, self._low_since) >= CUTOFF_MS and not motor.undervoltage:
+            self.cutoffs += 1
+            motor.undervoltage_cutoff()
+
+    def _apply(self):
+        factor = (self.nominal_mv << motor.SUPPLY_SHIFT) // max(1, self.mv)
+        factor = max(MIN_FACTOR, min(MAX_FACTOR, factor))
+        if factor != self.factor:
+            self.factor = factor
+            motor.set_supply_factor(factor)
+
+    def percent(self):
+        """Charge estimate, linear between cutoff_mv (0) and full_mv (100)."""
+        span = self.full_mv - self.cutoff_mv
+        return max(0, min(100, (self.mv - self.cutoff_mv) * 100 // span)) if span > 0 else 0
+
+    def command(self, *args):
+        """Prints the battery state, or clears a latched cutoff with "battery reset"."""
+        if args and args[0] == "reset":
+            self._low_since = None
+            motor.clear_undervoltage()
+            print("Undervoltage cutoff cleared")
+            return
+        print(
+            f"Battery: {self.mv} mV ({self.percent()}%) min {self.min_mv} mV,"
+            f" compensation x{self.factor / (1 << motor.SUPPLY_SHIFT):.3f},"
+            f" cutoff {self.cutoff_mv} mV {'TRIPPED' if motor.undervoltage else 'ok'} ({self.cutoffs} times)"
+        )
+
+
+def from_config():
+    """Returns a BatteryMonitor configured by config.json's "battery" object, or None."""
+    if not CONFIG:
+        return None
+    return BatteryMonitor(
+        getattr(board, CONFIG.get("pin", "A5")),
+        CONFIG.get("divider", 15.0),
+        CONFIG.get("nominal_mv", 36000),
+        CONFIG.get("full_mv", 42000),
+        CONFIG.get("cutoff_mv", 31000),
+    )
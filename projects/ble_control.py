@@ -0,0 +1,176 @@
+"""
+ble_control.py
+--------------
+Phone-tilt driving over BLE with the Adafruit Bluefruit Connect app.
+
+Open the app's Controller screen and turn on Accelerometer or Quaternion
+streaming. Every control tick bluefruit_stream drains the UART and keeps only
+the newest orientation, so the robot follows the phone's current tilt however
+fast the app streams. Tilting forward/back drives, tilting left/right steers;
+the two mix into continuous signed left/right wheel commands that are slew
+limited per tick and applied with motor.drive().
+
+The orientation at connection time is "level". Pressing button 1 on the
+Control Pad re-zeros it. If no orientation arrives for STALE_MS the command
+drops to zero, and on disconnect the motors ramp to a stop.
+
+While connected, ble_status publishes wheel speed, applied duty, brake and
+enable state and loop rate as rate-limited notify characteristics, and the
+battery level through the standard Battery Service when battery_monitor is
+configured.
+"""
+
+import time
+import board
+import countio
+import adafruit_ble
+from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
+from adafruit_ble.services.nordic import UARTService
+from adafruit_ble.services.standard import BatteryService
+from adafruit_ticks import ticks_ms, ticks_add, ticks_diff
+from bluefruit_stream import SensorStream
+from ble_status import RobotStatusService, StatusPublisher, FLAG_BRAKED, FLAG_ENABLED
+import robot_config
+import battery_monitor
+import serial_console as console
+import circuitpython_zsx11h as motor
+
+# ---- Tilt Control Configuration ----
+TICK_MS = 20  # Control period (50 Hz)
+DEADZONE = 0.08  # Tilt ignored around level (sine of the angle, ~5 degrees)
+FULL_TILT = 0.5  # Tilt giving a full command (~30 degrees)
+TURN_GAIN = 0.6  # Steering share of the wheel command range
+THROTTLE_SIGN = 1  # Flip if tilting forward drives backward
+STEER_SIGN = 1  # Flip if tilting left turns right
+MAX_STEP = 3000  # Largest change in wheel command per tick
+STALE_MS = 300  # Stop when orientation updates stop for this long
+ZERO_BUTTON = 1  # Control Pad button that re-zeros level
+SPEED_PERIOD_MS = 200  # Wheel speed measurement window for status
+PULSES_PER_REV = robot_config.get("pulses_per_rev", 45)
+
+# === BLE Setup ===
+ble = adafruit_ble.BLERadio()
+uart = UARTService()
+advertisement = ProvideServicesAdvertisement(uart)
+stream = SensorStream()
+status = RobotStatusService()
+battery = battery_monitor.from_config()
+publisher = StatusPublisher(status, BatteryService() if battery else None)
+console.register("stream", stream.report, "BLE packet stream counters")
+console.register("notify", publisher.report, "BLE status notifications sent and filtered")
+if battery:
+    console.register("battery", battery.command, "pack voltage and compensation ('battery reset' clears a cutoff)")
+
+# Wheel speed from the SPEED hall outputs, for status only.
+left_counter = countio.Counter(board.A4, edge=countio.Edge.RISE)
+right_counter = countio.Counter(board.D13, edge=countio.Edge.RISE)
+
+# Level reference: gravity direction when the phone is held level.
+reference = None
+
+
+def shape(tilt):
+    """Maps a tilt component to a command in -1..1 with a deadzone."""
+    magnitude = abs(tilt)
+    if magnitude < DEADZONE:
+        return 0.0
+    command = min(1.0, (magnitude - DEADZONE) / (FULL_TILT - DEADZONE))
+    return command if tilt > 0 else -command
+
+
+def tilt_command():
+    """Returns the (left, right) wheel commands for the newest orientation."""
+    ref_x, ref_y, ref_z = reference
+    sign = 1 if ref_z >= 0 else -1  # iOS and Android report gravity with opposite signs
+    throttle = THROTTLE_SIGN * shape(sign * (stream.gy - ref_y))
+    steer = STEER_SIGN * shape(sign * (stream.gx - ref_x)) * TURN_GAIN
+    left = throttle + steer
+    right = throttle - steer
+    peak = max(abs(left), abs(right), 1.0)
+    return int(left / peak * motor.MAX_SPEED), int(right / peak * motor.MAX_SPEED)
+
+
+def publish_status(now):
+    """Offers the current state to the status channels and sends what is due."""
+    global speed_window_start, loop_window_start, loop_count
+    loop_count += 1
+    elapsed = ticks_diff(now, speed_window_start)
+    if elapsed >= SPEED_PERIOD_MS:
+        scale = 60000 / (PULSES_PER_REV * elapsed)  # Pulses per window to rpm
+        left_rpm = int(left_counter.count * scale)
+        right_rpm = int(right_counter.count * scale)
+        left_counter.reset()
+        right_counter.reset()
+        speed_window_start = now
+        publisher.wheel_rpm.offer((left_rpm if left >= 0 else -left_rpm, right_rpm if right >= 0 else -right_rpm))
+    elapsed = ticks_diff(now, loop_window_start)
+    if elapsed >= 1000:
+        publisher.loop_hz.offer(loop_count * 1000 // elapsed)
+        loop_count = 0
+        loop_window_start = now
+    publisher.duty.offer((left * 65535 // motor.MAX_SPEED, right * 65535 // motor.MAX_SPEED))
+    flags = (FLAG_BRAKED if motor.left_brake.value else 0) | (FLAG_ENABLED if motor.motors_enabled else 0)
+    publisher.drive_flags.offer(flags)
+    if battery:
+        publisher.battery.offer(battery.percent())
+    publisher.publish()
+
+
+def slew(current, target):
+    """Moves current toward target by at most MAX_STEP."""
+    if target > current + MAX_STEP:
+        return current + MAX_STEP
+    if target < current - MAX_STEP:
+        return current - MAX_STEP
+    return target
+
+
+print("BLE tilt control: stream Accelerometer or Quaternion from Bluefruit Connect")
+left = right = 0
+speed_window_start = loop_window_start = ticks_ms()
+loop_count = 0
+
+while True:
+    if not ble.connected:
+        if left or right:
+            motor.stop()
+            left = right = 0
+        motor.park()
+        print("Waiting for BLE connection...")
+        ble.start_advertising(advertisement)
+        while not ble.connected:
+            console.poll()
+            time.sleep(0.1)
+        ble.stop_advertising()
+        reference = None
+        print("BLE connected, hold the phone level")
+
+    next_tick = ticks_ms()
+    while ble.connected:
+        console.poll()
+        if stream.poll(uart) and reference is None:
+            reference = (stream.gx, stream.gy, stream.gz)
+        if stream.pressed and stream.button == ZERO_BUTTON:
+            reference = (stream.gx, stream.gy, stream.gz)
+            stream.pressed = False
+            print("Level re-zeroed")
+
+        target_left = target_right = 0
+        if reference is not None and ticks_diff(ticks_ms(), stream.stamp) < STALE_MS:
+            target_left, target_right = tilt_command()
+        left = slew(left, target_left)
+        right = slew(right, target_right)
+        motor.drive(left, right)
+        now = ticks_ms()
+        if battery:
+            battery.update(now)
+        motor.park_if_idle(now)
+        publish_status(now)
+
+        # Fixed-rate ticks: sleep to the next deadline instead of a fixed delay.
+        next_tick = ticks_add(next_tick, TICK_MS)
+        wait = ticks_diff(next_tick, ticks_ms())
+        if wait > 0:
+            time.sleep(wait / 1000)
+        else:
+            next_tick = ticks_ms()  # Fell behind: don't try to catch up
@@ -0,0 +1,155 @@
+"""
+ble_status.py
+-------------
+Publishes live robot state over BLE as notify characteristics, rate limited
+so status traffic never crowds out incoming control packets.
+
+RobotStatusService follows the adafruit_ble_adafruit conventions (Adafruit
+vendor UUID range, measurement_period and service_version characteristics),
+and battery level, when a source is given, goes out through the standard
+Battery Service, so generic BLE clients such as nRF Connect or LightBlue can
+subscribe without a custom app:
+
+  wheel_rpm     <hh  measured left/right wheel speed, signed by direction
+  duty          <ii  applied left/right command, signed (-65535..65535)
+  drive_flags   u8   bit 0: brakes engaged, bit 1: motors enabled
+  loop_hz       u16  control loop rate
+
+Each value goes through a NotifyChannel: a new value is sent only when it
+differs from the last sent one by at least `threshold` and `min_interval_ms`
+has passed, or unconditionally every `heartbeat_ms`. On top of that
+StatusPublisher.publish() sends at most MAX_NOTIFY_PER_TICK notifications per
+call, most overdue channel first, so a burst of changes is spread over
+ticks. A client can slow everything down further by writing a minimum
+interval to measurement_period (ms); a negative period stops notifications.
+"""
+
+from adafruit_ble.attributes import Attribute
+from adafruit_ble.characteristics import Characteristic, StructCharacteristic
+from adafruit_ble.characteristics.int import Uint8Characteristic, Uint16Characteristic
+from adafruit_ble_adafruit.adafruit_service import AdafruitService
+from adafruit_ticks import ticks_ms, ticks_diff
+
+MAX_NOTIFY_PER_TICK = 1  # Notifications sent per publish() call
+PERIOD_CHECK_MS = 1000  # How often the client-writable measurement_period is re-read
+
+FLAG_BRAKED = 0x01
+FLAG_ENABLED = 0x02
+
+_NOTIFY = Characteristic.READ | Characteristic.NOTIFY
+
+
+class RobotStatusService(AdafruitService):
+    """Robot drive state as Adafruit-style notify characteristics."""
+
+    uuid = AdafruitService.adafruit_service_uuid(0xF00)
+    wheel_rpm = StructCharacteristic(
+        "<hh", uuid=AdafruitService.adafruit_service_uuid(0xF01), properties=_NOTIFY, write_perm=Attribute.NO_ACCESS
+    )
+    duty = StructCharacteristic(
+        "<ii", uuid=AdafruitService.adafruit_service_uuid(0xF02), properties=_NOTIFY, write_perm=Attribute.NO_ACCESS
+    )
+    drive_flags = Uint8Characteristic(
+        uuid=AdafruitService.adafruit_service_uuid(0xF03), properties=_NOTIFY, write_perm=Attribute.NO_ACCESS
+    )
+    loop_hz = Uint16Characteristic(
+        uuid=AdafruitService.adafruit_service_uuid(0xF04), properties=_NOTIFY, write_perm=Attribute.NO_ACCESS
+    )
+    measurement_period = AdafruitService.measurement_period_charac(msecs=0)  # 0: channel limits only
+    service_version = AdafruitService.service_version_charac(version=1)
+
+
+def _change(old, new):
+    """Largest difference between two ints or two equal-length tuples."""
+    if old is None:
+        return None
+    if isinstance(new, tuple):
+        return max(abs(a - b) for a, b in zip(old, new))
+    return abs(new - old)
+
+
+class NotifyChannel:
+    """Rate limiter and change filter for one characteristic."""
+
+    def __init__(self, service, name, min_interval_ms, threshold=0, heartbeat_ms=5000):
+        self.service = service
+        self.name = name
+        self.min_interval_ms = min_interval_ms
+        self.threshold = threshold
+        self.heartbeat_ms = heartbeat_ms
+        self.pending = None
+        self.sent_value = None
+        self._sent_at = ticks_ms()
+        self.sent = 0
+        self.filtered = 0  # Offered values dropped as too small a change
+
+    def offer(self, value):
+        """Stores the newest value; it is sent later if publish() finds it due."""
+        self.pending = value
+
+    def due(self, now, period_ms):
+        """Returns how overdue the pending value is in ms, or -1 if it shouldn't be sent."""
+        if self.pending is None:
+            return -1
+        elapsed = ticks_diff(now, self._sent_at)
+        if elapsed >= self.heartbeat_ms:
+            return elapsed
+        if elapsed < max(self.min_interval_ms, period_ms):
+            return -1
+        change = _change(self.sent_value, self.pending)
+        if change is not None and (change == 0 or change < self.threshold):
+            if change:
+                self.filtered += 1
+            self.pending = None
+            return -1
+        return elapsed
+
+    def send(self, now):
+        setattr(self.service, self.name, self.pending)  # Assigning a NOTIFY value notifies subscribers
+        self.sent_value = self.pending
+        self.pending = None
+        self._sent_at = now
+        self.sent += 1
+
+
+class StatusPublisher:
+    """Sends the most overdue channels, at most MAX_NOTIFY_PER_TICK per call."""
+
+    def __init__(self, status, battery=None):
+        self.status = status
+        self.wheel_rpm = NotifyChannel(status, "wheel_rpm", 200, threshold=3)
+        self.duty = NotifyChannel(status, "duty", 100, threshold=1000)
+        self.drive_flags = NotifyChannel(status, "drive_flags", 50)  # Any change matters
+        self.loop_hz = NotifyChannel(status, "loop_hz", 1000, threshold=2)
+        self.channels = [self.wheel_rpm, self.duty, self.drive_flags, self.loop_hz]
+        self.battery = None
+        if battery is not None:
+            self.battery = NotifyChannel(battery, "level", 5000, threshold=1, heartbeat_ms=60000)
+            self.channels.append(self.battery)
+        self._period = status.measurement_period
+        self._period_checked = ticks_ms()
+
+    def publish(self):
+        """Sends due notifications within the per-call budget."""
+        now = ticks_ms()
+        if ticks_diff(now, self._period_checked) >= PERIOD_CHECK_MS:
+            self._period = self.status.measurement_period
+            self._period_checked = now
+        period = self._period
+        if period < 0:
+            return
+        for _ in range(MAX_NOTIFY_PER_TICK):
+            best = None
+            best_due = -1
+            for channel in self.channels:
+                overdue = channel.due(now, period)
+                if overdue > best_due:
+                    best, best_due = channel, overdue
+            if best is None:
+                return
+            best.send(now)
+
+    def report(self):
+        """Prints notifications sent and filtered per channel."""
+        for channel in self.channels:
+            print(f"Notify {channel.name}: sent={channel.sent} filtered={channel.filtered}")
@@ -0,0 +1,191 @@
+"""
+bluefruit_stream.py
+-------------------
+Decodes Bluefruit Connect packets straight from a UARTService stream,
+keeping only the newest phone orientation.
+
+adafruit_bluefruit_connect's Packet.from_stream() reads one packet per call
+and builds a new packet object for it, so a loop that reads one packet per
+tick falls further behind whenever the app streams faster than the loop runs,
+and proportional tilt control lags behind old orientations. Here poll()
+drains everything the UART has buffered into one reused bytearray, checks the
+framing and checksum of every packet in place, and decodes only the newest
+orientation packet, an AccelerometerPacket ("!A") or a QuaternionPacket
+("!Q"). Older ones are counted as superseded and skipped. Gyro, magnetometer,
+location, color and button packets are framed and counted so they never
+desynchronize the stream; the newest button event is kept.
+
+Both orientation packets are reduced to the gravity direction in the phone's
+frame, a unit vector (gx, gy, gz): the accelerometer reading is normalized
+(iOS sends g, Android m/s^2), and the quaternion (x, y, z, w) is used to
+rotate the world's up axis into the phone frame.
+"""
+
+import struct
+from adafruit_ticks import ticks_ms
+
+BUFFER_SIZE = 256  # Bytes held between polls; only the newest packets matter
+
+# Total length in bytes, "!" and type included, by packet type.
+PACKET_LENGTHS = {
+    ord("A"): 15,  # Accelerometer: 3 floats
+    ord("G"): 15,  # Gyro: 3 floats
+    ord("M"): 15,  # Magnetometer: 3 floats
+    ord("L"): 15,  # Location: 3 floats
+    ord("Q"): 19,  # Quaternion: 4 floats
+    ord("C"): 6,  # Color: 3 bytes
+    ord("B"): 5,  # Button: number and state as ASCII digits
+}
+MAX_PACKET = 19
+
+_BANG = ord("!")
+_ACCEL = ord("A")
+_QUAT = ord("Q")
+_BUTTON = ord("B")
+
+
+class SensorStream:
+    """Incremental Bluefruit Connect packet decoder that keeps the newest orientation."""
+
+    def __init__(self, buffer_size=BUFFER_SIZE):
+        self.buffer = bytearray(buffer_size)
+        self._view = memoryview(self.buffer)
+        self._fill = 0  # Bytes held in the buffer
+        self._pos = 0  # Bytes before this offset are framed
+        self._newest = -1  # Offset of the newest undecoded orientation packet
+        self._stash = bytearray(MAX_PACKET)  # Newest orientation moved out before compacting
+        self._stashed = False
+
+        # Newest orientation as a unit gravity vector in the phone frame.
+        self.gx = 0.0
+        self.gy = 0.0
+        self.gz = 1.0
+        self.stamp = ticks_ms()  # ticks_ms() when the orientation was decoded
+        self.fresh = False  # True after a poll that decoded a new orientation
+
+        # Newest button event.
+        self.button = 0
+        self.pressed = False
+
+        # Counters.
+        self.packets = 0
+        self.orientations = 0
+        self.superseded = 0  # Orientation packets skipped because a newer one was buffered
+        self.bad = 0  # Bytes skipped while resynchronizing on a bad checksum or type
+        self.overflows = 0  # Times the buffer filled and older bytes were dropped
+
+    def poll(self, uart):
+        """Drains the UART and decodes the newest orientation. Returns True if one was decoded."""
+        self.fresh = False
+        available = uart.in_waiting
+        while available:
+            if self._fill == len(self.buffer):
+                self._stash_newest()
+                self._compact()
+                if self._fill == len(self.buffer):
+                    # A buffer of noise: keep only a tail that may start a packet.
+                    self._pos = self._fill - (MAX_PACKET - 1)
+                    self._compact()
+                    self.overflows += 1
+            count = min(available, len(self.buffer) - self._fill)
+            count = uart.readinto(self._view[self._fill : self._fill + count]) or 0
+            if not count:
+                break
+            self._fill += count
+            available -= count
+            self._scan()
+        if self._newest >= 0:
+            self._decode(self.buffer, self._newest)
+        elif self._stashed:
+            self._decode(self._stash, 0)
+        self._newest = -1
+        self._stashed = False
+        self._compact()
+        return self.fresh
+
+    def _scan(self):
+        """Frames every complete packet from the scan position on, remembering the newest orientation."""
+        buf = self.buffer
+        fill = self._fill
+        i = self._pos
+        while i < fill:
+            if buf[i] != _BANG:
+                self.bad += 1
+                i += 1
+                continue
+            if i + 1 >= fill:
+                break
+            kind = buf[i + 1]
+            length = PACKET_LENGTHS.get(kind, 0)
+            if not length:
+                self.bad += 1
+                i += 1
+                continue
+            if i + length > fill:
+                break  # Partial packet: wait for the rest
+            total = 0
+            for k in range(i, i + length - 1):
+                total += buf[k]
+            if (~total & 0xFF) != buf[i + length - 1]:
+                self.bad += 1
+                i += 1
+                continue
+            self.packets += 1
+            if kind == _ACCEL or kind == _QUAT:
+                if self._newest >= 0 or self._stashed:
+                    self.superseded += 1
+                self._newest = i
+                self._stashed = False
+            elif kind == _BUTTON:
+                self.button = buf[i + 2] - 48
+                self.pressed = buf[i + 3] == 49
+            i += length
+        self._pos = i
+
+    def _stash_newest(self):
+        """Copies the newest orientation packet aside so compacting can't overwrite it."""
+        start = self._newest
+        if start < 0:
+            return
+        for k in range(PACKET_LENGTHS[self.buffer[start + 1]]):
+            self._stash[k] = self.buffer[start + k]
+        self._newest = -1
+        self._stashed = True
+
+    def _compact(self):
+        """Moves the unscanned bytes to the front of the buffer."""
+        start = self._pos
+        if not start:
+            return
+        buf = self.buffer
+        remaining = self._fill - start
+        for k in range(remaining):
+            buf[k] = buf[start + k]
+        self._fill = remaining
+        self._pos = 0
+
+    def _decode(self, buf, offset):
+        if buf[offset + 1] == _QUAT:
+            x, y, z, w = struct.unpack_from("<ffff", buf, offset + 2)
+            # World up (0, 0, 1) expressed in the phone frame.
+            gx = 2 * (x * z - w * y)
+            gy = 2 * (y * z + w * x)
+            gz = w * w - x * x - y * y + z * z
+        else:
+            gx, gy, gz = struct.unpack_from("<fff", buf, offset + 2)
+        norm = (gx * gx + gy * gy + gz * gz) ** 0.5
+        if norm < 1e-6:
+            return  # Free fall or an all-zero packet carries no orientation
+        self.gx = gx / norm
+        self.gy = gy / norm
+        self.gz = gz / norm
+        self.stamp = ticks_ms()
+        self.orientations += 1
+        self.fresh = True
+
+    def report(self):
+        """Prints the stream counters."""
+        print(
+            f"Stream: packets={self.packets} orientations={self.orientations}"
+            f" superseded={self.superseded} bad_bytes={self.bad} overflows={self.overflows}"
+        )
@@ -1,16 +1,61 @@
 import time
+from array import array
 import pwmio
 import digitalio
 import board
+import robot_config
+import motion_profile
+import timing_probe as probe
+import params
+import safety
+import diagnostics as diag
+from adafruit_ticks import ticks_ms, ticks_diff
 
-# Constants
-MAX_SPEED = 65535  # Updated max speed for full 16-bit scaling
-RAMP_STEPS = 10  # Number of steps for speed ramping
-RAMP_DELAY = 0.02  # Delay between ramping steps
+# Tunable constants (see params; change at runtime with "set NAME VALUE")
+MAX_SPEED = params.define("MAX_SPEED", 65535, 1, 65535, "speed that maps to full duty")
+RAMP_STEPS = params.define("RAMP_STEPS", 10, 1, 100, "minimum steps per speed ramp")
+RAMP_DELAY = params.define("RAMP_DELAY", 0.02, 0.001, 0.5, "seconds between ramp steps")
+PARK_MS = params.define("PARK_MS", 500, 0, 60000, "ms at zero duty before the drivers are parked")
+PWM_FREQUENCY = robot_config.get("pwm_frequency", 2000)  # PWM carrier frequency in Hz
 
-# Initialize motor PWM outputs
-left_pwm = pwmio.PWMOut(board.A0, frequency=2000, duty_cycle=0)
-right_pwm = pwmio.PWMOut(board.D9, frequency=2000, duty_cycle=0)
+# Modulated braking (brake_stop): each BRAKE pin is held on for a share of every
+# BRAKE_PERIOD_MS and the wheel coasts for the rest, so it slows at about
+# BRAKE_DECEL instead of the full brake's BRAKE_FULL_DECEL (at or above it,
+# brake_stop() is the full brake). The bounded braking loop from WHEEL_MAX_RPM
+# stays shorter than the watchdog timeout down to MIN_BRAKE_DECEL.
+MIN_BRAKE_DECEL = 400
+BRAKE_DECEL = params.define("BRAKE_DECEL", 600, MIN_BRAKE_DECEL, 10000, "brake_stop deceleration, rpm/s")
+BRAKE_FULL_DECEL = params.define("BRAKE_FULL_DECEL", 1500, 100, 10000, "deceleration of the full brake, rpm/s")
+BRAKE_PERIOD_MS = 20  # Modulation period
+BRAKE_WINDOW = 3  # Periods of hall pulses per speed measurement (60 ms)
+BRAKE_GAIN = 10  # rpm/s of deceleration added per rpm above the planned speed (removed below it)
+WHEEL_MAX_RPM = robot_config.get("wheel_max_rpm", 300)  # Wheel speed at full duty, for the open-loop plan
+PULSES_PER_REV = robot_config.get("pulses_per_rev", 45)
+
+# Diagnostic messages; the per-call ones are DEBUG and rate-limited.
+MSG_SCALE = diag.site("scale_speed(%d) -> %d", diag.DEBUG, 500)
+MSG_SET_SPEED = diag.site("Setting PWM - Left: %d, Right: %d", diag.DEBUG, 500)
+MSG_OUT_OF_RANGE = diag.site("PWM duty_cycle out of range: %d, %d", diag.ERROR, 1000)
+MSG_PIVOT = diag.site("%s called with pivot_speed=%d", diag.DEBUG, 500)
+MSG_STOPPING = diag.site("Stopping motors without braking")
+MSG_STOPPED = diag.site("Motors stopped, but brakes are not engaged")
+MSG_BRAKES = diag.site("Brakes engaged")
+MSG_BRAKE_STOP = diag.site("Braking to a stop at %d rpm/s")
+MSG_RELEASED = diag.site("Brakes released")
+
+# Driver enable (STOP) lines. A ZSX11H runs while its STOP input is at
+# ENABLE_LEVEL and switches its bridge off otherwise, which stops the wheel in
+# one pin write and draws the least current. They are claimed first and held
+# off, so the drivers stay parked through the rest of the setup.
+ENABLE_LEVEL = robot_config.get("enable_level", True)
+left_enable = digitalio.DigitalInOut(board.A3)
+left_enable.switch_to_output(value=not ENABLE_LEVEL)
+right_enable = digitalio.DigitalInOut(board.D10)
+right_enable.switch_to_output(value=not ENABLE_LEVEL)
+
+# Initialize motor PWM outputs (variable_frequency allows retuning the carrier at runtime)
+left_pwm = pwmio.PWMOut(board.A0, frequency=PWM_FREQUENCY, duty_cycle=0, variable_frequency=True)
+right_pwm = pwmio.PWMOut(board.D9, frequency=PWM_FREQUENCY, duty_cycle=0, variable_frequency=True)
 
 # Initialize direction control pins
 left_dir = digitalio.DigitalInOut(board.A1)
@@ -26,94 +71,388 @@ right_brake.direction = digitalio.Direction.OUTPUT
 
 motors_enabled = True  # Global motor state
 
+# The drivers are armed (STOP at ENABLE_LEVEL) by the first non-zero duty and
+# parked again by park_if_idle() once the duty has stayed zero for PARK_MS.
+drivers_armed = False
+arms = 0
+parks = 0
+_idle_since = None  # ticks_ms() when both duties last became zero
+
+# Per-wheel calibration written by the wheel_calibration project: the DIR level
+# that turns each wheel forward, and a duty-correction table of CORRECTION_POINTS
+# entries mapping commanded duty (0, 4096, ... 65536) to the duty that makes both
+# wheels turn at the same speed.
+CORRECTION_BITS = 12
+CORRECTION_MASK = (1 << CORRECTION_BITS) - 1
+CORRECTION_POINTS = (65536 >> CORRECTION_BITS) + 1
+
+def _load_correction(wheel_config):
+    table = wheel_config.get("duty_table")
+    if not table or len(table) != CORRECTION_POINTS:
+        return None
+    return array("H", [clamp(int(v), 0, 65535) for v in table])
+
+_calibration = robot_config.get("calibration", {})
+LEFT_FORWARD = _calibration.get("left", {}).get("forward_level", True)
+RIGHT_FORWARD = _calibration.get("right", {}).get("forward_level", True)
+
+# Duties last commanded, before supply compensation and calibration correction.
+left_command = 0
+right_command = 0
+
+# Supply compensation: every written duty is scaled by supply_factor / 4096
+# (Q12) so a given command turns the wheels at the same speed as the pack
+# drains. battery_monitor sets it from the filtered pack voltage; 4096 is no
+# compensation.
+SUPPLY_SHIFT = 12
+supply_factor = 1 << SUPPLY_SHIFT
+undervoltage = False  # Latched by undervoltage_cutoff(); motors stay disabled
+
+def _apply_param(name, value):
+    """Picks up tuning changes made through params."""
+    global MAX_SPEED, RAMP_STEPS, RAMP_DELAY, PARK_MS, BRAKE_DECEL, BRAKE_FULL_DECEL
+    if name == "MAX_SPEED":
+        MAX_SPEED = value
+    elif name == "RAMP_STEPS":
+        RAMP_STEPS = value
+    elif name == "RAMP_DELAY":
+        RAMP_DELAY = value
+    elif name == "PARK_MS":
+        PARK_MS = value
+    elif name == "BRAKE_DECEL":
+        BRAKE_DECEL = value
+    elif name == "BRAKE_FULL_DECEL":
+        BRAKE_FULL_DECEL = value
+
+params.watch(_apply_param)
+
 def clamp(value, min_value, max_value):
     """Ensures a value stays within a valid range."""
     return max(min_value, min(value, max_value))
 
+left_correction = _load_correction(_calibration.get("left", {}))
+right_correction = _load_correction(_calibration.get("right", {}))
+
+def set_calibration(wheel, forward_level, table):
+    """Applies a wheel's direction polarity and duty-correction table (None disables correction)."""
+    global LEFT_FORWARD, RIGHT_FORWARD, left_correction, right_correction
+    table = _load_correction({"duty_table": table}) if table is not None else None
+    if wheel == "left":
+        LEFT_FORWARD = forward_level
+        left_correction = table
+    else:
+        RIGHT_FORWARD = forward_level
+        right_correction = table
+
+def correct_duty(table, duty):
+    """Maps a commanded duty through a wheel's correction table with integer interpolation."""
+    if table is None:
+        return duty
+    index = duty >> CORRECTION_BITS
+    low = table[index]
+    return low + (((table[index + 1] - low) * (duty & CORRECTION_MASK)) >> CORRECTION_BITS)
+
+def write_duty(left_duty, right_duty):
+    """Writes commanded duties (0-65535) to the PWM outputs through supply compensation and the calibration tables."""
+    global left_command, right_command, _idle_since
+    if left_duty or right_duty:
+        if not drivers_armed and motors_enabled:
+            arm()
+        _idle_since = None
+    elif _idle_since is None:
+        _idle_since = ticks_ms()
+    left_command = left_duty
+    right_command = right_duty
+    factor = supply_factor
+    left_pwm.duty_cycle = correct_duty(left_correction, min(65535, (left_duty * factor) >> SUPPLY_SHIFT))
+    right_pwm.duty_cycle = correct_duty(right_correction, min(65535, (right_duty * factor) >> SUPPLY_SHIFT))
+
+def arm():
+    """
+    Switches the drivers on. The PWM outputs are still at zero from park() and
+    callers set DIR before the first non-zero duty, so a driver never starts
+    on a stale duty or direction.
+    """
+    global drivers_armed, arms
+    left_enable.value = ENABLE_LEVEL
+    right_enable.value = ENABLE_LEVEL
+    drivers_armed = True
+    arms += 1
+
+def park():
+    """Switches the drivers off (wheels coast) and zeroes the PWM outputs for the next arm()."""
+    global drivers_armed, parks
+    left_enable.value = not ENABLE_LEVEL
+    right_enable.value = not ENABLE_LEVEL
+    left_pwm.duty_cycle = 0
+    right_pwm.duty_cycle = 0
+    if drivers_armed:
+        drivers_armed = False
+        parks += 1
+
+def park_if_idle(now=None):
+    """Parks the drivers once both duties have been zero for PARK_MS with the brakes released. Call every loop iteration."""
+    if not drivers_armed or _idle_since is None or left_brake.value or right_brake.value:
+        return
+    if now is None:
+        now = ticks_ms()
+    if ticks_diff(now, _idle_since) >= PARK_MS:
+        park()
+
+def driver_report(*args):
+    """Prints the driver enable state and how often the drivers were armed and parked."""
+    print(
+        f"Drivers: {'armed' if drivers_armed else 'parked'} (STOP level {int(ENABLE_LEVEL)} runs),"
+        f" motors {'enabled' if motors_enabled else 'disabled'}, arms={arms} parks={parks} park_ms={PARK_MS}"
+    )
+
+def set_supply_factor(factor):
+    """Sets the Q12 supply compensation factor; applied from the next duty write."""
+    global supply_factor
+    supply_factor = factor
+
 def scale_speed(speed):
     """Converts speed (0-MAX_SPEED) to PWM duty cycle (0-65535)."""
     clamped_speed = clamp(speed, 0, MAX_SPEED)
     pwm_value = int((clamped_speed / MAX_SPEED) * 65535)
-    print(f"DEBUG: scale_speed({speed}) -> {pwm_value}")  # Debug print
+    diag.log(MSG_SCALE, speed, pwm_value)
     return pwm_value
 
+@probe.timed("set_speed")
 def set_speed(left_speed, right_speed):
     """Sets motor speed with proper scaling."""
     left_duty = scale_speed(left_speed)
     right_duty = scale_speed(right_speed)
 
-    print(f"DEBUG: Setting PWM - Left: {left_duty}, Right: {right_duty}")
+    diag.log(MSG_SET_SPEED, left_duty, right_duty)
 
     if not (0 <= left_duty <= 65535) or not (0 <= right_duty <= 65535):
-        print("ERROR: PWM duty_cycle out of range!")
+        diag.log(MSG_OUT_OF_RANGE, left_duty, right_duty)
         return  # Prevent invalid PWM values
 
-    left_pwm.duty_cycle = left_duty
-    right_pwm.duty_cycle = right_duty
+    write_duty(left_duty, right_duty)
+
+@probe.timed("set_pwm_frequency")
+def set_pwm_frequency(frequency):
+    """Changes the PWM carrier frequency of both motor outputs without reinitializing them."""
+    global PWM_FREQUENCY
+    left_pwm.frequency = frequency
+    right_pwm.frequency = frequency
+    PWM_FREQUENCY = frequency
+    print(f"PWM frequency set to {frequency} Hz")
 
+@probe.timed("move_forward")
 def move_forward(speed):
     """Moves both motors forward at the given speed."""
     if not motors_enabled:
         return
-    left_dir.value = True
-    right_dir.value = True
+    left_dir.value = LEFT_FORWARD
+    right_dir.value = RIGHT_FORWARD
     set_speed(speed, speed)
 
+@probe.timed("move_reverse")
 def move_reverse(speed):
     """Moves both motors in reverse at the given speed."""
     if not motors_enabled:
         return
-    left_dir.value = False
-    right_dir.value = False
+    left_dir.value = not LEFT_FORWARD
+    right_dir.value = not RIGHT_FORWARD
     set_speed(speed, speed)
 
+@probe.timed("pivot_left")
 def pivot_left(speed):
     """Pivots left with controlled sensitivity."""
     if not motors_enabled:
         return
     pivot_speed = clamp(speed, 0, MAX_SPEED)
-    print(f"DEBUG: pivot_left called with pivot_speed={pivot_speed}")
-    left_dir.value = False
-    right_dir.value = True
+    diag.log(MSG_PIVOT, "pivot_left", pivot_speed)
+    left_dir.value = not LEFT_FORWARD
+    right_dir.value = RIGHT_FORWARD
     set_speed(pivot_speed, pivot_speed)
 
+@probe.timed("pivot_right")
 def pivot_right(speed):
     """Pivots right with controlled sensitivity."""
     if not motors_enabled:
         return
     pivot_speed = clamp(speed, 0, MAX_SPEED)
-    print(f"DEBUG: pivot_right called with pivot_speed={pivot_speed}")
-    left_dir.value = True
-    right_dir.value = False
+    diag.log(MSG_PIVOT, "pivot_right", pivot_speed)
+    left_dir.value = LEFT_FORWARD
+    right_dir.value = not RIGHT_FORWARD
     set_speed(pivot_speed, pivot_speed)
 
+@probe.timed("drive")
+def drive(left_speed, right_speed):
+    """
+    Drives each wheel at a signed speed (-MAX_SPEED to MAX_SPEED, positive is
+    forward) immediately, without ramping or printing. Meant for continuous
+    control loops that limit their own rate of change; callers should pass
+    through zero rather than flip a wheel's direction at speed.
+    """
+    if not motors_enabled:
+        return
+    left_dir.value = LEFT_FORWARD if left_speed >= 0 else not LEFT_FORWARD
+    right_dir.value = RIGHT_FORWARD if right_speed >= 0 else not RIGHT_FORWARD
+    write_duty(
+        int(min(abs(left_speed), MAX_SPEED)) * 65535 // MAX_SPEED,
+        int(min(abs(right_speed), MAX_SPEED)) * 65535 // MAX_SPEED,
+    )
+
+@probe.timed("ramp_speed")
+def ramp_speed(left_speed, right_speed):
+    """Ramps both motors from their current duty to the given speeds along the shared motion profile."""
+    left_start = left_command
+    right_start = right_command
+    left_delta = scale_speed(left_speed) - left_start
+    right_delta = scale_speed(right_speed) - right_start
+    steps = motion_profile.ramp_steps(max(abs(left_delta), abs(right_delta)), RAMP_DELAY)
+    if steps == 0:
+        return
+    steps = max(RAMP_STEPS, steps)
+    for step in range(1, steps + 1):
+        write_duty(
+            motion_profile.ramp_value(left_start, left_delta, step, steps),
+            motion_profile.ramp_value(right_start, right_delta, step, steps),
+        )
+        time.sleep(RAMP_DELAY)
+
+@probe.timed("stop")
 def stop():
     """Gradually stops the motors without engaging brakes."""
-    print("Stopping motors without braking")
-    for i in range(RAMP_STEPS, 0, -1):
-        left_pwm.duty_cycle = int(left_pwm.duty_cycle * (i / RAMP_STEPS))
-        right_pwm.duty_cycle = int(right_pwm.duty_cycle * (i / RAMP_STEPS))
-        time.sleep(RAMP_DELAY)
-    left_pwm.duty_cycle = 0
-    right_pwm.duty_cycle = 0
-    print("Motors stopped, but brakes are not engaged")
+    diag.log(MSG_STOPPING)
+    ramp_speed(0, 0)
+    write_duty(0, 0)
+    diag.log(MSG_STOPPED)
 
+@probe.timed("apply_brakes")
 def apply_brakes():
     """Explicitly engages brakes."""
+    if not drivers_armed and motors_enabled:
+        arm()  # The brake needs a powered bridge; the PWM outputs are at zero
     left_brake.value = True
     right_brake.value = True
-    print("Brakes engaged")
+    diag.log(MSG_BRAKES)
 
+def _brake_pulse(left_ms, right_ms):
+    """Brakes each wheel for its share of one BRAKE_PERIOD_MS and lets it coast for the rest."""
+    left_brake.value = left_ms > 0
+    right_brake.value = right_ms > 0
+    first = min(left_ms, right_ms)
+    last = max(left_ms, right_ms)
+    if first:
+        time.sleep(first / 1000)
+    if last > first:
+        if left_ms == first:
+            left_brake.value = False
+        else:
+            right_brake.value = False
+        time.sleep((last - first) / 1000)
+    left_brake.value = False
+    right_brake.value = False
+    if last < BRAKE_PERIOD_MS:
+        time.sleep((BRAKE_PERIOD_MS - last) / 1000)
+
+def _brake_share(planned, measured):
+    """Milliseconds of brake per period for a wheel planned at planned rpm and measured at measured rpm (None if unknown)."""
+    if measured is None:
+        decel = BRAKE_DECEL if planned > 0 else 0
+    else:
+        decel = BRAKE_DECEL + BRAKE_GAIN * (measured - max(0, planned))
+    return clamp(decel * BRAKE_PERIOD_MS // BRAKE_FULL_DECEL, 0, BRAKE_PERIOD_MS)
+
+@probe.timed("brake_stop")
+def brake_stop(counters=None):
+    """
+    Brakes both wheels to a stop at about BRAKE_DECEL rpm/s by modulating the
+    BRAKE pins, then holds the brakes. Without counters the stop is planned
+    open loop from the speed the last duty commands (WHEEL_MAX_RPM at full
+    duty). counters is a (left, right) pair of countio.Counter objects on the
+    SPEED pins: the measured speed then corrects each wheel's brake share
+    toward the planned speed, and the stop ends when both wheels stand still.
+    """
+    if BRAKE_DECEL >= BRAKE_FULL_DECEL or not motors_enabled:
+        write_duty(0, 0)
+        apply_brakes()
+        return
+    diag.log(MSG_BRAKE_STOP, BRAKE_DECEL)
+    left_plan = left_command * WHEEL_MAX_RPM // 65535
+    right_plan = right_command * WHEEL_MAX_RPM // 65535
+    write_duty(0, 0)
+    if not drivers_armed:
+        arm()  # The brake needs a powered bridge
+    step = max(1, BRAKE_DECEL * BRAKE_PERIOD_MS // 1000)  # Planned speed drop per period
+    lag = step * BRAKE_WINDOW // 2  # Speed lost since the middle of a measurement window
+    window = BRAKE_WINDOW * BRAKE_PERIOD_MS * PULSES_PER_REV  # rpm = pulses in the window * 60000 // window
+    history = [(counters[0].count, counters[1].count)] if counters else None
+    anchored = False
+    # Bounded in case the wheels turn faster than planned or the feedback stalls.
+    for _ in range(2 * max(left_plan, right_plan) // step + 4 * BRAKE_WINDOW):
+        if history is not None and len(history) > BRAKE_WINDOW:
+            oldest = history.pop(0)
+            left_pulses = history[-1][0] - oldest[0]
+            right_pulses = history[-1][1] - oldest[1]
+            if left_pulses == 0 and right_pulses == 0:
+                break
+            left_measured = max(0, left_pulses * 60000 // window - lag)
+            right_measured = max(0, right_pulses * 60000 // window - lag)
+            if not anchored:
+                # The first measurement replaces the duty-based estimate of a slower wheel.
+                left_plan = min(left_plan, left_measured)
+                right_plan = min(right_plan, right_measured)
+                anchored = True
+            left_ms = _brake_share(left_plan, left_measured) if left_pulses else 0
+            right_ms = _brake_share(right_plan, right_measured) if right_pulses else 0
+        elif history is None and left_plan <= 0 and right_plan <= 0:
+            break
+        else:
+            left_ms = _brake_share(left_plan, None)
+            right_ms = _brake_share(right_plan, None)
+        _brake_pulse(left_ms, right_ms)
+        safety.feed()  # Slow decelerations brake for longer than the watchdog timeout
+        if history is not None:
+            history.append((counters[0].count, counters[1].count))
+        left_plan -= step
+        right_plan -= step
+    apply_brakes()
+
+@probe.timed("release_brakes")
 def release_brakes():
     """Disengages brakes."""
     left_brake.value = False
     right_brake.value = False
-    print("Brakes released")
+    diag.log(MSG_RELEASED)
 
+@probe.timed("enable_motors")
 def enable_motors(enable):
-    """Enables or disables motor power."""
+    """
+    Enables or disables motor power. Disabling switches the drivers off at
+    once, so the wheels coast; enabling leaves them parked until the next
+    non-zero duty arms them.
+    """
     global motors_enabled
+    if enable and undervoltage:
+        print("Motors stay disabled: battery undervoltage")
+        return
     motors_enabled = enable
     if not enable:
-        stop()
+        park()
+        write_duty(0, 0)
     print(f"Motors enabled: {motors_enabled}")
+
+def undervoltage_cutoff():
+    """
+    Ramps the motors down along the motion profile, then switches the drivers
+    off and keeps the motors disabled until clear_undervoltage().
+    """
+    global undervoltage
+    if undervoltage:
+        return
+    undervoltage = True
+    print("Battery undervoltage: stopping motors")
+    stop()  # Cutting the drivers at speed would let the robot coast an unknown distance
+    enable_motors(False)
+
+def clear_undervoltage():
+    """Allows enable_motors(True) again after an undervoltage cutoff."""
+    global undervoltage
+    undervoltage = False
@@ -0,0 +1,204 @@
+"""
+composer.py
+-----------
+Runs several projects concurrently under asyncio (lib/asyncio), for code.py.
+
+A composable project defines an async main() and only starts its loop at
+import when it runs alone:
+
+    async def main():
+        while True:
+            ...one iteration...
+            await asyncio.sleep(0.02)
+
+    if not composer.COMPOSED:
+        run()  # The stand-alone loop
+
+A project without a stand-alone loop (status_led) returns from its import;
+code.py then runs its main() through the composer on its own.
+
+code.py composes when config.json has a "projects" list, given as names or
+as {"name": ..., "priority": ...} objects (priority defaults to 1):
+
+    "projects": [{"name": "robot_receiver", "priority": 3}, "status_led"]
+
+Each main() runs as its own task, wrapped in a generator that times every
+step the project takes between awaits. asyncio runs ready tasks in the order
+they became ready, whatever their priority; priorities only set each
+project's share of the CPU, priority / sum of priorities. Shares are only
+enforced under contention: when the projects together kept the CPU busy for
+more than CONTENTION_PERCENT of the current window, a project that used more
+than its share is held back for its overuse (at most MAX_DELAY_MS) before its
+next step, so a busy telemetry loop can't starve the control loop. With
+spare CPU nobody is delayed.
+
+Asyncio scheduling is cooperative: a project that blocks (time.sleep, a long
+ramp) stalls the others for as long, which shows up as its step time in the
+"tasks" console command next to each project's CPU share.
+"""
+
+import time
+import serial_console as console
+
+COMPOSED = False  # Set by code.py before it imports the composed projects
+WINDOW_MS = 1000  # CPU share measurement window
+CONTENTION_PERCENT = 80  # Window busy level above which shares are enforced
+MAX_DELAY_MS = 100  # Longest hold-back per step
+
+failed = None  # Name of the project whose task raised, for code.py's fault report
+
+_projects = []
+_window_start_us = 0
+_window_busy_us = 0  # Step time of all projects in the current window
+_last_busy_permille = 0
+
+
+def _now_us():
+    return time.monotonic_ns() // 1000
+
+
+class Project:
+    """One composed project and its CPU accounting."""
+
+    def __init__(self, name, priority=1):
+        self.name = name
+        self.priority = max(1, int(priority))
+        self.share_permille = 1000  # Set once every project is known
+        self.module = None
+        self.steps = 0
+        self.max_step_us = 0
+        self.window_us = 0
+        self.total_us = 0
+        self.last_permille = 0  # CPU share in the last complete window
+        self.delays = 0
+        self.delayed_ms = 0
+
+
+def parse(entries):
+    """Turns the config "projects" list into Projects, highest priority first."""
+    projects = []
+    for entry in entries:
+        if isinstance(entry, str):
+            projects.append(Project(entry))
+        else:
+            projects.append(Project(entry["name"], entry.get("priority", 1)))
+    projects.sort(key=lambda project: -project.priority)
+    total = sum(project.priority for project in projects)
+    for project in projects:
+        project.share_permille = project.priority * 1000 // total
+    return projects
+
+
+def _hold_back(project):
+    """Returns the ms to delay the project's next step, 0 unless the CPU is contended and it is over its share."""
+    window = _now_us() - _window_start_us
+    if window <= 0 or _window_busy_us * 100 <= window * CONTENTION_PERCENT:
+        return 0
+    over_us = project.window_us - window * project.share_permille // 1000
+    return min(MAX_DELAY_MS, over_us // 1000) if over_us > 1000 else 0
+
+
+def _metered(project, coro, asyncio):
+    """Drives coro step by step, timing each step and holding it back when over its share."""
+    global failed, _window_busy_us
+    value = None
+    error = None
+    while True:
+        # The task is running now, so it may sleep; after coro.send() it is
+        # already queued for whatever it awaits and must not be queued twice.
+        delay = _hold_back(project) if error is None else 0
+        if delay:
+            project.delays += 1
+            project.delayed_ms += delay
+            try:
+                yield from asyncio.sleep_ms(delay)
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:  # Cancelled while held back
+                error = e
+
+        start = _now_us()
+        try:
+            if error is None:
+                awaited = coro.send(value)
+            else:
+                awaited = coro.throw(error)
+        except StopIteration as e:
+            return e.value
+        except Exception:
+            failed = project.name
+            raise
+        finally:
+            elapsed = _now_us() - start
+            project.steps += 1
+            project.window_us += elapsed
+            project.total_us += elapsed
+            _window_busy_us += elapsed
+            if elapsed > project.max_step_us:
+                project.max_step_us = elapsed
+
+        value = None
+        error = None
+        try:
+            value = yield awaited
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:  # Cancellation: pass it on to the project
+            error = e
+
+
+async def _roll_windows(asyncio):
+    """Closes a CPU accounting window every WINDOW_MS."""
+    global _window_start_us, _window_busy_us, _last_busy_permille
+    while True:
+        await asyncio.sleep_ms(WINDOW_MS)
+        now = _now_us()
+        window = max(1, now - _window_start_us)
+        for project in _projects:
+            project.last_permille = project.window_us * 1000 // window
+            project.window_us = 0
+        _last_busy_permille = _window_busy_us * 1000 // window
+        _window_busy_us = 0
+        _window_start_us = now
+
+
+def report(*args):
+    """Prints each composed project's CPU share and step statistics."""
+    print(f"Tasks: busy {_last_busy_permille / 10:.1f}% of the last {WINDOW_MS} ms window")
+    for project in _projects:
+        print(
+            f"  {project.name}: priority={project.priority} share={project.share_permille / 10:.1f}%"
+            f" cpu={project.last_permille / 10:.1f}% steps={project.steps}"
+            f" max_step_ms={project.max_step_us / 1000:.1f} delays={project.delays} delayed_ms={project.delayed_ms}"
+        )
+
+
+def load(projects):
+    """Imports the projects; raises ImportError for one without an async main()."""
+    global COMPOSED
+    COMPOSED = True
+    for project in projects:
+        project.module = __import__(project.name)
+        if not hasattr(project.module, "main"):
+            raise ImportError(f"{project.name} has no async main() and can't be composed")
+
+
+def run(projects):
+    """Runs the loaded projects' main() tasks until one of them raises."""
+    global _window_start_us
+    import asyncio
+
+    _projects[:] = projects
+    console.register("tasks", report, "CPU share and step times of composed projects")
+
+    async def compose():
+        tasks = [asyncio.create_task(_metered(project, project.module.main(), asyncio)) for project in projects]
+        asyncio.create_task(_roll_windows(asyncio))
+        await asyncio.gather(*tasks)
+
+    names = ", ".join(f"{project.name} ({project.priority})" for project in projects)
+    print(f"Composing {names}")
+    _window_start_us = _now_us()
+    asyncio.run(compose())
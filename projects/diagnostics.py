@@ -0,0 +1,223 @@
+"""
+diagnostics.py
+--------------
+Shared diagnostic messages for the projects and the motor library, in place
+of per-project debug_print() helpers and unconditional prints on hot paths.
+
+A message site is declared once, at import, with its level and rate limit:
+
+    import diagnostics as diag
+    FORWARD = diag.site("Moving forward at speed %d", diag.INFO, 250)
+
+and logged with its arguments:
+
+    diag.log(FORWARD, drive_speed)
+
+log() formats nothing itself. A site above the current level, or any site
+with the sink off, returns after one comparison. A site logged again within
+its interval_ms is counted instead of shown, and the same arguments again
+within REPEAT_MS are counted as repeats, so a message in a 50 Hz loop costs
+one line per interval plus a count:
+
+    Moving forward at speed 41000 [3 repeats, 12 rate-limited]
+
+The format is a %-format string, or a function taking the arguments and
+returning the text, for messages whose arguments are expensive to turn into
+text (the receiver's MAC address).
+
+Sinks:
+
+  serial  prints the line, at most SERIAL_LINES_PER_S lines a second
+          overall; lines beyond that are dropped and counted, so a burst of
+          messages can't make USB serial output the loop's bottleneck
+  ram     keeps the last RAM_ENTRIES messages unformatted in a ring;
+          "diag dump" formats and prints them
+  off     nothing is kept
+
+The level and sink start from the "diagnostics" object in config.json, e.g.
+{"level": 2, "sink": "ram"}, and change at runtime with the "diag" console
+command. Levels: ERROR (0), INFO (1, the default), DEBUG (2).
+"""
+
+from array import array
+from adafruit_ticks import ticks_ms, ticks_diff
+import robot_config
+import serial_console as console
+
+ERROR = 0
+INFO = 1
+DEBUG = 2
+LEVEL_NAMES = ("error", "info", "debug")
+
+SINK_OFF = 0
+SINK_SERIAL = 1
+SINK_RAM = 2
+SINK_NAMES = ("off", "serial", "ram")
+
+REPEAT_MS = 2000  # Identical messages from a site are shown at most this often
+SERIAL_LINES_PER_S = 20  # Serial sink budget across all sites
+RAM_ENTRIES = 64  # Messages kept by the RAM sink
+
+# Counters, indices into counters.
+LOGGED = 0  # Lines shown or stored
+REPEATED = 1  # Identical messages folded into a repeat count
+LIMITED = 2  # Messages held back by their site's rate limit
+DROPPED = 3  # Lines over the serial budget
+counters = array("l", [0] * 4)
+
+CONFIG = robot_config.get("diagnostics", {})
+level = CONFIG.get("level", INFO)
+if level not in (ERROR, INFO, DEBUG):
+    print(f"Unknown diagnostics level {level!r}, using info")
+    level = INFO
+if CONFIG.get("sink", "serial") in SINK_NAMES:
+    sink = SINK_NAMES.index(CONFIG.get("sink", "serial"))
+else:
+    # A typo here must not stop every project that imports diagnostics.
+    print(f"Unknown diagnostics sink {CONFIG['sink']!r}, using serial")
+    sink = SINK_SERIAL
+
+_sites = []
+_ram = [None] * RAM_ENTRIES  # (ticks_ms, site, args, repeats, limited) per stored message
+_ram_next = 0
+_budget = SERIAL_LINES_PER_S
+_budget_ms = ticks_ms()
+
+
+class Site:
+    """One message site: its format, level, rate limit and pending counts."""
+
+    def __init__(self, fmt, msg_level, interval_ms):
+        self.fmt = fmt
+        self.level = msg_level
+        self.interval_ms = interval_ms
+        self.last_ms = 0
+        self.last_args = None
+        self.shown = 0
+        self.repeats = 0  # Pending, reported with the next line from this site
+        self.limited = 0
+
+
+def site(fmt, msg_level=INFO, interval_ms=0):
+    """Declares a message site; interval_ms is the shortest time between two of its lines."""
+    entry = Site(fmt, msg_level, interval_ms)
+    _sites.append(entry)
+    return entry
+
+
+def enabled(msg_level):
+    """True when messages at msg_level would be kept, for work done only to produce them."""
+    return msg_level <= level and sink != SINK_OFF
+
+
+def log(entry, *args):
+    """Logs a message from a site, subject to the level, its rate limit and repeat folding."""
+    if entry.level > level or sink == SINK_OFF:
+        return
+    now = ticks_ms()
+    if entry.shown:
+        same = args == entry.last_args
+        if ticks_diff(now, entry.last_ms) < (REPEAT_MS if same and REPEAT_MS > entry.interval_ms else entry.interval_ms):
+            if same:
+                entry.repeats += 1
+                counters[REPEATED] += 1
+            else:
+                entry.limited += 1
+                counters[LIMITED] += 1
+            return
+    entry.last_ms = now
+    entry.last_args = args
+    entry.shown += 1
+    repeats = entry.repeats
+    limited = entry.limited
+    entry.repeats = entry.limited = 0
+    if sink == SINK_RAM:
+        global _ram_next
+        _ram[_ram_next] = (now, entry, args, repeats, limited)
+        _ram_next = (_ram_next + 1) % RAM_ENTRIES
+        counters[LOGGED] += 1
+    elif _take_budget(now):
+        counters[LOGGED] += 1
+        print(format_message(entry, args, repeats, limited))
+    else:
+        counters[DROPPED] += 1
+
+
+def _take_budget(now):
+    global _budget, _budget_ms
+    if ticks_diff(now, _budget_ms) >= 1000:
+        _budget = SERIAL_LINES_PER_S
+        _budget_ms = now
+    if _budget <= 0:
+        return False
+    _budget -= 1
+    return True
+
+
+def format_message(entry, args, repeats=0, limited=0):
+    """Formats a site's message and its pending counts into one line."""
+    fmt = entry.fmt
+    if isinstance(fmt, str):
+        text = fmt % args if args else fmt
+    else:
+        text = fmt(*args)
+    if repeats or limited:
+        counts = []
+        if repeats:
+            counts.append(f"{repeats} repeats")
+        if limited:
+            counts.append(f"{limited} rate-limited")
+        text += f" [{', '.join(counts)}]"
+    return text
+
+
+def dump():
+    """Prints the RAM sink's messages, oldest first."""
+    now = ticks_ms()
+    for i in range(RAM_ENTRIES):
+        stored = _ram[(_ram_next + i) % RAM_ENTRIES]
+        if stored is not None:
+            stamp, entry, args, repeats, limited = stored
+            print(f"{ticks_diff(stamp, now)} ms: {format_message(entry, args, repeats, limited)}")
+
+
+def clear():
+    """Empties the RAM sink and resets the counters."""
+    global _ram_next
+    for i in range(RAM_ENTRIES):
+        _ram[i] = None
+    _ram_next = 0
+    for i in range(len(counters)):
+        counters[i] = 0
+
+
+def report():
+    """Prints the level, sink and message counters."""
+    print(
+        f"Diagnostics: level={LEVEL_NAMES[level]} sink={SINK_NAMES[sink]} sites={len(_sites)}"
+        f" logged={counters[LOGGED]} repeated={counters[REPEATED]} rate_limited={counters[LIMITED]}"
+        f" dropped={counters[DROPPED]}"
+    )
+
+
+def command(*args):
+    """Console: "diag", "diag level 0-2", "diag sink off|serial|ram", "diag dump", "diag clear"."""
+    global level, sink
+    if not args:
+        report()
+    elif args[0] == "level" and len(args) > 1:
+        level = max(ERROR, min(DEBUG, int(args[1])))
+        print(f"Diagnostics level: {LEVEL_NAMES[level]}")
+    elif args[0] == "sink" and len(args) > 1:
+        sink = SINK_NAMES.index(args[1])
+        print(f"Diagnostics sink: {SINK_NAMES[sink]}")
+    elif args[0] == "dump":
+        dump()
+    elif args[0] == "clear":
+        clear()
+        print("Diagnostics cleared")
+    else:
+        print("Usage: diag [level 0-2 | sink off|serial|ram | dump | clear]")
+
+
+console.register("diag", command, "diagnostics level, sink and counters ('diag dump' prints the RAM sink)")
@@ -0,0 +1,105 @@
+"""
+drive_state.py
+--------------
+Table-driven drive state machine for the receiver.
+
+The drive is always in exactly one integer state. Each state has an entry
+and an exit action; the transition table is built once at start-up, holding
+for every (from, to) pair the tuple of actions to run: the exit action of the
+old state followed by the entry action of the new one. A frame that asks for
+the state the drive is already in runs nothing, so every motor-library call
+tied to a state change (brakes, enable, stop) is made exactly once per real
+transition.
+
+target() maps one frame's inputs to the wanted state. The machine counts
+every transition by (from, to) pair and accumulates milliseconds spent in
+each state; report() prints both.
+"""
+
+from array import array
+from adafruit_ticks import ticks_ms, ticks_diff
+
+DISABLED = 0
+STOPPED = 1
+FORWARD = 2
+REVERSE = 3
+PIVOT_LEFT = 4
+PIVOT_RIGHT = 5
+BRAKED = 6
+NUM_STATES = 7
+
+STATE_NAMES = ("disabled", "stopped", "forward", "reverse", "pivot_left", "pivot_right", "braked")
+RESTING = (DISABLED, STOPPED, BRAKED)  # States with the wheels not driven
+
+# Drive state for each input_filter mode (MODE_NEUTRAL ... MODE_PIVOT_RIGHT), indexed by mode.
+_MODE_STATES = (STOPPED, FORWARD, REVERSE, PIVOT_LEFT, PIVOT_RIGHT)
+
+
+def target(mode, brake, enable):
+    """Returns the state wanted by a frame: brake wins, then enable, then the drive mode."""
+    if brake:
+        return BRAKED
+    if not enable:
+        return DISABLED
+    return _MODE_STATES[mode]
+
+
+def build_table(entry, exit):
+    """Returns the flat transition table: index from * NUM_STATES + to holds the actions to run."""
+    table = []
+    for old in range(NUM_STATES):
+        for new in range(NUM_STATES):
+            actions = ()
+            if old != new:
+                actions = tuple(action for action in (exit[old], entry[new]) if action is not None)
+            table.append(actions)
+    return tuple(table)
+
+
+class DriveStateMachine:
+    """Runs entry/exit actions on state changes and keeps transition statistics."""
+
+    def __init__(self, entry, exit, initial=STOPPED):
+        """entry and exit are NUM_STATES-long sequences of callables (or None)."""
+        self.table = build_table(entry, exit)
+        self.state = initial
+        self._entered = ticks_ms()
+        self.counts = array("L", [0] * (NUM_STATES * NUM_STATES))  # Index from * NUM_STATES + to
+        self.time_in_state = array("L", [0] * NUM_STATES)  # Milliseconds, excluding the current stay
+
+    def transition(self, new):
+        """Moves to state new, running its transition actions. Returns True if the state changed."""
+        old = self.state
+        if new == old:
+            return False
+        index = old * NUM_STATES + new
+        now = ticks_ms()
+        self.time_in_state[old] += ticks_diff(now, self._entered)
+        self._entered = now
+        self.counts[index] += 1
+        self.state = new  # Set first so actions see the state being entered
+        for action in self.table[index]:
+            action()
+        return True
+
+    def reset(self):
+        """Clears the transition counts and time-in-state."""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        for i in range(NUM_STATES):
+            self.time_in_state[i] = 0
+        self._entered = ticks_ms()
+
+    def report(self):
+        """Prints time-in-state and the non-zero transition counts."""
+        current = ticks_diff(ticks_ms(), self._entered)
+        print(f"Drive: state={STATE_NAMES[self.state]} for {current} ms")
+        for state in range(NUM_STATES):
+            total = self.time_in_state[state] + (current if state == self.state else 0)
+            print(f"  {STATE_NAMES[state]:<11} {total} ms")
+        for index in range(NUM_STATES * NUM_STATES):
+            count = self.counts[index]
+            if count:
+                old, new = divmod(index, NUM_STATES)
+                print(f"  {STATE_NAMES[old]} -> {STATE_NAMES[new]}: {count}")
+
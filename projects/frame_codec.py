@@ -0,0 +1,54 @@
+"""
+frame_codec.py
+--------------
+Per-frame helpers shared by the receiver and the controller: MAC address
+conversion, parsing of the "x,y,c,z[,seq]" control frame and joystick
+scaling.
+
+They run on every received frame, so they live in one module that
+host/bench.py can time and measure for allocations without starting a
+project.
+"""
+
+CENTER = 128  # Joystick axis at rest
+SEQ_MODULUS = 32768  # Frame sequence numbers wrap to 0 here
+
+
+def mac_to_bytes(mac_str):
+    """Converts "AA:BB:CC:DD:EE:FF" to the 6-byte address."""
+    return bytes([int(b, 16) for b in mac_str.split(":")])
+
+
+def format_mac(mac):
+    """Formats a 6-byte address as "AA:BB:CC:DD:EE:FF"."""
+    return ":".join("{:02X}".format(b) for b in mac)
+
+
+def parse_control(data_str):
+    """Parses an "x,y,c,z" or "x,y,c,z,seq" control frame.
+
+    Returns (x, y, c, z, seq) as ints, seq -1 when absent, or None if malformed.
+    """
+    parts = data_str.split(",")
+    if len(parts) == 4:
+        seq = -1
+    elif len(parts) == 5:
+        try:
+            seq = int(parts.pop())
+        except ValueError:
+            return None
+        if not 0 <= seq < SEQ_MODULUS:
+            return None
+    else:
+        return None
+    try:
+        x, y, c, z = map(int, parts)
+    except ValueError:
+        return None
+    return x, y, c, z, seq
+
+
+def joystick_speed(axis):
+    """Scales a joystick axis' distance from center to a 16-bit duty (0-65535)."""
+    fraction = abs(axis - CENTER) / 127.0
+    return min(65535, int(fraction * 65535))
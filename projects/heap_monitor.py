@@ -0,0 +1,184 @@
+"""
+heap_monitor.py
+---------------
+Heap and garbage-collection instrumentation for control loops.
+
+Usage in a loop:
+
+    import heap_monitor as heap
+    PARSE = heap.section("parse")
+
+    while True:
+        heap.loop_tick()                 # once per iteration
+        heap.begin(PARSE)
+        ...parse the packet...
+        heap.end()
+        ...update the motors...
+        heap.idle_collect(20)            # 20 ms to spare before the next tick
+
+begin()/end() record the bytes allocated inside a section. When gc.mem_free()
+goes up across a section without an explicit collect, an automatic collection
+ran inside it; the section's duration is recorded as that pause. idle_collect()
+runs gc.collect() only when enough has been allocated since the last collection
+and the caller has more spare time than the worst pause seen so far, so
+collections happen between ticks instead of in the middle of a ramp or brake.
+
+Counters live in preallocated integer arrays and timing uses adafruit_ticks
+millisecond ticks (small ints), so the probes themselves do not allocate.
+
+The monitor is off unless "heap_monitor" is true in config.json. When off,
+every call returns immediately and idle_collect() never collects, leaving
+collections to the VM.
+"""
+
+import gc
+from array import array
+from adafruit_ticks import ticks_ms, ticks_diff
+import robot_config
+
+ENABLED = bool(robot_config.get("heap_monitor", False))
+MAX_SECTIONS = 8
+COLLECT_AFTER_BYTES = 16 * 1024  # Allocation since the last collection that makes idle_collect() run
+MIN_PAUSE_BUDGET_MS = 2  # Spare time idle_collect() needs before it has measured a pause
+PAUSE_MARGIN_MS = 2  # Added to the worst measured pause when deciding if a collect fits
+
+# Per-section statistics, indexed by the id returned from section().
+_names = []
+_calls = array("L", [0] * MAX_SECTIONS)
+_alloc_total = array("L", [0] * MAX_SECTIONS)
+_alloc_max = array("L", [0] * MAX_SECTIONS)
+_auto_gcs = array("L", [0] * MAX_SECTIONS)
+_auto_pause_max = array("L", [0] * MAX_SECTIONS)
+
+# Current section.
+_section = -1
+_section_free = 0
+_section_start = 0
+
+# Loop-level statistics.
+_loop_free = 0
+_loops = 0
+_loop_alloc_max = 0
+_loop_auto_gcs = 0
+_free_min = 0
+_free_after_collect = 0
+
+# Idle collection statistics.
+_idle_collects = 0
+_pause_max = 0
+_pause_total = 0
+
+
+def section(name):
+    """Registers a named code section and returns its id for begin()."""
+    if len(_names) >= MAX_SECTIONS:
+        raise ValueError("Too many heap_monitor sections")
+    _names.append(name)
+    return len(_names) - 1
+
+
+def begin(section_id):
+    """Marks the start of a section, ending the previous one if it is still open."""
+    global _section, _section_free, _section_start
+    if not ENABLED:
+        return
+    if _section >= 0:
+        end()
+    _section = section_id
+    _section_start = ticks_ms()
+    _section_free = gc.mem_free()
+
+
+def end():
+    """Marks the end of the current section and records its allocations."""
+    global _section
+    if not ENABLED or _section < 0:
+        return
+    free = gc.mem_free()
+    sid = _section
+    _section = -1
+    _calls[sid] += 1
+    used = _section_free - free
+    if used >= 0:
+        _alloc_total[sid] += used
+        if used > _alloc_max[sid]:
+            _alloc_max[sid] = used
+    else:
+        # The heap grew back: an automatic collection paused this section.
+        _auto_gcs[sid] += 1
+        pause = ticks_diff(ticks_ms(), _section_start)
+        if pause > _auto_pause_max[sid]:
+            _auto_pause_max[sid] = pause
+
+
+def loop_tick():
+    """Samples the free heap once per loop iteration, ending any section left open by a `continue`."""
+    global _loop_free, _loops, _loop_alloc_max, _loop_auto_gcs, _free_min
+    if not ENABLED:
+        return
+    if _section >= 0:
+        end()
+    free = gc.mem_free()
+    if _loops:
+        used = _loop_free - free
+        if used > _loop_alloc_max:
+            _loop_alloc_max = used
+        elif used < 0:
+            _loop_auto_gcs += 1
+    if free < _free_min or not _loops:
+        _free_min = free
+    _loop_free = free
+    _loops += 1
+
+
+def idle_collect(spare_ms):
+    """
+    Collects garbage if at least COLLECT_AFTER_BYTES were allocated since the
+    last collection and `spare_ms` covers the worst pause measured so far.
+    Returns True if a collection ran.
+    """
+    global _idle_collects, _pause_max, _pause_total, _free_after_collect, _loop_free
+    if not ENABLED:
+        return False
+    free = gc.mem_free()
+    if _free_after_collect - free < COLLECT_AFTER_BYTES and _free_after_collect:
+        return False
+    budget = _pause_max + PAUSE_MARGIN_MS if _idle_collects else MIN_PAUSE_BUDGET_MS
+    if spare_ms < budget:
+        return False
+    start = ticks_ms()
+    gc.collect()
+    pause = ticks_diff(ticks_ms(), start)
+    _idle_collects += 1
+    _pause_total += pause
+    if pause > _pause_max:
+        _pause_max = pause
+    _free_after_collect = gc.mem_free()
+    _loop_free = _free_after_collect  # Don't count this collection as an automatic one
+    return True
+
+
+def reset():
+    """Clears all statistics, keeping the registered sections."""
+    global _loops, _loop_alloc_max, _loop_auto_gcs, _idle_collects, _pause_max, _pause_total
+    for i in range(MAX_SECTIONS):
+        _calls[i] = _alloc_total[i] = _alloc_max[i] = _auto_gcs[i] = _auto_pause_max[i] = 0
+    _loops = _loop_alloc_max = _loop_auto_gcs = 0
+    _idle_collects = _pause_max = _pause_total = 0
+
+
+def report():
+    """Prints heap statistics with the sections that allocate most listed first."""
+    if not ENABLED:
+        print(f"Heap: free={gc.mem_free()}; heap monitor disabled (set \"heap_monitor\": true in config.json)")
+        return
+    print(f"Heap: free={gc.mem_free()} min_free={_free_min} loops={_loops} max_alloc_per_loop={_loop_alloc_max}")
+    average = _pause_total // _idle_collects if _idle_collects else 0
+    print(f"GC: idle_collects={_idle_collects} pause_max_ms={_pause_max} pause_avg_ms={average} auto_gcs_in_loop={_loop_auto_gcs}")
+    order = sorted(range(len(_names)), key=lambda i: _alloc_total[i], reverse=True)
+    for i in order:
+        per_call = _alloc_total[i] // _calls[i] if _calls[i] else 0
+        print(
+            f"  {_names[i]:<12} calls={_calls[i]} bytes/call={per_call} max={_alloc_max[i]}"
+            f" auto_gcs={_auto_gcs[i]} auto_pause_max_ms={_auto_pause_max[i]}"
+        )
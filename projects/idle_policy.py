@@ -0,0 +1,121 @@
+"""
+idle_policy.py
+--------------
+Idle power-saving policy shared by the receiver and the controller.
+
+A loop reports activity() whenever something meaningful happens and calls
+wait() instead of time.sleep() between iterations. The policy walks through
+three states as the quiet period grows:
+
+  ACTIVE  sleeps active_period between iterations (full loop rate).
+  SLOW    after slow_after seconds of quiet: sleeps slow_period instead.
+          The radio stays on, so queued ESP-NOW frames are read on the
+          next iteration.
+  SLEEP   after sleep_after seconds of quiet: enters light sleep until a
+          TimeAlarm sleep_period later (or any PinAlarm given), which bounds
+          the resume latency to sleep_period plus the wake-up time.
+
+Any activity() returns to ACTIVE immediately. The policy measures how late
+each light-sleep wake-up is against its alarm, and, when the caller passes
+the event's timestamp (e.g. ESPNowPacket.time), how long that event waited
+before the loop noticed it.
+"""
+
+import time
+import alarm
+from adafruit_ticks import ticks_ms, ticks_diff
+
+ACTIVE = 0
+SLOW = 1
+SLEEP = 2
+STATE_NAMES = ("active", "slow", "sleep")
+
+
+class IdlePolicy:
+    """Lowers a loop's rate and then light-sleeps it after a quiet period."""
+
+    def __init__(
+        self,
+        active_period=0.02,
+        slow_after=10,
+        slow_period=0.25,
+        sleep_after=60,
+        sleep_period=0.5,
+        light_sleep=True,
+        pin_alarms=(),
+    ):
+        self.active_period = active_period
+        self.slow_after_ms = int(slow_after * 1000)
+        self.slow_period = slow_period
+        self.sleep_after_ms = int(sleep_after * 1000)
+        self.sleep_period = sleep_period
+        self.light_sleep = light_sleep
+        self.pin_alarms = pin_alarms
+        self.state = ACTIVE
+        self._last_activity = ticks_ms()
+
+        # Statistics.
+        self.sleeps = 0
+        self.wake_late_max_ms = 0
+        self.resumes = 0
+        self.resume_max_ms = 0
+        self.resume_total_ms = 0
+
+    def activity(self, event_ms=None):
+        """
+        Marks activity and returns to ACTIVE. event_ms is the ticks_ms time the
+        triggering event happened, used to measure resume latency.
+        """
+        self._last_activity = ticks_ms()
+        if self.state != ACTIVE:
+            if event_ms is not None:
+                latency = max(0, ticks_diff(self._last_activity, event_ms))
+                self.resumes += 1
+                self.resume_total_ms += latency
+                if latency > self.resume_max_ms:
+                    self.resume_max_ms = latency
+            self.state = ACTIVE
+
+    def update(self):
+        """Recomputes and returns the state from the time since the last activity."""
+        quiet = ticks_diff(ticks_ms(), self._last_activity)
+        if quiet >= self.sleep_after_ms:
+            self.state = SLEEP
+        elif quiet >= self.slow_after_ms:
+            self.state = SLOW
+        else:
+            self.state = ACTIVE
+        return self.state
+
+    def period(self):
+        """Returns the seconds to wait for the current state, for loops that can't light-sleep (asyncio tasks)."""
+        state = self.update()
+        if state == ACTIVE:
+            return self.active_period
+        if state == SLOW:
+            return self.slow_period
+        return self.sleep_period
+
+    def wait(self):
+        """Waits between loop iterations according to the current state."""
+        state = self.update()
+        if state == ACTIVE:
+            time.sleep(self.active_period)
+        elif state == SLOW or not self.light_sleep:
+            time.sleep(self.slow_period)
+        else:
+            wake_at = time.monotonic() + self.sleep_period
+            alarm.light_sleep_until_alarms(alarm.time.TimeAlarm(monotonic_time=wake_at), *self.pin_alarms)
+            late = int((time.monotonic() - wake_at) * 1000)
+            self.sleeps += 1
+            if late > self.wake_late_max_ms:
+                self.wake_late_max_ms = late
+
+    def report(self):
+        """Prints the idle state and resume latency statistics."""
+        average = self.resume_total_ms // self.resumes if self.resumes else 0
+        print(
+            f"Idle: state={STATE_NAMES[self.state]} light_sleeps={self.sleeps}"
+            f" wake_late_max_ms={self.wake_late_max_ms} resumes={self.resumes}"
+            f" resume_avg_ms={average} resume_max_ms={self.resume_max_ms}"
+        )
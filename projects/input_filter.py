@@ -0,0 +1,137 @@
+"""
+input_filter.py
+---------------
+Conditioning stage between the raw joystick axes and the drive decision.
+
+Three cheap stages keep a stick resting near the deadzone edge from flipping
+between drive, pivot and stop on consecutive frames:
+
+  1. A median-of-3 filter per axis drops single-frame spikes.
+  2. Per-axis hysteresis: an axis becomes active when it moves more than
+     `enter` from center and only goes inactive again below `exit`.
+  3. A minimum dwell: a new drive mode must persist for `dwell_ms` before it
+     is reported. A return to neutral is reported at once, so a released
+     stick always stops the robot the normal way instead of holding the old
+     mode at a speed that has already dropped to zero.
+
+The conditioner also classifies every raw frame with the plain single
+threshold the receiver used before and counts how many of those raw mode
+changes it suppressed, split by the stage that held them.
+"""
+
+from adafruit_ticks import ticks_ms, ticks_diff
+
+CENTER = 128
+
+MODE_NEUTRAL = 0
+MODE_FORWARD = 1
+MODE_REVERSE = 2
+MODE_PIVOT_LEFT = 3
+MODE_PIVOT_RIGHT = 4
+
+MODE_NAMES = ("neutral", "forward", "reverse", "pivot_left", "pivot_right")
+
+
+def classify(x, y, x_active, y_active):
+    """Returns the drive mode for the given axis values and activity flags."""
+    if y_active:
+        return MODE_FORWARD if y > CENTER else MODE_REVERSE
+    if x_active:
+        return MODE_PIVOT_LEFT if x < CENTER else MODE_PIVOT_RIGHT
+    return MODE_NEUTRAL
+
+
+class InputConditioner:
+    """Filters joystick axes and debounces drive mode changes."""
+
+    def __init__(self, threshold=10, hysteresis=6, dwell_ms=60):
+        self.configure(threshold, hysteresis, dwell_ms)
+        self._x = [CENTER, CENTER, CENTER]
+        self._y = [CENTER, CENTER, CENTER]
+        self._index = 0
+        self.x = CENTER  # Filtered axes
+        self.y = CENTER
+        self._x_active = False
+        self._y_active = False
+        self.mode = MODE_NEUTRAL
+        self._candidate = MODE_NEUTRAL
+        self._candidate_since = ticks_ms()
+        self._raw_mode = MODE_NEUTRAL
+
+        # Counters.
+        self.raw_transitions = 0  # Mode changes a plain threshold would have made
+        self.transitions = 0  # Mode changes actually reported
+        self.hysteresis_held = 0  # Raw changes absorbed by the filter and hysteresis bands
+        self.dwell_held = 0  # Candidate modes abandoned before the dwell time elapsed
+
+    def configure(self, threshold, hysteresis, dwell_ms):
+        """Sets the deadzone center, the total hysteresis band width and the dwell time."""
+        self.threshold = threshold
+        self.enter = threshold + hysteresis // 2
+        self.exit = max(0, threshold - hysteresis // 2)  # Below 0 an active axis could never go inactive
+        self.dwell_ms = dwell_ms
+
+    @staticmethod
+    def _median(a, b, c):
+        if a > b:
+            a, b = b, a
+        if b > c:
+            b = c
+        return a if a > b else b
+
+    def _axis_active(self, value, active):
+        offset = abs(value - CENTER)
+        return offset > self.exit if active else offset > self.enter
+
+    def update(self, raw_x, raw_y):
+        """Feeds one raw frame and returns the conditioned drive mode."""
+        i = self._index
+        self._x[i] = raw_x
+        self._y[i] = raw_y
+        self._index = (i + 1) % 3
+        self.x = self._median(self._x[0], self._x[1], self._x[2])
+        self.y = self._median(self._y[0], self._y[1], self._y[2])
+
+        raw_mode = classify(
+            raw_x, raw_y, abs(raw_x - CENTER) > self.threshold, abs(raw_y - CENTER) > self.threshold
+        )
+        raw_changed = raw_mode != self._raw_mode
+        self._raw_mode = raw_mode
+        if raw_changed:
+            self.raw_transitions += 1
+
+        self._x_active = self._axis_active(self.x, self._x_active)
+        self._y_active = self._axis_active(self.y, self._y_active)
+        wanted = classify(self.x, self.y, self._x_active, self._y_active)
+
+        now = ticks_ms()
+        if wanted == self.mode:
+            if self._candidate != self.mode:
+                self.dwell_held += 1  # The candidate reverted before it was accepted
+                self._candidate = self.mode
+            elif raw_changed:
+                self.hysteresis_held += 1
+            return self.mode
+
+        if wanted != self._candidate:
+            self._candidate = wanted
+            self._candidate_since = now
+        if wanted == MODE_NEUTRAL or ticks_diff(now, self._candidate_since) >= self.dwell_ms:
+            self.mode = wanted
+            self.transitions += 1
+        return self.mode
+
+    def reset(self):
+        """Drops the held mode, e.g. on braking, so a mode held from before must pass the dwell again."""
+        self.mode = MODE_NEUTRAL
+        self._candidate = MODE_NEUTRAL
+        self._candidate_since = ticks_ms()
+
+    def report(self):
+        """Prints the filter counters."""
+        suppressed = max(0, self.raw_transitions - self.transitions)
+        print(
+            f"Input: mode={MODE_NAMES[self.mode]} raw_transitions={self.raw_transitions}"
+            f" transitions={self.transitions} suppressed={suppressed}"
+            f" hysteresis_held={self.hysteresis_held} dwell_held={self.dwell_held}"
+        )
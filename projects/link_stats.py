@@ -0,0 +1,191 @@
+"""
+link_stats.py
+-------------
+Per-peer ESP-NOW link-quality accounting for the receiver.
+
+The controller appends a sequence number (0..SEQ_MODULUS-1, wrapping) to each
+control frame. Every received frame is passed to LinkStats.update() with its
+sequence number (-1 when the frame has none), ESPNowPacket.rssi and its
+arrival time, which updates fixed-size integer counters in constant time:
+
+  received     frames seen from the peer
+  lost         sequence numbers skipped (reduced again when a late one arrives)
+  gaps         times at least one sequence number was skipped
+  duplicates   frames whose sequence number was already seen
+  reordered    frames that arrived after a higher sequence number
+  resyncs      jumps too large to be loss, e.g. the sender restarted
+  interarrival mean and mean deviation of the time between frames (jitter),
+               and the longest silence
+  rssi         rolling average (1/RSSI_WEIGHT per frame), min and max dBm
+
+Duplicates and reordering are found with a bitmask of the last WINDOW
+sequence numbers below the highest one seen, so no per-frame history is
+kept. Averages are kept in fixed point (scaled by 16) so updating them
+never allocates.
+
+LinkTable keeps one LinkStats per sender MAC, up to MAX_PEERS, so a foreign
+device transmitting on the channel shows up next to the controller.
+"""
+
+from array import array
+from adafruit_ticks import ticks_diff
+from frame_codec import format_mac, SEQ_MODULUS
+
+MAX_PEERS = 4
+WINDOW = 30  # Sequence numbers tracked below the highest (fits a small int)
+MAX_GAP = 1024  # Larger forward jumps are a resync, not loss
+RSSI_WEIGHT = 16  # Rolling average weight: 1/16 of each new sample
+JITTER_WEIGHT = 16
+
+_HALF = SEQ_MODULUS // 2
+_WINDOW_MASK = (1 << WINDOW) - 1
+
+# Counter indices.
+RECEIVED = 0
+LOST = 1
+GAPS = 2
+DUPLICATES = 3
+REORDERED = 4
+RESYNCS = 5
+UNSEQUENCED = 6
+INTERVAL_Q4 = 7  # Mean interarrival ms * 16
+JITTER_Q4 = 8  # Mean |interarrival - mean| ms * 16
+INTERVAL_MAX = 9
+RSSI_Q4 = 10  # Rolling RSSI dBm * 16
+RSSI_MIN = 11
+RSSI_MAX = 12
+NUM_COUNTERS = 13
+
+
+class LinkStats:
+    """Constant-time sequence, timing and RSSI counters for one peer."""
+
+    def __init__(self, mac):
+        self.mac = mac
+        self.counters = array("l", [0] * NUM_COUNTERS)
+        self.reset()
+
+    def reset(self):
+        counters = self.counters
+        for i in range(NUM_COUNTERS):
+            counters[i] = 0
+        self._highest = -1  # Highest sequence number seen, -1 before the first
+        self._window = 0  # Bit k set: sequence number _highest - k was received
+        self._last_ms = None
+
+    def update(self, seq, rssi, arrival_ms):
+        """Accounts one received frame."""
+        counters = self.counters
+        counters[RECEIVED] += 1
+
+        if self._last_ms is not None:
+            interval = ticks_diff(arrival_ms, self._last_ms)
+            if interval > counters[INTERVAL_MAX]:
+                counters[INTERVAL_MAX] = interval
+            mean = counters[INTERVAL_Q4] or interval * 16  # Start from the first interval
+            deviation = abs(interval * 16 - mean)
+            counters[INTERVAL_Q4] = mean + (interval * 16 - mean) // JITTER_WEIGHT
+            counters[JITTER_Q4] += (deviation - counters[JITTER_Q4]) // JITTER_WEIGHT
+        self._last_ms = arrival_ms
+
+        if counters[RECEIVED] == 1:
+            counters[RSSI_Q4] = rssi * 16
+            counters[RSSI_MIN] = counters[RSSI_MAX] = rssi
+        else:
+            counters[RSSI_Q4] += (rssi * 16 - counters[RSSI_Q4]) // RSSI_WEIGHT
+            if rssi < counters[RSSI_MIN]:
+                counters[RSSI_MIN] = rssi
+            elif rssi > counters[RSSI_MAX]:
+                counters[RSSI_MAX] = rssi
+
+        if seq < 0:
+            counters[UNSEQUENCED] += 1
+            return
+        if self._highest < 0:
+            self._highest = seq
+            self._window = 1
+            return
+        ahead = (seq - self._highest) % SEQ_MODULUS
+        if ahead == 0:
+            counters[DUPLICATES] += 1
+        elif ahead < _HALF:
+            if ahead > MAX_GAP:
+                counters[RESYNCS] += 1
+                self._window = 1
+            else:
+                if ahead > 1:
+                    counters[LOST] += ahead - 1
+                    counters[GAPS] += 1
+                if ahead >= WINDOW:
+                    self._window = 1
+                else:
+                    self._window = ((self._window & (_WINDOW_MASK >> ahead)) << ahead) | 1
+            self._highest = seq
+        else:
+            behind = SEQ_MODULUS - ahead
+            if behind >= WINDOW:
+                counters[RESYNCS] += 1
+                self._highest = seq
+                self._window = 1
+            elif self._window & (1 << behind):
+                counters[DUPLICATES] += 1
+            else:
+                self._window |= 1 << behind
+                counters[REORDERED] += 1
+                if counters[LOST]:
+                    counters[LOST] -= 1
+
+    def loss_permille(self):
+        """Lost frames per thousand sent, from sequence numbers."""
+        counters = self.counters
+        sent = counters[RECEIVED] - counters[DUPLICATES] - counters[UNSEQUENCED] + counters[LOST]
+        return counters[LOST] * 1000 // sent if sent > 0 else 0
+
+    def report(self):
+        """Prints the peer's link statistics."""
+        c = self.counters
+        loss = self.loss_permille()
+        print(
+            f"Link {format_mac(self.mac)}: received={c[RECEIVED]} lost={c[LOST]} ({loss // 10}.{loss % 10}%)"
+            f" gaps={c[GAPS]} duplicates={c[DUPLICATES]} reordered={c[REORDERED]} resyncs={c[RESYNCS]}"
+            f" unsequenced={c[UNSEQUENCED]}"
+        )
+        if c[RECEIVED]:
+            print(
+                f"  interarrival mean {c[INTERVAL_Q4] / 16:.1f} ms jitter {c[JITTER_Q4] / 16:.1f} ms"
+                f" max {c[INTERVAL_MAX]} ms, rssi avg {c[RSSI_Q4] / 16:.1f} min {c[RSSI_MIN]} max {c[RSSI_MAX]} dBm"
+            )
+
+
+class LinkTable:
+    """LinkStats per sender MAC, up to MAX_PEERS; frames from further peers are only counted."""
+
+    def __init__(self, max_peers=MAX_PEERS):
+        self.max_peers = max_peers
+        self.peers = {}
+        self.overflow = 0  # Frames from peers beyond max_peers
+
+    def peer(self, mac):
+        """Returns the LinkStats for mac, or None when the table is full."""
+        stats = self.peers.get(mac)
+        if stats is None:
+            if len(self.peers) >= self.max_peers:
+                self.overflow += 1
+                return None
+            stats = self.peers[mac] = LinkStats(bytes(mac))
+        return stats
+
+    def command(self, *args):
+        """Prints every peer's statistics, or clears them with "link reset"."""
+        if args and args[0] == "reset":
+            for stats in self.peers.values():
+                stats.reset()
+            self.overflow = 0
+            print("Link statistics cleared")
+            return
+        if not self.peers:
+            print("Link: no frames received")
+        for stats in self.peers.values():
+            stats.report()
+        if self.overflow:
+            print(f"Link: {self.overflow} frames from untracked peers")
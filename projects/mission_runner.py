@@ -0,0 +1,199 @@
+"""
+mission_runner.py
+-----------------
+Runs a scripted mission of motion segments streamed from the sd/ volume, for
+repeatable endurance and efficiency runs.
+
+The mission file (config "mission_file", default /sd/mission.csv) holds one
+segment per line:
+
+    duration_ms,left,right,brake,profile
+    # forward at half speed over 2 s along an S-curve, then hold 5 s
+    2000,32767,32767,0,2
+    5000,32767,32767,0,0
+    1000,0,0,3,0
+
+  left, right  signed wheel command (-MAX_SPEED..MAX_SPEED, positive forward)
+  brake        bit 0 brakes the left wheel, bit 1 the right (duty is zeroed)
+  profile      0 steps to the command at the segment start; 1 (trapezoid) or
+               2 (S-curve) ramps from the previous command across the segment
+
+Lines starting with "#" and blank lines are skipped. Segments are read one
+line at a time, one segment ahead, so a mission of any length needs the same
+RAM.
+
+Every segment runs on a drift-free schedule: segment and tick deadlines are
+computed from the mission start plus the summed durations, never from the
+time the previous step finished, so lateness doesn't accumulate. For each
+segment the runner reports how late it started and the worst and mean
+lateness of its ticks, printed (and appended to /sd/mission_report.csv when
+writable) during the next segment's first tick slack.
+
+With battery_monitor configured, duties are compensated for pack sag, so
+repeated runs compare across the discharge curve, and the mission ends early
+if the undervoltage cutoff trips.
+"""
+
+import os
+import time
+from adafruit_ticks import ticks_ms, ticks_add, ticks_diff
+import motion_profile
+import robot_config
+import battery_monitor
+import circuitpython_zsx11h as motor
+
+# ---- Mission Configuration ----
+MISSION_FILE = robot_config.get("mission_file", "/sd/mission.csv")
+REPORT_FILE = "/sd/mission_report.csv"
+TICK_MS = 20  # Control period within a segment
+START_DELAY_MS = 2000  # Time between loading and the first segment
+
+PROFILE_STEP = 0
+PROFILE_TRAPEZOID = 1
+PROFILE_SCURVE = 2
+BATTERY = battery_monitor.from_config()
+CURVES = (
+    None,
+    motion_profile.build_table(motion_profile.TRAPEZOID),
+    motion_profile.build_table(motion_profile.SCURVE),
+)
+
+
+def segments(path):
+    """Yields (duration_ms, left, right, brake, profile) from the mission file, one line at a time."""
+    with open(path, "r") as f:
+        number = 0
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            number += 1
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            try:
+                duration, left, right, brake, profile = (int(v) for v in line.split(","))
+            except ValueError:
+                print(f"Line {number} skipped: {line}")
+                continue
+            if duration <= 0 or not 0 <= profile < len(CURVES):
+                print(f"Line {number} skipped: bad duration or profile")
+                continue
+            limit = motor.MAX_SPEED
+            yield duration, max(-limit, min(limit, left)), max(-limit, min(limit, right)), brake & 3, profile
+
+
+def open_report():
+    """Opens the timing report on the sd/ volume, returning None if it is not writable."""
+    try:
+        os.stat(REPORT_FILE)
+        new_file = False
+    except OSError:
+        new_file = True
+    try:
+        report = open(REPORT_FILE, "a")
+        if new_file:
+            report.write("segment,scheduled_ms,duration_ms,start_error_ms,max_late_ms,mean_late_ms,ticks\n")
+        return report
+    except OSError as e:
+        print(f"Cannot write {REPORT_FILE} ({e}), timing will only be printed.")
+        return None
+
+
+def report_segment(log, index, scheduled, duration, start_error, max_late, total_late, ticks):
+    mean_late = total_late // ticks
+    print(
+        f"Segment {index}: at {scheduled} ms for {duration} ms, start {start_error:+d} ms,"
+        f" late max {max_late} mean {mean_late} ms over {ticks} ticks"
+    )
+    if log:
+        log.write(f"{index},{scheduled},{duration},{start_error},{max_late},{mean_late},{ticks}\n")
+
+
+def wait_until(deadline):
+    """Sleeps until deadline; returns how late (ms) the wake-up was."""
+    remaining = ticks_diff(deadline, ticks_ms())
+    if remaining > 0:
+        time.sleep(remaining / 1000)
+    return ticks_diff(ticks_ms(), deadline)
+
+
+def run(path):
+    log = open_report()
+    source = segments(path)
+    upcoming = next(source, None)
+    if upcoming is None:
+        print(f"No segments in {path}")
+        return
+
+    motor.release_brakes()
+    left = right = 0
+    index = 0
+    offset = 0  # Scheduled start of the current segment, ms after mission start
+    pending = None  # Previous segment's timing, reported in the next segment's slack
+    worst_start = 0
+    print(f"Mission {path} starts in {START_DELAY_MS} ms")
+    mission_start = ticks_add(ticks_ms(), START_DELAY_MS)
+
+    while upcoming is not None:
+        duration, target_left, target_right, brake, profile = upcoming
+        segment_start = ticks_add(mission_start, offset)
+        steps = max(1, duration // TICK_MS)
+        start_left, start_right = left, right
+        # A braked wheel's duty is zeroed at the first tick, not ramped down against the brake.
+        if brake & 1:
+            target_left = start_left = 0
+        if brake & 2:
+            target_right = start_right = 0
+        max_late = total_late = start_error = 0
+
+        for step in range(steps):
+            late = wait_until(ticks_add(segment_start, step * TICK_MS))
+            if BATTERY:
+                BATTERY.update()
+                if motor.undervoltage:
+                    print(f"Mission aborted in segment {index}: battery undervoltage")
+                    upcoming = None
+                    break
+            if step == 0:
+                start_error = late
+                motor.left_brake.value = bool(brake & 1)
+                motor.right_brake.value = bool(brake & 2)
+            if profile == PROFILE_STEP:
+                left, right = target_left, target_right
+            else:
+                curve = CURVES[profile]
+                left = motion_profile.ramp_value(start_left, target_left - start_left, step + 1, steps, curve)
+                right = motion_profile.ramp_value(start_right, target_right - start_right, step + 1, steps, curve)
+            motor.drive(left, right)
+            max_late = max(max_late, late)
+            total_late += max(0, late)
+
+            if step == 0:
+                # Slack after the first tick: report the last segment, read the next one.
+                if pending:
+                    report_segment(log, *pending)
+                upcoming = next(source, None)
+
+        pending = (index, offset, duration, start_error, max_late, total_late, steps)
+        worst_start = max(worst_start, abs(start_error))
+        index += 1
+        offset += duration
+
+    if not motor.undervoltage:
+        wait_until(ticks_add(mission_start, offset))
+    motor.stop()
+    motor.release_brakes()
+    report_segment(log, *pending)
+    print(f"Mission done: {index} segments, {offset} ms scheduled, worst start error {worst_start} ms")
+    if log:
+        log.close()
+
+
+try:
+    run(MISSION_FILE)
+except OSError as e:
+    print(f"Cannot read {MISSION_FILE}: {e}")
+finally:
+    motor.write_duty(0, 0)
+    motor.park()
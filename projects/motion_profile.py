@@ -0,0 +1,117 @@
+"""
+motion_profile.py
+-----------------
+Shared acceleration profiles for ramping motor duty cycles.
+
+The normalized ramp shape is computed once into an integer array of
+TABLE_SIZE + 1 points running from 0 to SCALE. Each ramp step then looks up
+the two table points around its position, interpolates linearly between them
+and scales the ramp by the result, all in integers with no float math inside
+the ramp loop:
+
+    p = table[i * TABLE_SIZE / steps]   # interpolated at fractional positions
+    duty = start + ((end - start) * p >> SCALE_BITS)
+
+Interpolating keeps long ramps (more steps than TABLE_SIZE) from repeating
+table values, which would hold the duty for a tick and then jump.
+
+Profiles:
+  TRAPEZOID  Constant acceleration: the duty changes linearly, limited by
+             MAX_ACCEL (duty counts per second).
+  SCURVE     Jerk-limited: the acceleration ramps up over the first
+             JERK_FRACTION / 2 of the move and back down over the last, so
+             the duty eases in and out. Limited by MAX_ACCEL and MAX_JERK
+             (duty counts per second squared).
+
+The number of steps in a ramp is derived from the limits, so a small speed
+change finishes quickly while a full-scale stop takes longer.
+"""
+
+import math
+from array import array
+
+TRAPEZOID = 0
+SCURVE = 1
+
+TABLE_SIZE = 64  # Number of segments in the precomputed curve
+SCALE_BITS = 15
+SCALE = 1 << SCALE_BITS  # Table value for 100% progress (fits an unsigned 16-bit array)
+
+# Default limits, in 16-bit duty counts (0-65535).
+PROFILE = SCURVE
+MAX_ACCEL = 250000  # Duty counts per second (full scale in ~0.26 s)
+MAX_JERK = 2500000  # Duty counts per second squared
+JERK_FRACTION = 0.5  # Share of an S-curve ramp spent changing acceleration
+
+
+def build_table(kind, jerk_fraction=JERK_FRACTION, size=TABLE_SIZE):
+    """Returns the normalized ramp as an array('H') of size + 1 points from 0 to SCALE."""
+    table = array("H", [0] * (size + 1))
+    tj = jerk_fraction / 2 if kind == SCURVE else 0.0
+    peak = 1.0 / (1.0 - tj)  # Peak normalized acceleration
+    for i in range(size + 1):
+        t = i / size
+        if tj == 0:
+            progress = t
+        elif t <= tj:
+            progress = peak * t * t / (2 * tj)
+        elif t <= 1 - tj:
+            progress = peak * tj / 2 + peak * (t - tj)
+        else:
+            progress = 1 - peak * (1 - t) * (1 - t) / (2 * tj)
+        table[i] = min(SCALE, int(progress * SCALE + 0.5))
+    return table
+
+
+table = build_table(PROFILE)
+
+
+def configure(kind=None, max_accel=None, max_jerk=None):
+    """Selects the profile and limits used by every ramp, rebuilding the table if needed."""
+    global PROFILE, MAX_ACCEL, MAX_JERK, table
+    if max_accel is not None:
+        MAX_ACCEL = max_accel
+    if max_jerk is not None:
+        MAX_JERK = max_jerk
+    if kind is not None and kind != PROFILE:
+        PROFILE = kind
+        table = build_table(kind)
+
+
+def ramp_steps(delta, tick, max_accel=None, max_jerk=None):
+    """Returns how many ticks of `tick` seconds a change of `delta` duty counts takes."""
+    delta = abs(delta)
+    if delta == 0:
+        return 0
+    max_accel = max_accel or MAX_ACCEL
+    max_jerk = max_jerk or MAX_JERK
+    if PROFILE == SCURVE:
+        tj = JERK_FRACTION / 2
+        peak = 1.0 / (1.0 - tj)
+        duration = max(peak * delta / max_accel, math.sqrt(peak * delta / (tj * max_jerk)))
+    else:
+        duration = delta / max_accel
+    return max(1, int(math.ceil(duration / tick)))
+
+
+def ramp_value(start, delta, step, steps, curve=None):
+    """
+    Returns the duty at `step` of `steps` for a ramp of `delta` counts from
+    `start`, along `curve` (a build_table() result) or the configured profile.
+    """
+    if curve is None:
+        curve = table
+    position = step * TABLE_SIZE
+    index = position // steps
+    progress = curve[index]
+    remainder = position - index * steps
+    if remainder:
+        progress += (curve[index + 1] - progress) * remainder // steps
+    return start + ((delta * progress) >> SCALE_BITS)
+
+
+def ramp(start, end, steps):
+    """Yields the duty for each of `steps` ramp steps from start to end, ending exactly at end."""
+    delta = end - start
+    for step in range(1, steps + 1):
+        yield ramp_value(start, delta, step, steps)
@@ -0,0 +1,101 @@
+"""
+nunchuk_controller.py
+---------------------
+This script runs on the controller ESP32-S3 Feather (MAC: F4:12:FA:5A:51:48)
+with a Wii Nunchuk on the STEMMA QT connector. It samples the Nunchuk with
+nunchuk_sampler (one I2C read per tick) and sends the control data to the
+robot_receiver over ESP-NOW as a CSV string "x,y,c,z,seq", e.g.
+"128,128,0,1,42". seq counts frames modulo frame_codec.SEQ_MODULUS so the
+receiver's link_stats can tell lost, duplicated and reordered frames apart
+from a controller that simply has nothing new to send.
+
+send_pacer decides when to send from ESP-NOW delivery feedback: changed
+reports go out at up to the ceiling rate, keepalives keep the receiver seeing
+the controller while the stick rests, and both slow down toward the floor
+rate when frames stop being acknowledged. Brake (C) and enable (Z) changes
+are sent as a short burst of repeats. The "tx_rate_floor_hz" and
+"tx_rate_ceiling_hz" config keys set the limits; the "send" console command
+prints the current rate and delivery counts.
+
+When nobody touches the Nunchuk, idle_policy lowers the sample rate and then
+light-sleeps between samples; the first changed report brings it back to
+full rate.
+"""
+
+import time
+import board
+import wifi
+import espnow
+from adafruit_ticks import ticks_ms
+from nunchuk_sampler import NunchukSampler
+from idle_policy import IdlePolicy, ACTIVE
+import safety
+import robot_config
+import serial_console as console
+import diagnostics as diag
+from send_pacer import SendPacer, SEND_NONE, SEND_REPEAT
+from frame_codec import mac_to_bytes, format_mac, SEQ_MODULUS
+
+# ---- Configuration ----
+SAMPLE_RATE_HZ = 100  # Nunchuk reports per second
+KEEPALIVE_INTERVAL = 100  # Shortest milliseconds between sends while the report is unchanged
+TX_FLOOR_HZ = robot_config.get("tx_rate_floor_hz", 5)  # Slowest keepalive rate under backoff
+TX_CEILING_HZ = robot_config.get("tx_rate_ceiling_hz", 50)  # Fastest rate for changed reports
+IDLE_SLOW_AFTER = 10  # Seconds untouched before sampling at IDLE_SLOW_PERIOD
+IDLE_SLOW_PERIOD = 0.1
+IDLE_SLEEP_AFTER = 60  # Seconds untouched before light-sleeping between samples
+IDLE_SLEEP_PERIOD = 0.25
+RECEIVER_MAC = "70:04:1D:CD:F8:70"
+
+MSG_ERROR = diag.site("An error occurred: %s", diag.ERROR, 1000)  # A failing Nunchuk errors every sample
+
+
+esp = espnow.ESPNow()
+peer = espnow.Peer(mac_to_bytes(RECEIVER_MAC))
+esp.peers.append(peer)
+
+mac_address = wifi.radio.mac_address
+print("Controller MAC Address:", format_mac(mac_address))
+
+sampler = NunchukSampler(board.STEMMA_I2C(), rate_hz=SAMPLE_RATE_HZ)
+idle = IdlePolicy(0, IDLE_SLOW_AFTER, IDLE_SLOW_PERIOD, IDLE_SLEEP_AFTER, IDLE_SLEEP_PERIOD)
+pacer = SendPacer(esp, TX_FLOOR_HZ, TX_CEILING_HZ, KEEPALIVE_INTERVAL)
+console.register("send", pacer.report, "transmit rate, bursts and delivery counts")
+
+last_report = None
+message = b""
+seq = 0
+
+safety.ready("nunchuk_controller")
+print("Controller is sampling the Nunchuk and sending to", RECEIVER_MAC)
+
+while True:
+    safety.feed()
+    console.poll()
+    try:
+        if sampler.sample():
+            report = (sampler.x, sampler.y, sampler.c, sampler.z)
+            now = ticks_ms()
+            changed = report != last_report
+            if changed:
+                idle.activity()
+            important = last_report is not None and report[2:] != last_report[2:]
+            kind = pacer.should_send(now, changed, important)
+            if kind != SEND_NONE:
+                if kind != SEND_REPEAT:
+                    message = f"{sampler.x},{sampler.y},{int(sampler.c)},{int(sampler.z)},{seq}".encode("utf-8")
+                    seq = (seq + 1) % SEQ_MODULUS
+                    last_report = report
+                try:
+                    esp.send(message, peer)
+                    pacer.sent(now, kind)
+                except Exception:
+                    pacer.sent(now, kind, ok=False)  # Usually a full send queue: counted, then backed off
+            pacer.adapt(now)
+    except Exception as e:
+        diag.log(MSG_ERROR, e)
+
+    if idle.update() == ACTIVE:
+        time.sleep(sampler.time_to_next() / 1000)
+    else:
+        idle.wait()
@@ -0,0 +1,101 @@
+"""
+nunchuk_sampler.py
+------------------
+Samples a Wii Nunchuk with one I2C read per tick and decodes every field from
+that single 6-byte report.
+
+adafruit_nunchuk performs a full register write + delay + read for each
+property (joystick, acceleration, buttons.C, buttons.Z), so reading all of
+them costs four or more bus transactions. Here the report is read once into a
+reused bytearray, and the conversion for the next report is requested right
+after, so no delay is needed between the write and the next read. Each sample
+is therefore at most one sample period old.
+
+    sampler = NunchukSampler(board.STEMMA_I2C(), rate_hz=100)
+    while True:
+        if sampler.sample():
+            print(sampler.x, sampler.y, sampler.c, sampler.z)
+        time.sleep(sampler.time_to_next() / 1000)
+"""
+
+import time
+from adafruit_ticks import ticks_ms, ticks_add, ticks_diff
+
+NUNCHUK_ADDRESS = 0x52
+SAMPLE_RATE_HZ = 100  # Default reports per second
+
+_INIT_1 = b"\xF0\x55"  # Unencrypted mode initialization sequence
+_INIT_2 = b"\xFB\x00"
+_REQUEST = b"\x00"  # Start a conversion and point the read at the report
+
+
+class NunchukSampler:
+    """Reads and decodes Nunchuk reports at a fixed rate."""
+
+    def __init__(self, i2c, rate_hz=SAMPLE_RATE_HZ, address=NUNCHUK_ADDRESS):
+        self.i2c = i2c
+        self.address = address
+        self.buffer = bytearray(6)
+        self.period_ms = max(1, 1000 // rate_hz)
+        self.samples = 0
+        self.errors = 0
+
+        # Decoded report fields.
+        self.x = 128
+        self.y = 128
+        self.ax = 512
+        self.ay = 512
+        self.az = 512
+        self.c = False
+        self.z = False
+
+        while not i2c.try_lock():
+            pass  # The sampler owns the bus for its lifetime
+        i2c.writeto(address, _INIT_1)
+        time.sleep(0.01)
+        i2c.writeto(address, _INIT_2)
+        time.sleep(0.01)
+        i2c.writeto(address, _REQUEST)
+        time.sleep(0.01)
+        self._next = ticks_ms()
+
+    def set_rate(self, rate_hz):
+        """Changes the sample rate."""
+        self.period_ms = max(1, 1000 // rate_hz)
+
+    def time_to_next(self):
+        """Returns milliseconds until the next sample is due (0 if overdue)."""
+        return max(0, ticks_diff(self._next, ticks_ms()))
+
+    def sample(self):
+        """Reads and decodes one report if a sample is due. Returns True if new data was read."""
+        now = ticks_ms()
+        if ticks_diff(now, self._next) < 0:
+            return False
+        self._next = ticks_add(self._next, self.period_ms)
+        if ticks_diff(now, self._next) >= 0:
+            self._next = ticks_add(now, self.period_ms)  # Fell behind: don't try to catch up
+        try:
+            self.i2c.readfrom_into(self.address, self.buffer)
+            self.i2c.writeto(self.address, _REQUEST)  # Convert the next report while we wait
+        except OSError:
+            self.errors += 1
+            return False
+        self._decode()
+        self.samples += 1
+        return True
+
+    def _decode(self):
+        buf = self.buffer
+        low = buf[5]
+        self.x = buf[0]
+        self.y = buf[1]
+        self.ax = (buf[2] << 2) | ((low >> 2) & 0x03)
+        self.ay = (buf[3] << 2) | ((low >> 4) & 0x03)
+        self.az = (buf[4] << 2) | ((low >> 6) & 0x03)
+        self.z = not (low & 0x01)  # Buttons are active low
+        self.c = not (low & 0x02)
+
+    def deinit(self):
+        """Releases the I2C bus."""
+        self.i2c.unlock()
@@ -0,0 +1,105 @@
+"""
+params.py
+---------
+Registry of tunable parameters with typed bounds, settable at runtime.
+
+Modules define their tuning constants here instead of as bare literals:
+
+    PIVOT_SPEED = params.define("PIVOT_SPEED", 40000, 0, 65535)
+
+    def on_param(name, value):
+        if name == "PIVOT_SPEED":
+            global PIVOT_SPEED
+            PIVOT_SPEED = value
+    params.watch(on_param)
+
+The starting value comes from the "params" object in config.json when present.
+Values are changed with the serial console commands registered below (or a
+"!set NAME VALUE" ESP-NOW frame to the receiver), are range-checked against
+their bounds, and reach every watcher immediately, so they take effect on the
+next control tick. "save" writes the current values back to config.json.
+"""
+
+import robot_config
+import serial_console as console
+
+_specs = {}  # name -> (type, minimum, maximum, help text)
+_watchers = []
+values = {}  # name -> current value
+version = 0  # Incremented on every change so loops can detect updates cheaply
+
+
+def _coerce(name, value):
+    kind, minimum, maximum, _ = _specs[name]
+    if kind is bool:
+        value = value if isinstance(value, bool) else str(value).lower() in ("1", "true", "on", "yes")
+    else:
+        value = kind(value)
+        if not minimum <= value <= maximum:
+            raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def define(name, default, minimum=None, maximum=None, help_text=""):
+    """Registers a parameter and returns its starting value (from config.json if valid)."""
+    _specs[name] = (type(default), minimum, maximum, help_text)
+    value = default
+    stored = robot_config.get("params", {}).get(name)
+    if stored is not None:
+        try:
+            value = _coerce(name, stored)
+        except (TypeError, ValueError) as e:
+            print(f"Ignoring stored {name}: {e}")
+    values[name] = value
+    return value
+
+
+def get(name):
+    """Returns the current value of a parameter."""
+    return values[name]
+
+
+def set(name, value):
+    """Validates and applies a new value, notifying every watcher. Raises KeyError/ValueError."""
+    global version
+    if name not in _specs:
+        raise KeyError(f"Unknown parameter {name}")
+    value = _coerce(name, value)
+    values[name] = value
+    version += 1
+    for watcher in _watchers:
+        watcher(name, value)
+    return value
+
+
+def watch(callback):
+    """Registers callback(name, value) to run whenever a parameter changes."""
+    _watchers.append(callback)
+
+
+def save():
+    """Persists every parameter to the "params" object in config.json."""
+    robot_config.save({"params": dict(values)})
+
+
+def _get_command(name=None):
+    for key in sorted(values) if name is None else (name,):
+        kind, minimum, maximum, help_text = _specs[key]
+        print(f"  {key} = {values[key]}  [{minimum}..{maximum}] {help_text}")
+
+
+def _set_command(name, value):
+    print(f"{name} = {set(name, value)}")
+
+
+def _save_command():
+    try:
+        save()
+        print(f"Parameters saved to {robot_config.CONFIG_FILE}")
+    except OSError as e:
+        print(f"Cannot save parameters ({e}); is the filesystem writable?")
+
+
+console.register("get", _get_command, "show parameters ('get NAME' for one)")
+console.register("set", _set_command, "set NAME VALUE, effective on the next tick")
+console.register("save", _save_command, "persist parameters to config.json")
@@ -0,0 +1,114 @@
+"""
+pwm_characterization.py
+-----------------------
+Sweeps the PWM carrier frequency and duty cycle in a grid on each wheel and
+measures the resulting wheel speed from the ZSX11H hall speed pulse output.
+
+For every (wheel, frequency, duty) point the wheel is driven on its own, left
+to settle, and the SPEED pulses are counted over a fixed window. The results
+are printed and appended as a CSV table to the sd/ volume so the carrier with
+the best low-speed torque and efficiency can be chosen and written to
+"pwm_frequency" in config.json.
+
+Set "active_project" to "pwm_characterization" in config.json to run it.
+Lift the robot off the ground before running: each wheel spins up in turn.
+"""
+
+import os
+import time
+import board
+import countio
+import robot_config
+import circuitpython_zsx11h as motor
+
+# ---- Sweep Configuration ----
+FREQUENCIES = [500, 1000, 2000, 4000, 8000, 16000, 20000]  # Carrier frequencies in Hz
+DUTY_LEVELS = [3277, 6554, 9830, 13107, 19661, 26214, 32768]  # 5% .. 50% of 65535
+SETTLE_TIME = 1.0  # Seconds to let the wheel reach steady speed before measuring
+MEASURE_TIME = 2.0  # Seconds to count hall pulses at each grid point
+COOLDOWN_TIME = 1.0  # Seconds to coast between wheels
+PULSES_PER_REV = robot_config.get("pulses_per_rev", 45)  # SPEED pulses per wheel revolution
+
+LOG_FILE = "/sd/pwm_characterization.csv"
+
+# Hall speed pulse pins (see README pin assignments).
+SPEED_PINS = {"left": board.A4, "right": board.D13}
+
+
+def drive_wheel(wheel, duty):
+    """
+    Writes duty straight to one wheel's PWM output with the other at zero. The
+    motor library's write_duty() would apply the calibration tables and supply
+    compensation, and the CSV must record the duty actually applied.
+    """
+    if duty and not motor.drivers_armed:
+        motor.arm()
+    motor.left_pwm.duty_cycle = duty if wheel == "left" else 0
+    motor.right_pwm.duty_cycle = duty if wheel == "right" else 0
+
+
+def measure_pulses(counter, duration):
+    """Counts hall pulses over the given duration and returns (pulses, elapsed seconds)."""
+    counter.reset()
+    start = time.monotonic()
+    time.sleep(duration)
+    pulses = counter.count
+    return pulses, time.monotonic() - start
+
+
+def open_log():
+    """Opens the CSV log on the sd/ volume, returning None if it is not writable."""
+    try:
+        os.stat(LOG_FILE)
+        new_file = False
+    except OSError:
+        new_file = True
+    try:
+        log = open(LOG_FILE, "a")
+        if new_file:
+            log.write("wheel,frequency_hz,duty,duty_pct,pulses,pulses_per_s,rpm\n")
+        return log
+    except OSError as e:
+        print(f"Cannot write {LOG_FILE} ({e}), results will only be printed.")
+        return None
+
+
+def characterize_wheel(wheel, log):
+    """Runs the frequency x duty grid on one wheel and records every point."""
+    counter = countio.Counter(SPEED_PINS[wheel], edge=countio.Edge.RISE)
+    try:
+        for frequency in FREQUENCIES:
+            motor.set_pwm_frequency(frequency)
+            for duty in DUTY_LEVELS:
+                drive_wheel(wheel, duty)
+                time.sleep(SETTLE_TIME)
+                pulses, elapsed = measure_pulses(counter, MEASURE_TIME)
+                pulses_per_s = pulses / elapsed
+                rpm = pulses_per_s * 60 / PULSES_PER_REV
+                row = f"{wheel},{frequency},{duty},{duty * 100 / 65535:.1f},{pulses},{pulses_per_s:.1f},{rpm:.1f}"
+                print(row)
+                if log:
+                    log.write(row + "\n")
+                    log.flush()
+            drive_wheel(wheel, 0)
+            time.sleep(COOLDOWN_TIME)
+    finally:
+        drive_wheel(wheel, 0)
+        counter.deinit()
+
+
+print("PWM characterization: lift the robot, wheels will spin in turn.")
+original_frequency = motor.PWM_FREQUENCY
+motor.release_brakes()
+motor.move_forward(0)  # Set direction pins for forward with zero duty
+log = open_log()
+try:
+    for wheel in ("left", "right"):
+        print(f"Characterizing {wheel} wheel...")
+        characterize_wheel(wheel, log)
+finally:
+    motor.stop()
+    motor.set_pwm_frequency(original_frequency)
+    if log:
+        log.close()
+print("PWM characterization complete.")
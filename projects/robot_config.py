@@ -0,0 +1,40 @@
+"""
+robot_config.py
+---------------
+Shared access to the settings stored in config.json, so projects and the
+motor library read the same values that code.py uses to pick the project.
+"""
+
+import json
+
+# Path to the configuration file (same file code.py reads).
+CONFIG_FILE = "config.json"
+
+
+def load():
+    """Reads config.json, returning an empty dict if it is missing or invalid."""
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading {CONFIG_FILE}: {e}")
+        return {}
+
+
+config = load()
+
+
+def get(key, default=None):
+    """Returns a config value, or default if the key is not set."""
+    return config.get(key, default)
+
+
+def save(updates):
+    """
+    Merges updates into the config and writes config.json back. Raises OSError
+    when the filesystem is read-only to code (the default while USB is mounted;
+    boot.py must remount "/" writable).
+    """
+    config.update(updates)
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(config, f)
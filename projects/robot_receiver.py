@@ -1,22 +1,42 @@
 import time
 import wifi
 import espnow
+from adafruit_ticks import ticks_ms, ticks_diff
+import motion_profile
+import heap_monitor as heap
+import timing_probe as probe
+import serial_console as console
+import input_filter
+import params
+import idle_policy
+import drive_state
+import safety
+import run_log
+import frame_codec
+import link_stats
+import battery_monitor
+import composer
+import diagnostics as diag
 import circuitpython_zsx11h as motor
 
-# ---- Configurable Debug Verbosity ----
-DEBUG_LEVEL = 1
-
-def debug_print(level, *args):
-    if DEBUG_LEVEL >= level:
-        print(" ".join(str(arg) for arg in args))
+# Diagnostic messages (level and sink: "diag" console command). Speed changes
+# arrive with every frame, so they are rate-limited.
+MSG_GRADUAL_STOP = diag.site("Initiating gradual stop.")
+MSG_STOPPED = diag.site("Motors set to speed 0, no brakes engaged.")
+MSG_FORWARD = diag.site("Moving forward at speed %d", diag.INFO, 250)
+MSG_REVERSE = diag.site("Moving reverse at speed %d", diag.INFO, 250)
+MSG_PIVOT_LEFT = diag.site("Pivoting left.")
+MSG_PIVOT_RIGHT = diag.site("Pivoting right.")
+MSG_BRAKE = diag.site("Brake engaged by C button.")
+MSG_RELEASE = diag.site("Brakes released, motors re-enabled.")
+MSG_PACKET = diag.site(lambda mac: "Packet received from MAC: " + frame_codec.format_mac(mac), diag.DEBUG, 1000)
+MSG_ERROR = diag.site("Error processing received message: %s", diag.ERROR, 1000)
+MSG_LINK_LOST = diag.site("No control frame for %d ms, stopping.")
 
 # Disable Wi-Fi to ensure ESP-NOW works properly.
 wifi.radio.enabled = False
 
-def mac_to_bytes(mac_str):
-    return bytes([int(b, 16) for b in mac_str.split(":" )])
-
-expected_sender_mac = mac_to_bytes("F4:12:FA:5A:51:48")
+expected_sender_mac = frame_codec.mac_to_bytes("F4:12:FA:5A:51:48")
 
 try:
     esp = espnow.ESPNow()
@@ -26,114 +46,307 @@ except Exception as e:
 
 # Motor control variables.
 current_speed = 0
-PIVOT_SPEED = 40000  # Adjusted for 16-bit scaling
-DECELERATION_RATE = 5000  # Speed decrement per step for controlled stopping.
-DECELERATION_DELAY = 0.02  # Delay between deceleration steps.
+PIVOT_SPEED = params.define("PIVOT_SPEED", 40000, 0, 65535, "pivot duty (16-bit)")
+DECELERATION_RATE = params.define("DECELERATION_RATE", 5000, 1, 65535, "max speed decrement per stop step")
+DECELERATION_DELAY = params.define("DECELERATION_DELAY", 0.02, 0.001, 0.5, "seconds between stop steps")
+
+drive_speed = 0  # Duty requested for FORWARD/REVERSE by the current frame
+
+# A moving robot stops gradually when no control frame arrived for this long
+# (the controller sends a keepalive at least every 100 ms).
+LINK_TIMEOUT_MS = params.define("LINK_TIMEOUT_MS", 500, 100, 5000, "ms without control frames before a moving robot stops")
+last_control_ms = ticks_ms()
+
+# Define a deadzone threshold, with a hysteresis band and mode dwell around it.
+THRESHOLD = params.define("THRESHOLD", 10, 0, 127, "joystick deadzone")
+# Total band width: axes enter above THRESHOLD + 3, leave below THRESHOLD - 3
+HYSTERESIS = params.define("HYSTERESIS", 6, 0, 40, "deadzone hysteresis band")
+# A new drive mode must persist this long before it is applied
+MODE_DWELL_MS = params.define("MODE_DWELL_MS", 60, 0, 1000, "ms a new drive mode must persist")
+
+conditioner = input_filter.InputConditioner(THRESHOLD, HYSTERESIS, MODE_DWELL_MS)
+
+# Idle power saving: poll slower after IDLE_SLOW_AFTER seconds without driving
+# input, and light-sleep in IDLE_SLEEP_PERIOD slices after IDLE_SLEEP_AFTER.
+# Only while the drive is in a resting state; see receive().
+POLL_PERIOD = 0.1  # Seconds between polls while active and no frame is waiting
+IDLE_SLOW_AFTER = 10
+IDLE_SLOW_PERIOD = 0.25
+IDLE_SLEEP_AFTER = 60
+IDLE_SLEEP_PERIOD = 0.5
+
+idle = idle_policy.IdlePolicy(POLL_PERIOD, IDLE_SLOW_AFTER, IDLE_SLOW_PERIOD, IDLE_SLEEP_AFTER, IDLE_SLEEP_PERIOD)
+
+
+def apply_param(name, value):
+    """Picks up tuning changes made through params; used from the next frame on."""
+    global PIVOT_SPEED, DECELERATION_RATE, DECELERATION_DELAY, THRESHOLD, HYSTERESIS, MODE_DWELL_MS, LINK_TIMEOUT_MS
+    if name == "PIVOT_SPEED":
+        PIVOT_SPEED = value
+    elif name == "LINK_TIMEOUT_MS":
+        LINK_TIMEOUT_MS = value
+    elif name == "DECELERATION_RATE":
+        DECELERATION_RATE = value
+    elif name == "DECELERATION_DELAY":
+        DECELERATION_DELAY = value
+    elif name in ("THRESHOLD", "HYSTERESIS", "MODE_DWELL_MS"):
+        THRESHOLD = params.get("THRESHOLD")
+        HYSTERESIS = params.get("HYSTERESIS")
+        MODE_DWELL_MS = params.get("MODE_DWELL_MS")
+        conditioner.configure(THRESHOLD, HYSTERESIS, MODE_DWELL_MS)
+
+
+params.watch(apply_param)
+
+# Heap instrumentation sections and reporting.
+HEAP_READ = heap.section("read")
+HEAP_PARSE = heap.section("parse")
+HEAP_CONTROL = heap.section("control")
+HEAP_REPORT_INTERVAL = 30  # Seconds between heap reports at diagnostics level 2
+last_heap_report = time.monotonic()
+
+# Loop phase timing probes, dumped with the "stats" command.
+PROBE_LOOP = probe.register("loop")
+PROBE_PARSE = probe.register("parse")
+PROBE_MIX = probe.register("mix")
 
-# State variables.
-last_enable_state = None
-last_motor_direction = None
-brake_engaged = False
 
-# Define a deadzone threshold.
-THRESHOLD = 10
+def stats_command(*args):
+    """Prints the timing histograms, or clears them with "stats reset"."""
+    if args and args[0] == "reset":
+        probe.reset()
+        heap.reset()
+        print("Statistics cleared")
+    else:
+        probe.report()
+
+
+console.register("stats", stats_command, "timing percentiles per phase ('stats reset' clears)")
+console.register("heap", heap.report, "heap and GC statistics")
+console.register("filter", conditioner.report, "input conditioning counters")
+console.register("idle", idle.report, "idle state and resume latency")
+console.register("safety", safety.report, "crash record and recovery time")
+console.register("log", run_log.report, "run log file and record counts")
+
+# Per-peer sequence, loss, jitter and RSSI accounting for every received frame.
+links = link_stats.LinkTable()
+console.register("link", links.command, "per-peer loss, jitter and RSSI ('link reset' clears)")
+
+# Pack voltage compensation of every duty write, and the undervoltage cutoff.
+battery = battery_monitor.from_config()
+if battery:
+    console.register("battery", battery.command, "pack voltage and compensation ('battery reset' clears a cutoff)")
 
 def gradual_stop():
     """Gradually stops the motors without engaging brakes."""
     global current_speed
     if current_speed == 0:
         return
-    debug_print(1, "Initiating gradual stop.")
-    while current_speed > 0:
-        current_speed = max(0, current_speed - DECELERATION_RATE)
-        motor.set_speed(current_speed, current_speed)
+    diag.log(MSG_GRADUAL_STOP)
+    # DECELERATION_RATE per DECELERATION_DELAY is the profile's acceleration limit.
+    steps = motion_profile.ramp_steps(current_speed, DECELERATION_DELAY, DECELERATION_RATE / DECELERATION_DELAY)
+    for speed in motion_profile.ramp(current_speed, 0, steps):
+        motor.set_speed(speed, speed)
+        safety.feed()  # Long DECELERATION_DELAY settings can outlast the watchdog timeout
         time.sleep(DECELERATION_DELAY)
+    current_speed = 0
     motor.set_speed(0, 0)
-    debug_print(1, "Motors set to speed 0, no brakes engaged.")
+    diag.log(MSG_STOPPED)
+
+
+def drive_forward():
+    global current_speed
+    motor.move_forward(drive_speed)
+    current_speed = drive_speed
+    diag.log(MSG_FORWARD, drive_speed)
+
+
+def drive_reverse():
+    global current_speed
+    motor.move_reverse(drive_speed)
+    current_speed = drive_speed
+    diag.log(MSG_REVERSE, drive_speed)
+
+
+def enter_pivot_left():
+    global current_speed
+    motor.pivot_left(PIVOT_SPEED)
+    current_speed = PIVOT_SPEED  # So gradual_stop ramps the pivot down too
+    diag.log(MSG_PIVOT_LEFT)
+
 
+def enter_pivot_right():
+    global current_speed
+    motor.pivot_right(PIVOT_SPEED)
+    current_speed = PIVOT_SPEED
+    diag.log(MSG_PIVOT_RIGHT)
+
+
+def enter_braked():
+    global current_speed
+    diag.log(MSG_BRAKE)
+    conditioner.reset()  # After the release, the stick must pick a mode again
+    motor.brake_stop()
+    current_speed = 0
+
+
+def exit_braked():
+    motor.release_brakes()
+    diag.log(MSG_RELEASE)
+
+
+def enter_disabled():
+    conditioner.reset()
+    gradual_stop()
+    motor.enable_motors(False)
+
+
+def exit_disabled():
+    motor.enable_motors(True)
+
+
+# Entry and exit actions per drive state, indexed by state. The motor library
+# starts enabled with brakes released, which is the STOPPED state.
+drive = drive_state.DriveStateMachine(
+    entry=(enter_disabled, gradual_stop, drive_forward, drive_reverse, enter_pivot_left, enter_pivot_right, enter_braked),
+    exit=(exit_disabled, None, None, None, None, None, exit_braked),
+    initial=drive_state.STOPPED,
+)
+console.register("drive", drive.report, "drive state, time-in-state and transition counts")
+console.register("driver", motor.driver_report, "driver enable state, arm and park counts")
+
+run_log.start()
+safety.ready("robot_receiver")
 print("Receiver is ready and listening for ESP-NOW messages...")
 
-while True:
+
+def receive():
+    """
+    Runs one loop iteration: reads and handles at most one frame. Returns None
+    when no frame was waiting, False when a frame was skipped or its handling
+    failed (read the next one right away) and True when one was handled.
+    """
+    global drive_speed, last_heap_report, last_control_ms
+    loop_start = probe.start()
+    loop_ms = ticks_ms()
+    safety.feed()
+    if battery:
+        battery.update(loop_ms)
+    motor.park_if_idle(loop_ms)
     try:
+        console.poll()
+        heap.loop_tick()
+        if diag.enabled(diag.DEBUG) and time.monotonic() - last_heap_report > HEAP_REPORT_INTERVAL:
+            heap.report()
+            last_heap_report = time.monotonic()
+
+        heap.begin(HEAP_READ)
         packet = esp.read()
+        heap.end()
         if not packet:
-            time.sleep(0.1)
-            continue
+            if drive.state not in drive_state.RESTING:
+                silent_ms = ticks_diff(loop_ms, last_control_ms)
+                if silent_ms > LINK_TIMEOUT_MS:
+                    diag.log(MSG_LINK_LOST, silent_ms)
+                    drive.transition(drive_state.STOPPED)
+                else:
+                    idle.activity()  # Never slow the loop down with the wheels driven
+            heap.idle_collect(100)  # Nothing to do until the next poll
+            run_log.flush()
+            return None
 
-        sender_mac_str = ":".join("{:02X}".format(b) for b in packet.mac)
-        debug_print(2, "DEBUG: Packet received from MAC:", sender_mac_str)
+        heap.begin(HEAP_PARSE)
+        parse_start = probe.start()
+        diag.log(MSG_PACKET, packet.mac)
+        packet_ms = run_log.boot_to_ticks(packet.time)
+        link = links.peer(packet.mac)
         if packet.mac != expected_sender_mac:
-            continue
+            if link:
+                link.update(-1, packet.rssi, packet_ms)
+            return False
 
+        control = None
         try:
             data_str = packet.msg.decode("utf-8").strip()
             if not data_str:
-                continue
+                return False
 
-            parts = data_str.split(',')
-            if len(parts) != 4:
-                continue
+            # Frames starting with "!" are console commands, e.g. "!stats".
+            if data_str[0] == "!":
+                console.execute(data_str[1:])
+                return False
 
-            x, y, c, z = map(int, parts)
-            control_data = {"x": x, "y": y, "c": bool(c), "z": bool(z)}
+            control = frame_codec.parse_control(data_str)
+            if control is None:
+                return False
+            x, y, c, z, seq = control
+            last_control_ms = packet_ms
         except Exception:
-            continue
-
-        enable_state = control_data.get("z", False)
-        brake_pressed = control_data.get("c", False)
-
-        if brake_pressed:
-            if not brake_engaged:
-                debug_print(1, "Brake engaged by C button.")
-                gradual_stop()
-                motor.apply_brakes()
-                brake_engaged = True
-            continue
-        else:
-            if brake_engaged:
-                motor.release_brakes()
-                debug_print(1, "Brakes released, motors re-enabled.")
-                brake_engaged = False
-
-        if enable_state != last_enable_state:
-            motor.enable_motors(enable_state)
-            last_enable_state = enable_state
-
-        if not enable_state:
-            if last_motor_direction != "stopped":
-                gradual_stop()
-                last_motor_direction = "stopped"
-            continue
-
-        joystick_x = control_data.get("x", 128)
-        joystick_y = control_data.get("y", 128)
-
-        if abs(joystick_y - 128) > THRESHOLD:
-            fraction = abs(joystick_y - 128) / 127.0
-            speed_value = int(fraction * 65535)  # Scale to full PWM range
-            if joystick_y > 128:
-                motor.move_forward(speed_value)
-                debug_print(1, "Moving forward at speed", speed_value)
-                last_motor_direction = "forward"
-            else:
-                motor.move_reverse(speed_value)
-                debug_print(1, "Moving reverse at speed", speed_value)
-                last_motor_direction = "reverse"
-            current_speed = speed_value
-        elif abs(joystick_x - 128) > THRESHOLD:
-            if joystick_x < 128:
-                motor.pivot_left(PIVOT_SPEED)
-                debug_print(1, "Pivoting left.")
-                last_motor_direction = "pivot_left"
-            elif joystick_x > 128:
-                motor.pivot_right(PIVOT_SPEED)
-                debug_print(1, "Pivoting right.")
-                last_motor_direction = "pivot_right"
-        else:
-            gradual_stop()
-            last_motor_direction = "stopped"
+            return False
+        finally:
+            # Every frame counts for the link, even console commands and malformed ones.
+            if link:
+                link.update(control[4] if control else -1, packet.rssi, packet_ms)
+
+        probe.stop(PROBE_PARSE, parse_start)
+        heap.begin(HEAP_CONTROL)
+        mix_start = probe.start()
+        # Filter every frame so the history stays current while braked or disabled.
+        mode = conditioner.update(x, y)
+        wanted = drive_state.target(mode, c, z)
+        # Only driving input keeps the receiver awake; neutral keepalives let it idle.
+        if mode != input_filter.MODE_NEUTRAL or wanted != drive.state:
+            idle.activity(packet_ms)
+
+        if wanted == drive_state.FORWARD or wanted == drive_state.REVERSE:
+            drive_speed = frame_codec.joystick_speed(conditioner.y)  # Scale to full PWM range
+        if not drive.transition(wanted) and drive_speed != current_speed:
+            # Same direction, new stick position: only the speed changes.
+            if wanted == drive_state.FORWARD:
+                drive_forward()
+            elif wanted == drive_state.REVERSE:
+                drive_reverse()
+        probe.stop(PROBE_MIX, mix_start)
+        if run_log.ENABLED:
+            run_log.record(
+                packet_ms, loop_ms, ticks_ms(), seq, x, y, drive.state, (c != 0) | ((z != 0) << 1), motor.left_command, motor.right_command
+            )
 
     except Exception as e:
-        print("Error processing received message:", e)
+        diag.log(MSG_ERROR, e)
+        return False
+    finally:
+        # Early returns too: close the loop timing and any open heap section.
+        probe.stop(PROBE_LOOP, loop_start)
+        heap.end()
+
+    # The frame is handled: collect now rather than during the next ramp or brake.
+    heap.idle_collect(20)
+    return True
+
+
+
+def run():
+    """Runs the receiver on its own, light-sleeping when idle."""
+    while True:
+        handled = receive()
+        if handled is None:
+            idle.wait()
+        elif handled:
+            time.sleep(0.02)
+
+
+async def main():
+    """Runs the receiver as an asyncio task next to other composed projects."""
+    import asyncio
+
+    while True:
+        handled = receive()
+        if handled is None:
+            await asyncio.sleep(idle.period())  # No light sleep: other tasks keep running
+        else:
+            await asyncio.sleep(0.02 if handled else 0)
+
 
-    time.sleep(0.02)
+if not composer.COMPOSED:
+    run()
@@ -0,0 +1,154 @@
+"""
+run_log.py
+----------
+Binary run logger for the receiver, read back on the host by
+host/log_analyzer.py.
+
+Every handled control frame appends one fixed-size RECORD_FORMAT record:
+
+  packet_ms    ticks_ms() time the frame arrived (from ESPNowPacket.time)
+  loop_ms      ticks_ms() time the loop iteration that handled it started
+  duty_ms      ticks_ms() time the resulting duty was written
+  seq          frame sequence number, -1 if the sender doesn't send one
+  x, y         joystick axes
+  state        drive_state state after the frame
+  flags        bit 0: C (brake), bit 1: Z (enable)
+  left_duty,   duty commanded to the motor library (before calibration)
+  right_duty
+  left_pulses, free-running SPEED hall pulse counts (mod 65536), 0 when
+  right_pulses the counters are off
+
+Records are packed into a preallocated buffer and written to the sd/ volume
+BUFFER_RECORDS at a time, or from flush() when the loop is idle, so the
+control path never formats text or allocates. Each run goes to a new file
+/sd/run_NNN.bin, which starts with an 8-byte header: b"YGRL", the format
+version, the record size and two reserved bytes.
+
+Enable with "run_log": true in config.json; "run_log_speed": true also
+counts the SPEED outputs on A4/D13 (the pins must not be used elsewhere).
+"""
+
+import os
+import struct
+import time
+import board
+import robot_config
+from adafruit_ticks import ticks_ms
+
+ENABLED = robot_config.get("run_log", False)
+SPEED_COUNTERS = robot_config.get("run_log_speed", False)
+LOG_DIR = "/sd"
+BUFFER_RECORDS = 32  # Records per SD write
+
+VERSION = 1
+RECORD_FORMAT = "<IIIhBBBBHHHH"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+HEADER = b"YGRL" + bytes((VERSION, RECORD_SIZE, 0, 0))
+_TICKS_MASK = (1 << 29) - 1
+
+_buffer = bytearray(RECORD_SIZE * BUFFER_RECORDS)
+_view = memoryview(_buffer)
+_count = 0
+_file = None
+_counters = ()
+path = None
+records = 0
+dropped = 0  # Records lost to SD write errors
+
+# ESPNowPacket.time counts milliseconds since boot; ticks_ms() has its own
+# reference. The offset between them is fixed, so it is measured once.
+_boot_offset = (time.monotonic_ns() // 1000000 - ticks_ms()) & _TICKS_MASK
+
+
+def boot_to_ticks(boot_ms):
+    """Converts a milliseconds-since-boot timestamp (e.g. ESPNowPacket.time) to ticks_ms() time."""
+    return (boot_ms - _boot_offset) & _TICKS_MASK
+
+
+def _next_path():
+    numbers = [int(name[4:7]) for name in os.listdir(LOG_DIR) if name.startswith("run_") and name.endswith(".bin")]
+    return f"{LOG_DIR}/run_{max(numbers) + 1 if numbers else 0:03d}.bin"
+
+
+def start():
+    """Opens a new log file. Returns False (and stays off) if the sd/ volume is not writable."""
+    global _file, _counters, path, ENABLED
+    if not ENABLED:
+        return False
+    try:
+        path = _next_path()
+        _file = open(path, "wb")
+        _file.write(HEADER)
+    except (OSError, ValueError) as e:
+        print(f"Run log disabled: cannot write to {LOG_DIR} ({e})")
+        ENABLED = False
+        return False
+    if SPEED_COUNTERS:
+        import countio
+
+        _counters = (
+            countio.Counter(board.A4, edge=countio.Edge.RISE),
+            countio.Counter(board.D13, edge=countio.Edge.RISE),
+        )
+    print(f"Logging run to {path}")
+    return True
+
+
+def record(packet_ms, loop_ms, duty_ms, seq, x, y, state, flags, left_duty, right_duty):
+    """Appends one record; writes the buffer out when it is full."""
+    global _count, records
+    if _file is None:
+        return
+    left_pulses = right_pulses = 0
+    if _counters:
+        left_pulses = _counters[0].count & 0xFFFF
+        right_pulses = _counters[1].count & 0xFFFF
+    struct.pack_into(
+        RECORD_FORMAT,
+        _buffer,
+        _count * RECORD_SIZE,
+        packet_ms,
+        loop_ms,
+        duty_ms,
+        seq,
+        x,
+        y,
+        state,
+        flags,
+        left_duty,
+        right_duty,
+        left_pulses,
+        right_pulses,
+    )
+    _count += 1
+    records += 1
+    if _count == BUFFER_RECORDS:
+        flush()
+
+
+def flush():
+    """Writes buffered records to the file."""
+    global _count, dropped
+    if _file is None or not _count:
+        return
+    try:
+        _file.write(_view[: _count * RECORD_SIZE])
+        _file.flush()
+    except OSError:
+        dropped += _count
+    _count = 0
+
+
+def stop():
+    """Flushes and closes the log."""
+    global _file
+    if _file is None:
+        return
+    flush()
+    _file.close()
+    _file = None
+
+
+def report(*args):
+    """Prints the log file and record counts."""
+    print(f"Run log: {path or 'off'} records={records} buffered={_count} dropped={dropped}")
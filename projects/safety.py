@@ -0,0 +1,234 @@
+"""
+safety.py
+---------
+Watchdog supervision, safe outputs and crash recovery for code.py.
+
+code.py arms microcontroller.watchdog before importing a supervised project.
+The watchdog runs in RAISE mode, so a hung loop raises WatchDogTimeout
+back into code.py like any other crash. On a fault code.py calls fault(),
+which:
+
+  1. drives the motor outputs safe (drivers switched off through their STOP
+     lines, PWM low, brakes on), through the motor library's park() when it
+     is loaded;
+  2. re-arms the watchdog in RESET mode, so a hang during recovery still
+     ends in a hardware reset;
+  3. stores a crash record in microcontroller.nvm;
+  4. soft-reloads, which is much faster than a hardware reset, unless
+     there is nothing left to recover into.
+
+On the next start choose_project() runs the project again, or, after
+MAX_RESTARTS consecutive faults, the last project that reached ready().
+The supervised project calls feed() every loop iteration and ready() once
+it can drive; ready() stores the fault-to-ready time in the record. A
+power-on reset clears the fault streak. boot() only looks at the reset
+reason on a startup run: a soft reload keeps the reset_reason of the boot
+before it, so the reloads of a recovery keep counting faults.
+
+nvm layout (RECORD_FORMAT at NVM_OFFSET): magic, version, last reason,
+consecutive faults, total faults, supervisor.ticks_ms() at the fault, last
+recovery time in ms, last known-good project, project that faulted.
+"""
+
+import struct
+import sys
+import board
+import digitalio
+import microcontroller
+import supervisor
+import watchdog
+import robot_config
+
+# ---- Supervisor Configuration ----
+WATCHDOG_TIMEOUT = 2.0  # Seconds without feed() before a supervised project is faulted
+MAX_RESTARTS = 3  # Consecutive faults before falling back to the known-good project
+SAFE_BRAKE = True  # Brake level forced on fault (True engages the ZSX11H brake)
+SAFE_STOP = not robot_config.get("enable_level", True)  # STOP level that switches the ZSX11H drivers off
+# Without the motor library: STOP lines first, so the drivers are off before anything else changes.
+SAFE_PINS = (
+    (board.A3, SAFE_STOP),
+    (board.D10, SAFE_STOP),
+    (board.A0, False),
+    (board.D9, False),
+    (board.A2, SAFE_BRAKE),
+    (board.D11, SAFE_BRAKE),
+)
+
+NVM_OFFSET = 0
+RECORD_FORMAT = "<2sBBHHII24s24s"  # Project names up to 24 bytes
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+MAGIC = b"YG"
+VERSION = 1
+_TICKS_MASK = (1 << 29) - 1  # supervisor.ticks_ms() wraps at 2**29
+
+REASON_NONE = 0
+REASON_EXCEPTION = 1
+REASON_WATCHDOG = 2  # WatchDogTimeout raised in a supervised project
+REASON_IMPORT = 3  # Project missing or failing to import; retrying won't help
+REASON_RESET = 4  # Hardware reset by the watchdog
+REASON_NAMES = ("none", "exception", "watchdog", "import", "watchdog_reset")
+
+# Crash record fields, loaded from nvm by load().
+reason = REASON_NONE
+consecutive = 0
+total = 0
+fault_ticks = 0
+recovery_ms = 0
+known_good = ""
+failed = ""
+
+_armed = False
+_safe_outputs = []  # Pins claimed by force_outputs_safe(), held until reload
+
+
+def _name(field):
+    return field.split(b"\x00", 1)[0].decode("utf-8")
+
+
+def load():
+    """Reads the crash record from nvm; a blank or foreign record starts empty."""
+    global reason, consecutive, total, fault_ticks, recovery_ms, known_good, failed
+    nvm = microcontroller.nvm
+    if nvm is None or len(nvm) < NVM_OFFSET + RECORD_SIZE:
+        return
+    fields = struct.unpack(RECORD_FORMAT, nvm[NVM_OFFSET : NVM_OFFSET + RECORD_SIZE])
+    if fields[0] != MAGIC or fields[1] != VERSION:
+        return
+    reason, consecutive, total, fault_ticks, recovery_ms = fields[2:7]
+    known_good = _name(fields[7])
+    failed = _name(fields[8])
+
+
+def store():
+    """Writes the crash record to nvm if it changed (nvm writes wear the flash)."""
+    nvm = microcontroller.nvm
+    if nvm is None or len(nvm) < NVM_OFFSET + RECORD_SIZE:
+        return
+    record = struct.pack(
+        RECORD_FORMAT,
+        MAGIC,
+        VERSION,
+        reason,
+        consecutive,
+        total,
+        fault_ticks,
+        recovery_ms,
+        known_good.encode("utf-8"),
+        failed.encode("utf-8"),
+    )
+    if nvm[NVM_OFFSET : NVM_OFFSET + RECORD_SIZE] != record:
+        nvm[NVM_OFFSET : NVM_OFFSET + RECORD_SIZE] = record
+
+
+def boot():
+    """Loads the record and accounts for the reset that started this run."""
+    global reason, consecutive, total, fault_ticks
+    load()
+    if supervisor.runtime.run_reason != supervisor.RunReason.STARTUP:
+        return  # A reload keeps the reset_reason of the boot before it: nothing new to count
+    cause = microcontroller.cpu.reset_reason
+    if cause == microcontroller.ResetReason.WATCHDOG:
+        # The RESET-mode backstop fired: count it, timed from this boot.
+        reason = REASON_RESET
+        consecutive += 1
+        total += 1
+        fault_ticks = 0
+        store()
+    elif cause == microcontroller.ResetReason.POWER_ON and consecutive:
+        consecutive = 0  # A power cycle gives the configured project a fresh start
+        store()
+
+
+def recovering():
+    """Returns True if this run follows a fault that has not reached ready() yet."""
+    return consecutive > 0
+
+
+def choose_project(active):
+    """Returns the project to run: active, unless it keeps faulting and a known-good one exists."""
+    if consecutive >= MAX_RESTARTS and failed == active and known_good and known_good != active:
+        print(f"{active} faulted {consecutive} times, running known-good {known_good}")
+        return known_good
+    return active
+
+
+def arm(timeout=WATCHDOG_TIMEOUT):
+    """Starts the watchdog in RAISE mode; the project must call feed() within timeout."""
+    global _armed
+    microcontroller.watchdog.timeout = timeout
+    microcontroller.watchdog.mode = watchdog.WatchDogMode.RAISE
+    _armed = True
+
+
+def feed():
+    """Feeds the watchdog if it is armed."""
+    if _armed:
+        microcontroller.watchdog.feed()
+
+
+def ready(project):
+    """Marks project as able to drive: it becomes known-good and the recovery time is recorded."""
+    global known_good, consecutive, recovery_ms
+    if consecutive:
+        recovery_ms = (supervisor.ticks_ms() - fault_ticks) & _TICKS_MASK
+        print(f"Recovered from {REASON_NAMES[reason]} in {recovery_ms} ms")
+        if project == failed:
+            consecutive = 0
+    known_good = project
+    store()
+
+
+def force_outputs_safe():
+    """Switches the drivers off, cuts motor PWM and sets the brakes to SAFE_BRAKE, whatever state the project left them in."""
+    motor = sys.modules.get("circuitpython_zsx11h")
+    if motor is not None:
+        # The library owns the pins: park() is its definition of off (STOP lines, then PWM).
+        try:
+            motor.park()
+            motor.left_brake.value = SAFE_BRAKE
+            motor.right_brake.value = SAFE_BRAKE
+            return
+        except Exception as e:
+            print("Motor library outputs unusable:", e)
+    for pin, level in SAFE_PINS:
+        try:
+            output = digitalio.DigitalInOut(pin)
+            output.switch_to_output(value=level)
+            _safe_outputs.append(output)
+        except Exception:
+            pass  # Pin still claimed by a live object: leave it as it is
+
+
+def fault(project, kind, error=None):
+    """
+    Makes the robot safe, records the fault and soft-reloads into recovery.
+    Returns only when there is nothing to recover into (no retries left and no
+    known-good project), leaving the caller to run its diagnostic fallback.
+    """
+    global reason, consecutive, total, fault_ticks, failed
+    force_outputs_safe()
+    if _armed:
+        # Backstop: if anything below hangs, the watchdog resets the board.
+        microcontroller.watchdog.timeout = WATCHDOG_TIMEOUT
+        microcontroller.watchdog.mode = watchdog.WatchDogMode.RESET
+    fault_ticks = supervisor.ticks_ms()
+    reason = kind
+    total += 1
+    failed = project
+    # Retrying a project that can't even be imported won't help.
+    consecutive = MAX_RESTARTS if kind == REASON_IMPORT else consecutive + 1
+    store()
+    print(f"Fault in {project}: {REASON_NAMES[kind]} {error if error is not None else ''}")
+    if consecutive < MAX_RESTARTS or (known_good and known_good != project):
+        supervisor.reload()
+    if _armed:
+        microcontroller.watchdog.deinit()  # The fallback doesn't feed the watchdog
+
+
+def report(*args):
+    """Prints the crash record."""
+    print(
+        f"Safety: last={REASON_NAMES[reason]} consecutive={consecutive} total={total}"
+        f" recovery_ms={recovery_ms} known_good={known_good or '-'} failed={failed or '-'}"
+        f" watchdog={'armed' if _armed else 'off'} timeout={WATCHDOG_TIMEOUT}s"
+    )
@@ -0,0 +1,140 @@
+"""
+send_pacer.py
+-------------
+Adaptive ESP-NOW transmit pacing for the controller, driven by delivery
+feedback.
+
+The controller asks should_send() once per sample and reports every send
+attempt with sent(). The pacer keeps a send gap between a ceiling rate
+(ceiling_hz, the fastest changed reports are sent) and a floor rate (floor_hz,
+the slowest keepalives are sent while sampling at full rate):
+
+  - Every ADAPT_MS it reads the ESPNow.send_success/send_failure counters
+    (one of them counts up per unicast frame once its MAC-level ACK arrives
+    or the radio gives up retrying). If more than CONGESTED_PERMILLE of the
+    frames failed, or esp.send() raised (send queue full), the gap doubles;
+    while fewer than CLEAR_PERMILLE fail it shrinks by an eighth (at least
+    GAP_STEP_MS). Backing off fast and recovering gradually keeps the
+    controller from flooding a busy channel.
+  - Changed reports are sent once the gap has passed since the last send;
+    unchanged ones go out as keepalives every KEEPALIVE_FACTOR gaps (at
+    least keepalive_ms, at most one floor period).
+  - An important transition (a brake or enable button change) starts a burst:
+    the frame is repeated on the next few samples regardless of the gap, 2
+    to BURST_MAX copies depending on the recent failure rate, so a single
+    lost frame can't leave the robot driving.
+
+Repeats are sent with the same sequence number, so the receiver's
+link_stats counts them as duplicates rather than as new frames.
+"""
+
+from adafruit_ticks import ticks_ms, ticks_diff
+
+SEND_NONE = 0
+SEND_NEW = 1  # Send the current report as a new frame
+SEND_REPEAT = 2  # Resend the last frame unchanged (burst copy)
+
+ADAPT_MS = 500  # Delivery statistics window
+CONGESTED_PERMILLE = 250  # Failure rate that doubles the gap
+CLEAR_PERMILLE = 50  # Failure rate below which the gap shrinks
+GAP_STEP_MS = 2  # Smallest gap decrease per clear window
+KEEPALIVE_FACTOR = 5  # Keepalive interval in gaps
+BURST_MAX = 4  # Most copies of an important frame
+
+
+class SendPacer:
+    """Chooses when the controller sends, from ESP-NOW delivery feedback."""
+
+    def __init__(self, esp, floor_hz=5, ceiling_hz=50, keepalive_ms=100):
+        self.esp = esp
+        self.min_gap_ms = max(1, 1000 // ceiling_hz)
+        self.max_gap_ms = max(self.min_gap_ms, 1000 // floor_hz)
+        self.keepalive_ms = keepalive_ms
+        self.gap_ms = self.min_gap_ms
+        self.burst_copies = 2
+        self._burst = 0  # Copies of the current important frame still to send
+        self._last_send = ticks_ms()
+        self._window_start = self._last_send
+        self._success = esp.send_success
+        self._failure = esp.send_failure
+        self._errors = 0  # send() exceptions in the current window
+
+        # Statistics.
+        self.frames = 0
+        self.repeats = 0
+        self.bursts = 0
+        self.errors = 0
+        self.backoffs = 0
+        self.deferred = 0  # Samples whose changed report waited for the gap
+        self.failure_permille = 0  # Failure rate of the last window with sends
+
+    def keepalive_interval(self):
+        return min(self.max_gap_ms, max(self.keepalive_ms, self.gap_ms * KEEPALIVE_FACTOR))
+
+    def should_send(self, now, changed, important=False):
+        """Returns SEND_NONE, SEND_NEW or SEND_REPEAT for the current sample."""
+        if important:
+            self._burst = self.burst_copies
+            self.bursts += 1
+            return SEND_NEW
+        if self._burst:
+            return SEND_NEW if changed else SEND_REPEAT  # A newer report carries the buttons too
+        if changed:
+            if ticks_diff(now, self._last_send) >= self.gap_ms:
+                return SEND_NEW
+            self.deferred += 1
+            return SEND_NONE
+        if ticks_diff(now, self._last_send) >= self.keepalive_interval():
+            return SEND_NEW
+        return SEND_NONE
+
+    def sent(self, now, kind, ok=True):
+        """Records one send attempt; ok is False when esp.send() raised."""
+        self._last_send = now
+        if self._burst:
+            self._burst -= 1
+        if kind == SEND_REPEAT:
+            self.repeats += 1
+        else:
+            self.frames += 1
+        if not ok:
+            self.errors += 1
+            self._errors += 1
+
+    def adapt(self, now):
+        """Updates the gap and burst size once per ADAPT_MS window."""
+        if ticks_diff(now, self._window_start) < ADAPT_MS:
+            return
+        self._window_start = now
+        success = self.esp.send_success
+        failure = self.esp.send_failure
+        delivered = success - self._success
+        failed = failure - self._failure
+        self._success = success
+        self._failure = failure
+        errors = self._errors
+        self._errors = 0
+        if delivered + failed:
+            self.failure_permille = failed * 1000 // (delivered + failed)
+        elif not errors:
+            return  # Nothing sent: keep the current estimate
+
+        if errors or self.failure_permille > CONGESTED_PERMILLE:
+            if self.gap_ms < self.max_gap_ms:
+                self.gap_ms = min(self.max_gap_ms, self.gap_ms * 2)
+                self.backoffs += 1
+        elif self.failure_permille < CLEAR_PERMILLE:
+            self.gap_ms = max(self.min_gap_ms, self.gap_ms - max(GAP_STEP_MS, self.gap_ms // 8))
+        self.burst_copies = min(BURST_MAX, 2 + self.failure_permille // 150)
+
+    def report(self):
+        """Prints the current send rate and delivery statistics."""
+        print(
+            f"Send: gap={self.gap_ms} ms ({1000 // self.gap_ms} Hz max) keepalive={self.keepalive_interval()} ms"
+            f" burst={self.burst_copies} failure={self.failure_permille / 10:.1f}%"
+        )
+        print(
+            f"  frames={self.frames} repeats={self.repeats} bursts={self.bursts} deferred={self.deferred}"
+            f" backoffs={self.backoffs} send_errors={self.errors}"
+            f" acked={self.esp.send_success} failed={self.esp.send_failure}"
+        )
@@ -0,0 +1,68 @@
+"""
+serial_console.py
+-----------------
+Non-blocking command console on the USB serial port.
+
+Projects register commands and call poll() once per loop iteration. poll()
+only reads the characters that are already waiting, so it never stalls the
+control loop; a command runs when its line is complete.
+
+    import serial_console as console
+    console.register("stats", probe.report, "print timing histograms")
+
+    while True:
+        console.poll()
+        ...
+
+execute() runs a command line from any other source, such as a radio frame.
+"""
+
+import sys
+import supervisor
+
+MAX_LINE = 64  # Characters kept per command line
+
+_commands = {}
+_line = []
+
+
+def register(name, handler, help_text=""):
+    """Registers handler(*args) to run for the command `name`."""
+    _commands[name] = (handler, help_text)
+
+
+def execute(line):
+    """Runs one command line ("name arg1 arg2 ..."). Returns False if the command is unknown."""
+    words = line.strip().split()
+    if not words:
+        return True
+    entry = _commands.get(words[0].lower())
+    if entry is None:
+        print(f"Unknown command '{words[0]}'. Type 'help' for a list.")
+        return False
+    try:
+        entry[0](*words[1:])
+    except Exception as e:
+        print(f"Command '{words[0]}' failed: {e}")
+    return True
+
+
+def poll():
+    """Reads any pending serial input without blocking and runs completed lines."""
+    while supervisor.runtime.serial_bytes_available:
+        ch = sys.stdin.read(1)
+        if ch in "\r\n":
+            if _line:
+                line = "".join(_line)
+                _line.clear()
+                execute(line)
+        elif len(_line) < MAX_LINE:
+            _line.append(ch)
+
+
+def _help():
+    for name in sorted(_commands):
+        print(f"  {name:<10} {_commands[name][1]}")
+
+
+register("help", _help, "list commands")
@@ -0,0 +1,63 @@
+"""
+status_led.py
+-------------
+Shows the drive state on the Feather's NeoPixel. Written to run next to a
+driving project through code.py's composition (see composer.py), e.g.:
+
+    "projects": [{"name": "robot_receiver", "priority": 3}, "status_led"]
+
+  green   motors enabled, brightness follows the commanded duty
+  blue    brakes engaged
+  amber   motors disabled
+  red     blinking: battery undervoltage cutoff
+
+Run on its own it shows the motor library's idle state, which is only useful
+for checking the LED.
+"""
+
+import board
+import digitalio
+import neopixel
+import circuitpython_zsx11h as motor
+
+UPDATE_MS = 100  # Time between LED updates
+MIN_LEVEL = 8  # Dimmest green, so an enabled but stopped robot still shows
+MAX_LEVEL = 64
+
+BLUE = (0, 0, MAX_LEVEL)
+AMBER = (MAX_LEVEL, MAX_LEVEL // 3, 0)
+RED = (MAX_LEVEL, 0, 0)
+OFF = (0, 0, 0)
+
+if hasattr(board, "NEOPIXEL_POWER"):
+    _power = digitalio.DigitalInOut(board.NEOPIXEL_POWER)
+    _power.switch_to_output(value=True)
+pixel = neopixel.NeoPixel(board.NEOPIXEL, 1, brightness=1.0, auto_write=False)
+
+
+def color(blink):
+    """Returns the LED color for the current motor state."""
+    if motor.undervoltage:
+        return RED if blink else OFF
+    if motor.left_brake.value or motor.right_brake.value:
+        return BLUE
+    if not motor.motors_enabled:
+        return AMBER
+    duty = max(motor.left_command, motor.right_command)
+    level = MIN_LEVEL + (MAX_LEVEL - MIN_LEVEL) * duty // 65535
+    return (0, level, 0)
+
+
+async def main():
+    import asyncio
+
+    blink = False
+    shown = None
+    while True:
+        blink = not blink
+        wanted = color(blink)
+        if wanted != shown:
+            pixel[0] = wanted
+            pixel.show()
+            shown = wanted
+        await asyncio.sleep_ms(UPDATE_MS)
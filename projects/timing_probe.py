@@ -0,0 +1,143 @@
+"""
+timing_probe.py
+---------------
+Lightweight timing probes that feed fixed-bucket integer histograms.
+
+    import timing_probe as probe
+    PARSE = probe.register("parse")
+
+    t0 = probe.start()
+    ...parse the packet...
+    probe.stop(PARSE, t0)
+
+    @probe.timed("set_speed")
+    def set_speed(left, right):
+        ...
+
+Durations are taken from time.monotonic_ns in microseconds, wrapped to the
+adafruit_ticks period so adafruit_ticks.ticks_diff handles rollover. Each
+sample increments one bucket of a preallocated array: bucket k counts
+durations from 2**k to 2**(k+1) - 1 microseconds, so the histograms never
+grow. report() prints per-probe p50/p90/p99 (bucket upper bounds) and the
+exact maximum.
+
+Enabled probes do allocate: on CircuitPython time.monotonic_ns() returns a
+long int, so every start() and stop() leaves a few small objects for the
+garbage collector, and a @timed wrapper also packs its call arguments. That
+is the price of microsecond resolution; adafruit_ticks' millisecond ticks
+would be too coarse for the motor library's short functions.
+
+Probes are off unless "timing_probes" is true in config.json. When off,
+start()/stop() return immediately and @timed returns the function unchanged,
+so the decorated motor library runs with no overhead and no allocation.
+"""
+
+import time
+from array import array
+from adafruit_ticks import ticks_diff
+import robot_config
+
+ENABLED = bool(robot_config.get("timing_probes", False))
+MAX_PROBES = 24
+NUM_BUCKETS = 21  # Up to 2**21 us (~2 s)
+_TICKS_MASK = (1 << 29) - 1  # Same period as adafruit_ticks
+
+_names = []
+_buckets = array("L", [0] * (MAX_PROBES * NUM_BUCKETS))
+_counts = array("L", [0] * MAX_PROBES)
+_max_us = array("L", [0] * MAX_PROBES)
+
+
+def register(name):
+    """Registers a named probe and returns its id for stop()."""
+    if name in _names:
+        return _names.index(name)
+    if len(_names) >= MAX_PROBES:
+        raise ValueError("Too many timing probes")
+    _names.append(name)
+    return len(_names) - 1
+
+
+def start():
+    """Returns the current time in microsecond ticks (0 when probes are disabled)."""
+    if not ENABLED:
+        return 0
+    return (time.monotonic_ns() // 1000) & _TICKS_MASK
+
+
+def stop(probe_id, start_ticks):
+    """Records the time elapsed since start() for the given probe."""
+    if not ENABLED:
+        return
+    elapsed = ticks_diff((time.monotonic_ns() // 1000) & _TICKS_MASK, start_ticks)
+    record(probe_id, elapsed)
+
+
+def record(probe_id, elapsed_us):
+    """Adds one duration in microseconds to a probe's histogram."""
+    bucket = 0
+    value = elapsed_us
+    while value > 1 and bucket < NUM_BUCKETS - 1:
+        value >>= 1
+        bucket += 1
+    _buckets[probe_id * NUM_BUCKETS + bucket] += 1
+    _counts[probe_id] += 1
+    if elapsed_us > _max_us[probe_id]:
+        _max_us[probe_id] = elapsed_us
+
+
+def timed(name):
+    """Decorator that times every call of a function under the named probe."""
+
+    def decorate(function):
+        if not ENABLED:
+            return function
+        probe_id = register(name)
+
+        def wrapper(*args, **kwargs):
+            t0 = start()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stop(probe_id, t0)
+
+        return wrapper
+
+    return decorate
+
+
+def percentile(probe_id, fraction):
+    """Returns the upper bound in microseconds of the bucket holding the given fraction of samples."""
+    count = _counts[probe_id]
+    if not count:
+        return 0
+    threshold = count * fraction
+    seen = 0
+    base = probe_id * NUM_BUCKETS
+    for bucket in range(NUM_BUCKETS):
+        seen += _buckets[base + bucket]
+        if seen >= threshold:
+            return (2 << bucket) - 1
+    return (2 << (NUM_BUCKETS - 1)) - 1
+
+
+def reset():
+    """Clears every histogram, keeping the registered probes."""
+    for i in range(len(_buckets)):
+        _buckets[i] = 0
+    for i in range(MAX_PROBES):
+        _counts[i] = 0
+        _max_us[i] = 0
+
+
+def report():
+    """Prints the per-probe percentiles in microseconds."""
+    if not ENABLED:
+        print("Timing probes are disabled (set \"timing_probes\": true in config.json)")
+        return
+    print(f"{'probe':<18}{'count':>8}{'p50_us':>9}{'p90_us':>9}{'p99_us':>9}{'max_us':>9}")
+    for i, name in enumerate(_names):
+        print(
+            f"{name:<18}{_counts[i]:>8}{percentile(i, 0.5):>9}{percentile(i, 0.9):>9}"
+            f"{percentile(i, 0.99):>9}{_max_us[i]:>9}"
+        )
@@ -0,0 +1,151 @@
+"""
+wheel_calibration.py
+--------------------
+Measures both wheels across a duty sweep and stores per-wheel calibration in
+config.json for circuitpython_zsx11h:
+
+  1. Polarity: each wheel is jogged alone with the DIR level the library
+     currently treats as forward, and the operator answers y/n on the serial
+     console (the SPEED output gives pulse rate only, not direction). No answer
+     within POLARITY_TIMEOUT keeps the current level.
+  2. Sweep: both wheels are driven forward together at duties 0, 4096, ...
+     65535 and their speed is measured from the SPEED hall pulses.
+  3. Table: at every point the common target is the slower wheel's speed, and
+     each wheel's duty is found by interpolating its measured curve at that
+     speed. The resulting tables make both wheels answer a command with the
+     same speed; the library applies them with an integer table lookup.
+
+The results are written to the "calibration" object in config.json, which
+needs a filesystem writable by code. Set "active_project" to
+"wheel_calibration" to run it, with the robot lifted off the ground.
+"""
+
+import sys
+import time
+import board
+import countio
+import supervisor
+import robot_config
+import circuitpython_zsx11h as motor
+
+# ---- Calibration Configuration ----
+JOG_DUTY = 8000  # Duty used for the polarity jog
+JOG_TIME = 1.5  # Seconds per polarity jog
+POLARITY_TIMEOUT = 20  # Seconds to wait for an operator answer
+SETTLE_TIME = 1.0  # Seconds to reach steady speed at each sweep point
+MEASURE_TIME = 1.5  # Seconds to count hall pulses at each sweep point
+STEP = 1 << motor.CORRECTION_BITS  # Duty spacing of the correction table
+
+SPEED_PINS = {"left": board.A4, "right": board.D13}
+
+
+def ask(question, timeout):
+    """Asks a y/n question on the serial console. Returns True, False, or None on timeout."""
+    print(f"{question} [y/n]")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if supervisor.runtime.serial_bytes_available:
+            answer = sys.stdin.read(1).lower()
+            if answer in ("y", "n"):
+                return answer == "y"
+        time.sleep(0.05)
+    return None
+
+
+def detect_polarity(wheel, forward_level):
+    """Jogs one wheel and asks the operator whether it turned forward. Returns the forward DIR level."""
+    direction_pin = motor.left_dir if wheel == "left" else motor.right_dir
+    direction_pin.value = forward_level
+    motor.write_duty(JOG_DUTY if wheel == "left" else 0, JOG_DUTY if wheel == "right" else 0)
+    time.sleep(JOG_TIME)
+    motor.write_duty(0, 0)
+    answer = ask(f"Did the {wheel} wheel turn FORWARD (toward the front of the robot)?", POLARITY_TIMEOUT)
+    if answer is None:
+        print(f"No answer, keeping {wheel} forward level {forward_level}")
+        return forward_level
+    return forward_level if answer else not forward_level
+
+
+def sweep(counters):
+    """Drives both wheels through the duty grid. Returns the (left, right) pulses-per-second lists."""
+    speeds = {"left": [], "right": []}
+    for point in range(motor.CORRECTION_POINTS):
+        duty = min(point * STEP, 65535)
+        motor.write_duty(duty, duty)
+        time.sleep(SETTLE_TIME)
+        for counter in counters.values():
+            counter.reset()
+        start = time.monotonic()
+        time.sleep(MEASURE_TIME)
+        elapsed = time.monotonic() - start
+        for wheel in ("left", "right"):
+            speeds[wheel].append(counters[wheel].count / elapsed)
+        print(f"duty={duty} left={speeds['left'][-1]:.1f}/s right={speeds['right'][-1]:.1f}/s")
+    motor.stop()
+    return speeds["left"], speeds["right"]
+
+
+def duty_for_speed(speeds, target):
+    """Interpolates the duty at which a measured (non-decreasing) speed curve reaches target."""
+    for point in range(1, len(speeds)):
+        if speeds[point] >= target:
+            low = speeds[point - 1]
+            span = speeds[point] - low
+            fraction = (target - low) / span if span > 0 else 1.0
+            return int(min(65535, (point - 1 + fraction) * STEP))
+    return 65535
+
+
+def build_tables(left, right):
+    """Returns the (left, right) duty-correction tables matching both wheels to the slower one."""
+    # Enforce monotonic curves so measurement noise can't fold the tables.
+    for curve in (left, right):
+        for point in range(1, len(curve)):
+            curve[point] = max(curve[point], curve[point - 1])
+    left_table = [0]
+    right_table = [0]
+    for point in range(1, motor.CORRECTION_POINTS):
+        target = min(left[point], right[point])
+        if target <= 0:
+            # Neither wheel turns yet (driver deadband): keep the commanded duty.
+            duty = min(point * STEP, 65535)
+            left_table.append(duty)
+            right_table.append(duty)
+        else:
+            left_table.append(duty_for_speed(left, target))
+            right_table.append(duty_for_speed(right, target))
+    return left_table, right_table
+
+
+print("Wheel calibration: lift the robot, both wheels will spin.")
+motor.release_brakes()
+motor.set_calibration("left", motor.LEFT_FORWARD, None)  # Measure raw, uncorrected duty
+motor.set_calibration("right", motor.RIGHT_FORWARD, None)
+
+left_forward = detect_polarity("left", motor.LEFT_FORWARD)
+right_forward = detect_polarity("right", motor.RIGHT_FORWARD)
+motor.set_calibration("left", left_forward, None)
+motor.set_calibration("right", right_forward, None)
+
+counters = {wheel: countio.Counter(pin, edge=countio.Edge.RISE) for wheel, pin in SPEED_PINS.items()}
+try:
+    motor.move_forward(0)  # Set both DIR pins to the detected forward level
+    left_speeds, right_speeds = sweep(counters)
+finally:
+    motor.write_duty(0, 0)
+    for counter in counters.values():
+        counter.deinit()
+
+left_table, right_table = build_tables(left_speeds, right_speeds)
+motor.set_calibration("left", left_forward, left_table)
+motor.set_calibration("right", right_forward, right_table)
+calibration = {
+    "left": {"forward_level": left_forward, "duty_table": left_table},
+    "right": {"forward_level": right_forward, "duty_table": right_table},
+}
+print("Calibration:", calibration)
+try:
+    robot_config.save({"calibration": calibration})
+    print(f"Saved to {robot_config.CONFIG_FILE}")
+except OSError as e:
+    print(f"Cannot save calibration ({e}); copy the values above into config.json")
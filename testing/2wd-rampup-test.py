@@ -4,6 +4,9 @@ import pwmio
 import time
 import sys
 
+sys.path.append("/projects")  # motion_profile lives with the projects; code.py adds this path only for them
+import motion_profile
+
 
 ## end testing
 # === Configuration ===
@@ -54,16 +57,17 @@ def toggle_brakes():
 
 def set_speed(left_speed: float, right_speed: float, ramp_time=0.5):
     """ Gradually ramps the motor speed up or down to avoid abrupt movements """
-    current_left = PWM_L.duty_cycle / 65535
-    current_right = PWM_R.duty_cycle / 65535
+    current_left = PWM_L.duty_cycle
+    current_right = PWM_R.duty_cycle
+    left_delta = int(left_speed * 65535) - current_left
+    right_delta = int(right_speed * 65535) - current_right
     steps = 10  # Number of steps in the ramp
     delay = ramp_time / steps
 
+    # Ease along the shared motion profile curve using integer math
     for i in range(1, steps + 1):
-        # Use a quadratic easing function for smooth acceleration
-        easing_factor = (i / steps) ** 2
-        PWM_L.duty_cycle = int(((current_left + (left_speed - current_left) * easing_factor) * 65535))
-        PWM_R.duty_cycle = int(((current_right + (right_speed - current_right) * easing_factor) * 65535))
+        PWM_L.duty_cycle = motion_profile.ramp_value(current_left, left_delta, i, steps)
+        PWM_R.duty_cycle = motion_profile.ramp_value(current_right, right_delta, i, steps)
         time.sleep(delay)
 
 def move(left_speed=SPEED_LEVELS[speed_index], right_speed=SPEED_LEVELS[speed_index], forward=True):
@@ -81,9 +85,11 @@ def move(left_speed=SPEED_LEVELS[speed_index], right_speed=SPEED_LEVELS[speed_in
 
 def stop():
     """ Gradually stops the motors instead of abrupt braking """
-    for i in range(10, 0, -1):  # Gradual deceleration
-        PWM_L.duty_cycle = int(PWM_L.duty_cycle * (i / 10))
-        PWM_R.duty_cycle = int(PWM_R.duty_cycle * (i / 10))
+    start_left = PWM_L.duty_cycle
+    start_right = PWM_R.duty_cycle
+    for i in range(1, 11):  # Gradual deceleration along the motion profile
+        PWM_L.duty_cycle = motion_profile.ramp_value(start_left, -start_left, i, 10)
+        PWM_R.duty_cycle = motion_profile.ramp_value(start_right, -start_right, i, 10)
         time.sleep(0.05)  # Short delay for smoother stopping
     ENABLE_L.value = 0  # Disable motors
     ENABLE_R.value = 0  # Disable motors
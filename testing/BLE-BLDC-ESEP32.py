@@ -2,6 +2,10 @@ import board
 import digitalio
 import pwmio
 import time
+import sys
+
+sys.path.append("/projects")  # motion_profile lives with the projects; code.py adds this path only for them
+import motion_profile
 import adafruit_ble
 from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 from adafruit_ble.services.nordic import UARTService
@@ -66,15 +70,17 @@ def toggle_dir_R():
     print(f"Right Motor Direction Inverted: {dir_R_inverted}")
 
 def set_speed(left_speed: float, right_speed: float, ramp_time=0.2):
-    current_left = PWM_L.duty_cycle / 65535
-    current_right = PWM_R.duty_cycle / 65535
+    current_left = PWM_L.duty_cycle
+    current_right = PWM_R.duty_cycle
+    left_delta = int(left_speed * 65535) - current_left
+    right_delta = int(right_speed * 65535) - current_right
     steps = 5
     delay = ramp_time / steps
 
+    # Ease along the shared motion profile curve using integer math
     for i in range(1, steps + 1):
-        easing_factor = (i / steps) ** 2
-        PWM_L.duty_cycle = int(((current_left + (left_speed - current_left) * easing_factor) * 65535))
-        PWM_R.duty_cycle = int(((current_right + (right_speed - current_right) * easing_factor) * 65535))
+        PWM_L.duty_cycle = motion_profile.ramp_value(current_left, left_delta, i, steps)
+        PWM_R.duty_cycle = motion_profile.ramp_value(current_right, right_delta, i, steps)
         time.sleep(delay)
 
     PWM_L.duty_cycle = int(left_speed * 65535)
@@ -145,9 +151,11 @@ def pivot_right():
     stop()
 
 def stop():
-    for i in range(10, 0, -1):
-        PWM_L.duty_cycle = int(PWM_L.duty_cycle * (i / 10))
-        PWM_R.duty_cycle = int(PWM_R.duty_cycle * (i / 10))
+    start_left = PWM_L.duty_cycle
+    start_right = PWM_R.duty_cycle
+    for i in range(1, 11):  # Gradual deceleration along the motion profile
+        PWM_L.duty_cycle = motion_profile.ramp_value(start_left, -start_left, i, 10)
+        PWM_R.duty_cycle = motion_profile.ramp_value(start_right, -start_right, i, 10)
         time.sleep(0.05)
 
     PWM_L.duty_cycle = 0
@@ -1,14 +1,14 @@
 import time
 import board
-import adafruit_nunchuk
 import wifi
 import espnow
+from nunchuk_sampler import NunchukSampler
 
 # Initialize I2C using the built-in STEMMA QT connector
 i2c = board.STEMMA_I2C()  # Uses built-in STEMMA QT connector
 
-# Initialize the Nunchuk
-nc = adafruit_nunchuk.Nunchuk(i2c)
+# Initialize the Nunchuk sampler (one I2C read per report)
+nc = NunchukSampler(i2c, rate_hz=10)
 
 # Initialize ESP-NOW
 esp = espnow.ESPNow()
@@ -30,17 +30,17 @@ previous_z_state = False
 
 while True:
     try:
-        # Read joystick positions
-        x, y = nc.joystick
-        print(f"Joystick position: x={x}, y={y}")
+        if not nc.sample():
+            time.sleep(nc.time_to_next() / 1000)
+            continue
 
-        # Read acceleration data
-        ax, ay, az = nc.acceleration
-        print(f"Acceleration: ax={ax}, ay={ay}, az={az}")
+        # Joystick positions, acceleration and buttons all come from the same report
+        print(f"Joystick position: x={nc.x}, y={nc.y}")
+        print(f"Acceleration: ax={nc.ax}, ay={nc.ay}, az={nc.az}")
 
         # Check button states
-        current_c_state = nc.buttons.C
-        current_z_state = nc.buttons.Z
+        current_c_state = nc.c
+        current_z_state = nc.z
 
         # Send messages only on state change
         if current_c_state and not previous_c_state:
@@ -57,4 +57,4 @@ while True:
     except Exception as e:
         print("An error occurred:", e)
 
-    time.sleep(0.1)  # Reduced sleep time for better responsiveness
+    time.sleep(nc.time_to_next() / 1000)